@@ -0,0 +1,80 @@
+# ! Build step: snapshot the Stripe type registry into a static module
+# Walks the installed stripe package once (the expensive reflection that
+# _dynamic_types.py used to do on every import) and writes _stripe_registry.py:
+# a plain dict of exported name -> (module, class name), pinned to the stripe version.
+#
+# The snapshot is committed and shipped with the package; regenerate it whenever
+# the pinned stripe version changes (CI fails while it is stale):
+#     python -m app.core.third_party_integrations.stripe_home.api._build_registry
+# Import time only reads it; nothing is written into the package at runtime.
+
+import importlib.metadata
+import importlib.util
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_PATH = Path(__file__).with_name("_stripe_registry.py")
+
+HEADER = """# ! AUTO-GENERATED by api/_build_registry.py -- do not edit by hand.
+# Regenerate with `python -m ...api._build_registry` after upgrading stripe.
+"""
+
+
+def installed_stripe_version() -> str:
+    return importlib.metadata.version("stripe")
+
+
+def build_registry() -> dict[str, tuple[str, str]]:
+    """Reflect over the stripe package and map public type names to import paths."""
+    import stripe
+
+    # * Newer stripe releases load most exports lazily via `_import_map`, so they
+    # * are missing from dir(stripe); include them (the build step may import them)
+    names = set(dir(stripe)) | set(getattr(stripe, "_import_map", {}))
+    paths: dict[str, tuple[str, str]] = {}
+    for name in names:
+        if name.startswith("_"):
+            continue
+        obj = getattr(stripe, name)
+        # * Exclude builtins and private classes
+        if isinstance(obj, type) and obj.__module__.startswith("stripe"):
+            paths[name] = (obj.__module__, obj.__qualname__)
+    return dict(sorted(paths.items()))
+
+
+def read_registry(target: Path = REGISTRY_PATH) -> tuple[str, dict[str, tuple[str, str]]] | None:
+    """(stripe version, paths) from a snapshot module, or None if it is missing."""
+    if not target.exists():
+        return None
+    spec = importlib.util.spec_from_file_location(f"{__package__}._stripe_registry", target)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.STRIPE_VERSION, module.STRIPE_TYPE_PATHS
+
+
+def write_registry(
+    paths: dict[str, tuple[str, str]], version: str, target: Path = REGISTRY_PATH
+) -> Path:
+    """Atomically write the snapshot module."""
+    lines = [HEADER, f"STRIPE_VERSION = {version!r}\n", "\nSTRIPE_TYPE_PATHS = {\n"]
+    lines += [f"    {name!r}: {path!r},\n" for name, path in paths.items()]
+    lines.append("}\n")
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.writelines(lines)
+    os.replace(tmp_path, target)
+    return target
+
+
+def main() -> None:
+    version = installed_stripe_version()
+    target = write_registry(build_registry(), version)
+    print(f"Wrote Stripe type registry for stripe {version} to {target}")
+
+
+if __name__ == "__main__":
+    main()
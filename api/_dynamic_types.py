@@ -1,29 +1,82 @@
 # ! Stripe Types Registry for type checking and runtime reflection
 # Uses types-stripe stubs for static analysis, and real stripe package for runtime
 
-import stripe
+import importlib
+import logging
+from collections.abc import Iterator, Mapping
 from typing import Any
 
-# * Dynamically build an exhaustive registry of all Stripe classes/types
-STRIPE_TYPE_REGISTRY: dict[str, Any] = {}
+from ._build_registry import REGISTRY_PATH, build_registry, installed_stripe_version, read_registry
 
-for name in dir(stripe):
-    obj = getattr(stripe, name)
-    if isinstance(obj, type):
-        # Exclude builtins and private classes
-        if obj.__module__.startswith("stripe") and not name.startswith("_"):
-            STRIPE_TYPE_REGISTRY[name] = obj
+logger = logging.getLogger(__name__)
+
+
+def _load_type_paths(target=REGISTRY_PATH) -> dict[str, tuple[str, str]]:
+    """
+    Load the shipped snapshot (name -> import path) with zero reflection.
+    If it is missing or was built for another stripe version, fall back to
+    reflecting in memory for this process only; the package is never written
+    to at runtime, so read-only installs work.
+    """
+    installed = installed_stripe_version()
+    snapshot = read_registry(target)
+    if snapshot is not None and snapshot[0] == installed:
+        return snapshot[1]
+    logger.warning(
+        f"Stripe type registry snapshot {'missing' if snapshot is None else f'built for {snapshot[0]}'}, "
+        f"stripe {installed} installed; reflecting at import. Regenerate it with api/_build_registry.py"
+    )
+    return build_registry()
+
+
+class _LazyTypeRegistry(Mapping):
+    """Read-only name -> class mapping that imports each class on first lookup."""
+
+    def __init__(self, paths: dict[str, tuple[str, str]]):
+        self._paths = paths
+        self._resolved: dict[str, Any] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        try:
+            return self._resolved[name]
+        except KeyError:
+            module_name, qualname = self._paths[name]
+            obj = importlib.import_module(module_name)
+            for part in qualname.split("."):
+                obj = getattr(obj, part)
+            self._resolved[name] = obj
+            return obj
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._paths
+
+
+STRIPE_TYPE_PATHS = _load_type_paths()
+
+# * Exhaustive registry of all public Stripe classes/types, resolved on demand
+STRIPE_TYPE_REGISTRY: Mapping[str, Any] = _LazyTypeRegistry(STRIPE_TYPE_PATHS)
 
-# * Generate an exhaustive list of all valid Stripe types for export
-# This will create individual exports for every public Stripe type
 
-# // BEGIN AUTO-GENERATED STRIPE TYPES EXPORTS
 # * Each type is individually exported for type checking and import convenience
-for _type_name, _type in STRIPE_TYPE_REGISTRY.items():
-    globals()[_type_name] = _type
-# // END AUTO-GENERATED STRIPE TYPES EXPORTS
+def __getattr__(name: str) -> Any:
+    if name in STRIPE_TYPE_PATHS:
+        value = STRIPE_TYPE_REGISTRY[name]
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(STRIPE_TYPE_PATHS))
+
 
-__all__ = list(STRIPE_TYPE_REGISTRY.keys())
+__all__ = list(STRIPE_TYPE_PATHS.keys())
 
 # // STRIPE_TYPE_REGISTRY and all Stripe types are now available as direct imports
 # // Type checkers (mypy, pyright) will use types-stripe stubs automatically if installed
@@ -49,6 +49,24 @@ class StripeNotFoundError(StripeError):
     pass
 
 
+class StripeRateLimitExceeded(RateLimitError):
+    """Raised when the local Stripe rate limiter gives up waiting for a token."""
+
+    pass
+
+
+class StripeIdempotencyConflict(IdempotencyError):
+    """Raised when an Idempotency-Key is reused with a different request payload."""
+
+    pass
+
+
+class StripeIdempotencyInProgress(IdempotencyError):
+    """Raised when a duplicate request gives up waiting for the in-flight original."""
+
+    pass
+
+
 """
 Base exception for all Stripe-related errors.
 """
@@ -1,7 +1,10 @@
-# Dynamically import all VAPI types as globals using TypesConfig
+# Expose all VAPI types listed in TypesConfig as module attributes.
+# Lazy by default: names resolve (and import their module) on first access via
+# module-level __getattr__. Set VAPI_EAGER_TYPES=true to import everything up
+# front with a thread pool, as before.
 import importlib
+import logging
 import os
-import sys
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import lru_cache
@@ -10,10 +13,7 @@ from threading import Lock
 
 from ._types import TypesConfig
 
-print(f"[DEBUG] sys.path before modification: {sys.path}")
-print(
-    f"[DEBUG] Attempting to import modules using library_name='{TypesConfig.library_name}'"
-)
+logger = logging.getLogger(__name__)
 
 _imported_types = {}
 _imported_types_lock = Lock()
@@ -25,39 +25,55 @@ CB_STATE = {}
 CB_LAST_FAILURE = {}
 
 NUM_THREADS = int(os.getenv("VAPI_IMPORT_THREADS", "8"))  # Configurable thread count
+EAGER_IMPORT = os.getenv("VAPI_EAGER_TYPES", "false").lower() in ("1", "true", "yes")
+
+
+def _type_name(filename):
+    stem = Path(filename).stem
+    if TypesConfig.conversion_method == "camel_case":
+        return "".join(part.capitalize() for part in stem.split("_"))
+    return stem
+
+
+# * Name -> (module, class) index; pure string work, no imports
+_type_index = {
+    _type_name(filename): (
+        f"{TypesConfig.library_name}.{Path(filename).stem}",
+        _type_name(filename),
+    )
+    for filename in TypesConfig.types
+}
 
 
 # Caching decorator for module/class import
-@lru_cache(maxsize=128)
+@lru_cache(maxsize=None)
 def cached_import(module_name, class_name):
     return getattr(importlib.import_module(module_name), class_name)
 
 
-def import_type(filename):
-    module_name = f"{TypesConfig.library_name}.{Path(filename).stem}"
-    if TypesConfig.conversion_method == "camel_case":
-        class_name = "".join(
-            part.capitalize() for part in Path(filename).stem.split("_")
-        )
-    else:
-        class_name = Path(filename).stem
-    print(f"[DEBUG] Importing: module_name='{module_name}', class_name='{class_name}'")
+def resolve_type(class_name):
+    """Import and cache one type by its exported name; None if unavailable."""
+    if class_name in _imported_types:
+        return _imported_types[class_name]
+    module_name, attr_name = _type_index[class_name]
+    logger.debug(f"Importing: module_name='{module_name}', class_name='{attr_name}'")
     # Circuit breaker logic
     if CB_STATE.get(module_name, "closed") == "open":
         # Check if recovery timeout has passed
         if time.time() - CB_LAST_FAILURE.get(module_name, 0) < CB_RECOVERY_TIMEOUT:
-            print(f"[CB] Circuit open for {module_name}, skipping import.")
+            logger.debug(f"[CB] Circuit open for {module_name}, skipping import.")
             return None
         else:
-            print(f"[CB] Recovery timeout passed for {module_name}, resetting circuit.")
+            logger.info(f"[CB] Recovery timeout passed for {module_name}, resetting circuit.")
             CB_STATE[module_name] = "closed"
             CB_LAST_FAILURE[module_name] = 0
     try:
-        imported_class = cached_import(module_name, class_name)
+        imported_class = cached_import(module_name, attr_name)
         with _imported_types_lock:
             _imported_types[class_name] = imported_class
+        return imported_class
     except Exception as e:
-        print(f"[ERROR] Failed to import {class_name} from {module_name}: {e}")
+        logger.debug(f"Failed to import {attr_name} from {module_name}: {e}")
         # Circuit breaker failure tracking
         CB_LAST_FAILURE[module_name] = time.time()
         CB_STATE[module_name] = CB_STATE.get(module_name, "closed")
@@ -65,15 +81,47 @@ def import_type(filename):
         CB_STATE[f"{module_name}_failures"] = failures
         if failures >= CB_FAILURE_THRESHOLD:
             CB_STATE[module_name] = "open"
-            print(f"[CB] Circuit opened for {module_name} after {failures} failures.")
+            logger.warning(f"[CB] Circuit opened for {module_name} after {failures} failures.")
+        return None
+
+
+def import_all_types():
+    """Eagerly resolve every type using a thread pool; returns the resolved map."""
+    with ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
+        futures = [executor.submit(resolve_type, name) for name in _type_index]
+        for future in as_completed(futures):
+            future.result()
+    # Concurrent imports of one package can fail transiently; retry those serially
+    for name in _type_index:
+        if name not in _imported_types:
+            resolve_type(name)
+    globals().update(_imported_types)
+    return dict(_imported_types)
+
+
+def _exported_names():
+    """Names that actually resolve, i.e. what a star import can bind."""
+    import_all_types()
+    return [name for name in _type_index if name in _imported_types]
+
+
+def __getattr__(name):
+    if name == "__all__":
+        # Only star imports need the full list: resolve everything once, on demand
+        names = _exported_names()
+        globals()["__all__"] = names
+        return names
+    if name in _type_index:
+        resolved = resolve_type(name)
+        if resolved is not None:
+            globals()[name] = resolved
+            return resolved
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-# Use ThreadPoolExecutor to parallelize imports
-with ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
-    futures = [executor.submit(import_type, filename) for filename in TypesConfig.types]
-    for future in as_completed(futures):
-        future.result()
+def __dir__():
+    return sorted(set(globals()) | set(_type_index))
 
-globals().update(_imported_types)
 
-__all__ = list(_imported_types.keys())
+if EAGER_IMPORT:
+    __all__ = _exported_names()
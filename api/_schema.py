@@ -1,8 +1,16 @@
-# Re-export all generated VAPI types and grouped exports from _generated.py
-from ._generated import *
+# Re-export all generated VAPI types and grouped exports from _generated.py.
+# Attribute access is forwarded lazily so importing this module stays cheap;
+# `from ._schema import Customer` resolves just that one type, and only a star
+# import resolves (and lists in __all__) every type that imports.
+from . import _generated
 
 
-# Re-export __all__ from _generated.py
-from ._generated import __all__ as _generated_all
+def __getattr__(name):
+    value = getattr(_generated, name)
+    if name == "__all__":
+        globals()["__all__"] = value
+    return value
 
-__all__ = _generated_all
+
+def __dir__():
+    return sorted(set(globals()) | set(_generated._type_index))
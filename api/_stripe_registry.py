@@ -0,0 +1,233 @@
+# ! AUTO-GENERATED by api/_build_registry.py -- do not edit by hand.
+# Regenerate with `python -m ...api._build_registry` after upgrading stripe.
+STRIPE_VERSION = '16.0.0'
+
+STRIPE_TYPE_PATHS = {
+    'AIOHTTPClient': ('stripe._http_client', 'AIOHTTPClient'),
+    'APIConnectionError': ('stripe._error', 'APIConnectionError'),
+    'APIError': ('stripe._error', 'APIError'),
+    'APIResource': ('stripe._api_resource', 'APIResource'),
+    'APIResourceTestHelpers': ('stripe._test_helpers', 'APIResourceTestHelpers'),
+    'Account': ('stripe._account', 'Account'),
+    'AccountCapabilityService': ('stripe._account_capability_service', 'AccountCapabilityService'),
+    'AccountExternalAccountService': ('stripe._account_external_account_service', 'AccountExternalAccountService'),
+    'AccountLink': ('stripe._account_link', 'AccountLink'),
+    'AccountLinkService': ('stripe._account_link_service', 'AccountLinkService'),
+    'AccountLoginLinkService': ('stripe._account_login_link_service', 'AccountLoginLinkService'),
+    'AccountPersonService': ('stripe._account_person_service', 'AccountPersonService'),
+    'AccountService': ('stripe._account_service', 'AccountService'),
+    'AccountSession': ('stripe._account_session', 'AccountSession'),
+    'AccountSessionService': ('stripe._account_session_service', 'AccountSessionService'),
+    'AppInfo': ('stripe._app_info', 'AppInfo'),
+    'ApplePayDomain': ('stripe._apple_pay_domain', 'ApplePayDomain'),
+    'ApplePayDomainService': ('stripe._apple_pay_domain_service', 'ApplePayDomainService'),
+    'Application': ('stripe._application', 'Application'),
+    'ApplicationFee': ('stripe._application_fee', 'ApplicationFee'),
+    'ApplicationFeeRefund': ('stripe._application_fee_refund', 'ApplicationFeeRefund'),
+    'ApplicationFeeRefundService': ('stripe._application_fee_refund_service', 'ApplicationFeeRefundService'),
+    'ApplicationFeeService': ('stripe._application_fee_service', 'ApplicationFeeService'),
+    'AppsService': ('stripe._apps_service', 'AppsService'),
+    'AsyncStripeEventNotificationHandler': ('stripe._event_notification_handler', 'AsyncStripeEventNotificationHandler'),
+    'AsyncStripeEventNotificationHandlerWithoutVerification': ('stripe._event_notification_handler', 'AsyncStripeEventNotificationHandlerWithoutVerification'),
+    'AuthenticationError': ('stripe._error', 'AuthenticationError'),
+    'Balance': ('stripe._balance', 'Balance'),
+    'BalanceService': ('stripe._balance_service', 'BalanceService'),
+    'BalanceSettings': ('stripe._balance_settings', 'BalanceSettings'),
+    'BalanceSettingsService': ('stripe._balance_settings_service', 'BalanceSettingsService'),
+    'BalanceTransaction': ('stripe._balance_transaction', 'BalanceTransaction'),
+    'BalanceTransactionService': ('stripe._balance_transaction_service', 'BalanceTransactionService'),
+    'BankAccount': ('stripe._bank_account', 'BankAccount'),
+    'BillingPortalService': ('stripe._billing_portal_service', 'BillingPortalService'),
+    'BillingService': ('stripe._billing_service', 'BillingService'),
+    'Capability': ('stripe._capability', 'Capability'),
+    'Card': ('stripe._card', 'Card'),
+    'CardError': ('stripe._error', 'CardError'),
+    'CashBalance': ('stripe._cash_balance', 'CashBalance'),
+    'Charge': ('stripe._charge', 'Charge'),
+    'ChargeService': ('stripe._charge_service', 'ChargeService'),
+    'CheckoutService': ('stripe._checkout_service', 'CheckoutService'),
+    'ClimateService': ('stripe._climate_service', 'ClimateService'),
+    'ConfirmationToken': ('stripe._confirmation_token', 'ConfirmationToken'),
+    'ConfirmationTokenService': ('stripe._confirmation_token_service', 'ConfirmationTokenService'),
+    'ConnectCollectionTransfer': ('stripe._connect_collection_transfer', 'ConnectCollectionTransfer'),
+    'CountrySpec': ('stripe._country_spec', 'CountrySpec'),
+    'CountrySpecService': ('stripe._country_spec_service', 'CountrySpecService'),
+    'Coupon': ('stripe._coupon', 'Coupon'),
+    'CouponService': ('stripe._coupon_service', 'CouponService'),
+    'CreateableAPIResource': ('stripe._createable_api_resource', 'CreateableAPIResource'),
+    'CreditNote': ('stripe._credit_note', 'CreditNote'),
+    'CreditNoteLineItem': ('stripe._credit_note_line_item', 'CreditNoteLineItem'),
+    'CreditNoteLineItemService': ('stripe._credit_note_line_item_service', 'CreditNoteLineItemService'),
+    'CreditNotePreviewLinesService': ('stripe._credit_note_preview_lines_service', 'CreditNotePreviewLinesService'),
+    'CreditNoteService': ('stripe._credit_note_service', 'CreditNoteService'),
+    'Customer': ('stripe._customer', 'Customer'),
+    'CustomerBalanceTransaction': ('stripe._customer_balance_transaction', 'CustomerBalanceTransaction'),
+    'CustomerBalanceTransactionService': ('stripe._customer_balance_transaction_service', 'CustomerBalanceTransactionService'),
+    'CustomerCashBalanceService': ('stripe._customer_cash_balance_service', 'CustomerCashBalanceService'),
+    'CustomerCashBalanceTransaction': ('stripe._customer_cash_balance_transaction', 'CustomerCashBalanceTransaction'),
+    'CustomerCashBalanceTransactionService': ('stripe._customer_cash_balance_transaction_service', 'CustomerCashBalanceTransactionService'),
+    'CustomerFundingInstructionsService': ('stripe._customer_funding_instructions_service', 'CustomerFundingInstructionsService'),
+    'CustomerPaymentMethodService': ('stripe._customer_payment_method_service', 'CustomerPaymentMethodService'),
+    'CustomerPaymentSourceService': ('stripe._customer_payment_source_service', 'CustomerPaymentSourceService'),
+    'CustomerService': ('stripe._customer_service', 'CustomerService'),
+    'CustomerSession': ('stripe._customer_session', 'CustomerSession'),
+    'CustomerSessionService': ('stripe._customer_session_service', 'CustomerSessionService'),
+    'CustomerTaxIdService': ('stripe._customer_tax_id_service', 'CustomerTaxIdService'),
+    'DeletableAPIResource': ('stripe._deletable_api_resource', 'DeletableAPIResource'),
+    'Discount': ('stripe._discount', 'Discount'),
+    'Dispute': ('stripe._dispute', 'Dispute'),
+    'DisputeService': ('stripe._dispute_service', 'DisputeService'),
+    'EntitlementsService': ('stripe._entitlements_service', 'EntitlementsService'),
+    'EphemeralKey': ('stripe._ephemeral_key', 'EphemeralKey'),
+    'EphemeralKeyService': ('stripe._ephemeral_key_service', 'EphemeralKeyService'),
+    'ErrorObject': ('stripe._error_object', 'ErrorObject'),
+    'Event': ('stripe._event', 'Event'),
+    'EventService': ('stripe._event_service', 'EventService'),
+    'ExchangeRate': ('stripe._exchange_rate', 'ExchangeRate'),
+    'ExchangeRateService': ('stripe._exchange_rate_service', 'ExchangeRateService'),
+    'File': ('stripe._file', 'File'),
+    'FileLink': ('stripe._file_link', 'FileLink'),
+    'FileLinkService': ('stripe._file_link_service', 'FileLinkService'),
+    'FileService': ('stripe._file_service', 'FileService'),
+    'FinancialConnectionsService': ('stripe._financial_connections_service', 'FinancialConnectionsService'),
+    'ForwardingService': ('stripe._forwarding_service', 'ForwardingService'),
+    'FundingInstructions': ('stripe._funding_instructions', 'FundingInstructions'),
+    'HTTPClient': ('stripe._http_client', 'HTTPClient'),
+    'HTTPXClient': ('stripe._http_client', 'HTTPXClient'),
+    'IdempotencyError': ('stripe._error', 'IdempotencyError'),
+    'IdentityService': ('stripe._identity_service', 'IdentityService'),
+    'InvalidRequestError': ('stripe._error', 'InvalidRequestError'),
+    'Invoice': ('stripe._invoice', 'Invoice'),
+    'InvoiceItem': ('stripe._invoice_item', 'InvoiceItem'),
+    'InvoiceItemService': ('stripe._invoice_item_service', 'InvoiceItemService'),
+    'InvoiceLineItem': ('stripe._invoice_line_item', 'InvoiceLineItem'),
+    'InvoiceLineItemService': ('stripe._invoice_line_item_service', 'InvoiceLineItemService'),
+    'InvoicePayment': ('stripe._invoice_payment', 'InvoicePayment'),
+    'InvoicePaymentService': ('stripe._invoice_payment_service', 'InvoicePaymentService'),
+    'InvoiceRenderingTemplate': ('stripe._invoice_rendering_template', 'InvoiceRenderingTemplate'),
+    'InvoiceRenderingTemplateService': ('stripe._invoice_rendering_template_service', 'InvoiceRenderingTemplateService'),
+    'InvoiceService': ('stripe._invoice_service', 'InvoiceService'),
+    'IssuingService': ('stripe._issuing_service', 'IssuingService'),
+    'LineItem': ('stripe._line_item', 'LineItem'),
+    'ListObject': ('stripe._list_object', 'ListObject'),
+    'ListableAPIResource': ('stripe._listable_api_resource', 'ListableAPIResource'),
+    'LoginLink': ('stripe._login_link', 'LoginLink'),
+    'Mandate': ('stripe._mandate', 'Mandate'),
+    'MandateService': ('stripe._mandate_service', 'MandateService'),
+    'OAuth': ('stripe._oauth', 'OAuth'),
+    'OAuthErrorObject': ('stripe._error_object', 'OAuthErrorObject'),
+    'OAuthService': ('stripe._oauth_service', 'OAuthService'),
+    'PaymentAttemptRecord': ('stripe._payment_attempt_record', 'PaymentAttemptRecord'),
+    'PaymentAttemptRecordService': ('stripe._payment_attempt_record_service', 'PaymentAttemptRecordService'),
+    'PaymentIntent': ('stripe._payment_intent', 'PaymentIntent'),
+    'PaymentIntentAmountDetailsLineItem': ('stripe._payment_intent_amount_details_line_item', 'PaymentIntentAmountDetailsLineItem'),
+    'PaymentIntentAmountDetailsLineItemService': ('stripe._payment_intent_amount_details_line_item_service', 'PaymentIntentAmountDetailsLineItemService'),
+    'PaymentIntentService': ('stripe._payment_intent_service', 'PaymentIntentService'),
+    'PaymentLink': ('stripe._payment_link', 'PaymentLink'),
+    'PaymentLinkLineItemService': ('stripe._payment_link_line_item_service', 'PaymentLinkLineItemService'),
+    'PaymentLinkService': ('stripe._payment_link_service', 'PaymentLinkService'),
+    'PaymentMethod': ('stripe._payment_method', 'PaymentMethod'),
+    'PaymentMethodConfiguration': ('stripe._payment_method_configuration', 'PaymentMethodConfiguration'),
+    'PaymentMethodConfigurationService': ('stripe._payment_method_configuration_service', 'PaymentMethodConfigurationService'),
+    'PaymentMethodDomain': ('stripe._payment_method_domain', 'PaymentMethodDomain'),
+    'PaymentMethodDomainService': ('stripe._payment_method_domain_service', 'PaymentMethodDomainService'),
+    'PaymentMethodService': ('stripe._payment_method_service', 'PaymentMethodService'),
+    'PaymentRecord': ('stripe._payment_record', 'PaymentRecord'),
+    'PaymentRecordService': ('stripe._payment_record_service', 'PaymentRecordService'),
+    'Payout': ('stripe._payout', 'Payout'),
+    'PayoutService': ('stripe._payout_service', 'PayoutService'),
+    'PermissionError': ('stripe._error', 'PermissionError'),
+    'Person': ('stripe._person', 'Person'),
+    'Plan': ('stripe._plan', 'Plan'),
+    'PlanService': ('stripe._plan_service', 'PlanService'),
+    'Price': ('stripe._price', 'Price'),
+    'PriceService': ('stripe._price_service', 'PriceService'),
+    'Product': ('stripe._product', 'Product'),
+    'ProductCatalogService': ('stripe._product_catalog_service', 'ProductCatalogService'),
+    'ProductFeature': ('stripe._product_feature', 'ProductFeature'),
+    'ProductFeatureService': ('stripe._product_feature_service', 'ProductFeatureService'),
+    'ProductService': ('stripe._product_service', 'ProductService'),
+    'PromotionCode': ('stripe._promotion_code', 'PromotionCode'),
+    'PromotionCodeService': ('stripe._promotion_code_service', 'PromotionCodeService'),
+    'PycurlClient': ('stripe._http_client', 'PycurlClient'),
+    'Quote': ('stripe._quote', 'Quote'),
+    'QuoteComputedUpfrontLineItemsService': ('stripe._quote_computed_upfront_line_items_service', 'QuoteComputedUpfrontLineItemsService'),
+    'QuoteLineItemService': ('stripe._quote_line_item_service', 'QuoteLineItemService'),
+    'QuoteService': ('stripe._quote_service', 'QuoteService'),
+    'RadarService': ('stripe._radar_service', 'RadarService'),
+    'RateLimitError': ('stripe._error', 'RateLimitError'),
+    'Refund': ('stripe._refund', 'Refund'),
+    'RefundService': ('stripe._refund_service', 'RefundService'),
+    'ReportingService': ('stripe._reporting_service', 'ReportingService'),
+    'RequestOptions': ('stripe._request_options', 'RequestOptions'),
+    'RequestorOptions': ('stripe._requestor_options', 'RequestorOptions'),
+    'RequestsClient': ('stripe._http_client', 'RequestsClient'),
+    'ReserveTransaction': ('stripe._reserve_transaction', 'ReserveTransaction'),
+    'Review': ('stripe._review', 'Review'),
+    'ReviewService': ('stripe._review_service', 'ReviewService'),
+    'SearchResultObject': ('stripe._search_result_object', 'SearchResultObject'),
+    'SearchableAPIResource': ('stripe._searchable_api_resource', 'SearchableAPIResource'),
+    'SetupAttempt': ('stripe._setup_attempt', 'SetupAttempt'),
+    'SetupAttemptService': ('stripe._setup_attempt_service', 'SetupAttemptService'),
+    'SetupIntent': ('stripe._setup_intent', 'SetupIntent'),
+    'SetupIntentService': ('stripe._setup_intent_service', 'SetupIntentService'),
+    'ShippingRate': ('stripe._shipping_rate', 'ShippingRate'),
+    'ShippingRateService': ('stripe._shipping_rate_service', 'ShippingRateService'),
+    'SigmaService': ('stripe._sigma_service', 'SigmaService'),
+    'SignatureVerificationError': ('stripe._error', 'SignatureVerificationError'),
+    'SingletonAPIResource': ('stripe._singleton_api_resource', 'SingletonAPIResource'),
+    'Source': ('stripe._source', 'Source'),
+    'SourceMandateNotification': ('stripe._source_mandate_notification', 'SourceMandateNotification'),
+    'SourceService': ('stripe._source_service', 'SourceService'),
+    'SourceTransaction': ('stripe._source_transaction', 'SourceTransaction'),
+    'SourceTransactionService': ('stripe._source_transaction_service', 'SourceTransactionService'),
+    'StripeClient': ('stripe._stripe_client', 'StripeClient'),
+    'StripeContext': ('stripe._stripe_context', 'StripeContext'),
+    'StripeError': ('stripe._error', 'StripeError'),
+    'StripeErrorWithParamCode': ('stripe._error', 'StripeErrorWithParamCode'),
+    'StripeEventNotificationHandler': ('stripe._event_notification_handler', 'StripeEventNotificationHandler'),
+    'StripeEventNotificationHandlerWithoutVerification': ('stripe._event_notification_handler', 'StripeEventNotificationHandlerWithoutVerification'),
+    'StripeObject': ('stripe._stripe_object', 'StripeObject'),
+    'StripeResponse': ('stripe._stripe_response', 'StripeResponse'),
+    'StripeResponseBase': ('stripe._stripe_response', 'StripeResponseBase'),
+    'StripeStreamResponse': ('stripe._stripe_response', 'StripeStreamResponse'),
+    'StripeStreamResponseAsync': ('stripe._stripe_response', 'StripeStreamResponseAsync'),
+    'Subscription': ('stripe._subscription', 'Subscription'),
+    'SubscriptionItem': ('stripe._subscription_item', 'SubscriptionItem'),
+    'SubscriptionItemService': ('stripe._subscription_item_service', 'SubscriptionItemService'),
+    'SubscriptionSchedule': ('stripe._subscription_schedule', 'SubscriptionSchedule'),
+    'SubscriptionScheduleService': ('stripe._subscription_schedule_service', 'SubscriptionScheduleService'),
+    'SubscriptionService': ('stripe._subscription_service', 'SubscriptionService'),
+    'TaxCode': ('stripe._tax_code', 'TaxCode'),
+    'TaxCodeService': ('stripe._tax_code_service', 'TaxCodeService'),
+    'TaxDeductedAtSource': ('stripe._tax_deducted_at_source', 'TaxDeductedAtSource'),
+    'TaxId': ('stripe._tax_id', 'TaxId'),
+    'TaxIdService': ('stripe._tax_id_service', 'TaxIdService'),
+    'TaxRate': ('stripe._tax_rate', 'TaxRate'),
+    'TaxRateService': ('stripe._tax_rate_service', 'TaxRateService'),
+    'TaxService': ('stripe._tax_service', 'TaxService'),
+    'TemporarySessionExpiredError': ('stripe._error', 'TemporarySessionExpiredError'),
+    'TerminalService': ('stripe._terminal_service', 'TerminalService'),
+    'TestHelpersService': ('stripe._test_helpers_service', 'TestHelpersService'),
+    'ThreeDSecureService': ('stripe._three_d_secure_service', 'ThreeDSecureService'),
+    'Token': ('stripe._token', 'Token'),
+    'TokenService': ('stripe._token_service', 'TokenService'),
+    'Topup': ('stripe._topup', 'Topup'),
+    'TopupService': ('stripe._topup_service', 'TopupService'),
+    'Transfer': ('stripe._transfer', 'Transfer'),
+    'TransferReversal': ('stripe._transfer_reversal', 'TransferReversal'),
+    'TransferReversalService': ('stripe._transfer_reversal_service', 'TransferReversalService'),
+    'TransferService': ('stripe._transfer_service', 'TransferService'),
+    'TreasuryService': ('stripe._treasury_service', 'TreasuryService'),
+    'UnhandledNotificationDetails': ('stripe._event_notification_handler', 'UnhandledNotificationDetails'),
+    'UpdateableAPIResource': ('stripe._updateable_api_resource', 'UpdateableAPIResource'),
+    'UrlFetchClient': ('stripe._http_client', 'UrlFetchClient'),
+    'UrllibClient': ('stripe._http_client', 'UrllibClient'),
+    'V1Services': ('stripe._v1_services', 'V1Services'),
+    'V2Services': ('stripe._v2_services', 'V2Services'),
+    'VerifyMixin': ('stripe._verify_mixin', 'VerifyMixin'),
+    'Webhook': ('stripe._webhook', 'Webhook'),
+    'WebhookEndpoint': ('stripe._webhook_endpoint', 'WebhookEndpoint'),
+    'WebhookEndpointService': ('stripe._webhook_endpoint_service', 'WebhookEndpointService'),
+    'WebhookSignature': ('stripe._webhook', 'WebhookSignature'),
+}
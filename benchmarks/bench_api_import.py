@@ -0,0 +1,64 @@
+"""
+Startup-time benchmark for the api type exports: lazy vs. eager resolution.
+
+Each sample imports `api._schema` in a fresh interpreter, once with the default
+lazy mode and once with VAPI_EAGER_TYPES=true, and reports the median import
+time plus the time to resolve a single type on first access.
+
+Run from the backend root so the package is importable:
+    python -m app.core.third_party_integrations.stripe_home.benchmarks.bench_api_import
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PACKAGE = "app.core.third_party_integrations.stripe_home"
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import {package}.api._schema as schema
+imported = time.perf_counter()
+getattr(schema, "Customer", None)
+print(json.dumps({{"import_s": imported - started, "first_access_s": time.perf_counter() - imported}}))
+"""
+
+
+def sample(package: str, eager: bool) -> dict:
+    env = {**os.environ, "VAPI_EAGER_TYPES": "true" if eager else "false"}
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(package=package)],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(samples: list[dict]) -> dict:
+    return {
+        key.replace("_s", "_ms"): round(statistics.median(s[key] for s in samples) * 1000, 2)
+        for key in ("import_s", "first_access_s")
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--package", default=PACKAGE)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {
+        mode: summarize([sample(args.package, mode == "eager") for _ in range(args.runs)])
+        for mode in ("lazy", "eager")
+    }
+    print(json.dumps({"runs": args.runs, "median": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Checkout throughput benchmark: blocking vs. async Stripe transport.
+
+Starts a local fake Stripe API that answers `POST /v1/checkout/sessions` after a
+configurable latency, then drives two checkout endpoints on one event loop:
+- `sync`:  `checkout.sessions.create` inside `async def` (the old, blocking pattern)
+- `async`: `checkout.sessions.create_async` on the pooled httpx transport
+
+Run from the backend root so the package is importable:
+    python -m app.core.third_party_integrations.stripe_home.benchmarks.bench_checkout_async
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.third_party_integrations.stripe_home.client import StripeClientRegistry
+
+CHECKOUT_PARAMS = {
+    "customer": "cus_bench",
+    "line_items": [{"price": "price_bench", "quantity": 1}],
+    "mode": "subscription",
+    "success_url": "https://example.com/success",
+    "cancel_url": "https://example.com/cancel",
+}
+
+
+def start_fake_stripe(latency: float) -> ThreadingHTTPServer:
+    """Serve a minimal Checkout Session API on an ephemeral localhost port."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency)
+            session_id = f"cs_test_{uuid.uuid4().hex}"
+            body = json.dumps(
+                {
+                    "id": session_id,
+                    "object": "checkout.session",
+                    "url": f"https://checkout.stripe.com/c/pay/{session_id}",
+                }
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 1024
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def build_app(registry: StripeClientRegistry) -> FastAPI:
+    client = registry.get("sk_test_bench")
+    app = FastAPI()
+
+    @app.post("/checkout/sync")
+    async def checkout_sync():
+        session = client.checkout.sessions.create(params=CHECKOUT_PARAMS)
+        return {"checkout_url": session.url}
+
+    @app.post("/checkout/async")
+    async def checkout_async():
+        session = await client.checkout.sessions.create_async(params=CHECKOUT_PARAMS)
+        return {"checkout_url": session.url}
+
+    return app
+
+
+async def drive(app: FastAPI, path: str, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+
+        async def one():
+            async with semaphore:
+                response = await http.post(path)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+    return {
+        "mode": path.rsplit("/", 1)[-1],
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.3, help="fake Stripe latency (s)")
+    args = parser.parse_args()
+
+    server = start_fake_stripe(args.latency)
+    host, port = server.server_address
+    registry = StripeClientRegistry(
+        pool_maxsize=args.concurrency,
+        base_addresses={"api": f"http://{host}:{port}"},
+    )
+    app = build_app(registry)
+
+    async def run_all() -> list[dict]:
+        try:
+            return [
+                await drive(app, "/checkout/sync", args.requests, args.concurrency),
+                await drive(app, "/checkout/async", args.requests, args.concurrency),
+            ]
+        finally:
+            await registry.aclose()
+
+    try:
+        results = asyncio.run(run_all())
+    finally:
+        server.shutdown()
+    print(json.dumps({"latency": args.latency, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
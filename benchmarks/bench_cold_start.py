@@ -0,0 +1,218 @@
+"""
+Cold-start benchmark and import-cost budgets for the Stripe package.
+
+Every sample runs in a fresh interpreter so nothing is warm:
+- per-module import time, parsed from `-X importtime` and aggregated into the
+  module's cumulative time plus the heaviest dependencies by self time
+- resident memory (RSS) after the import, absolute and over a bare interpreter
+- time-to-first-request for the FastAPI router in sdk/urls.py: import, mount
+  on an app, and serve the first `GET /openapi.json` (which builds every schema)
+
+Results are printed (and optionally written) as JSON, and the process exits
+nonzero when a budget in cold_start_budgets.json is exceeded or a probe fails.
+
+Run from the backend root so the package is importable:
+    python -m app.core.third_party_integrations.stripe_home.benchmarks.bench_cold_start
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+PACKAGE = "app.core.third_party_integrations.stripe_home"
+
+MODULES = [
+    "config",
+    "client",
+    "rate_limit",
+    "retry",
+    "api._exceptions",
+    "api._types",
+    "api._generated",
+    "api._schema",
+    "api._dynamic_types",
+    "sdk.models",
+    "sdk.admin",
+    "sdk.intent",
+    "sdk.credit",
+    "sdk.signals",
+    "sdk.views",
+    "sdk.urls",
+]
+
+DEFAULT_BUDGETS = Path(__file__).with_name("cold_start_budgets.json")
+
+RSS = """
+import json, resource, sys, time
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+    except OSError:
+        # ru_maxrss is KiB on Linux, bytes on macOS; peak is close enough after import
+        scale = 2**20 if sys.platform == "darwin" else 2**10
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+"""
+
+IMPORT_PROBE = RSS + """
+import {module}
+print(json.dumps({{"rss_mb": rss_mb()}}))
+"""
+
+FIRST_REQUEST_PROBE = RSS + """
+started = time.perf_counter()
+import httpx, asyncio
+from fastapi import FastAPI
+from {module} import {attr} as router
+imported = time.perf_counter()
+
+app = FastAPI()
+app.include_router(router)
+
+async def hit():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        first = time.perf_counter()
+        response = await client.get("{path}")
+        response.raise_for_status()
+        served = time.perf_counter()
+        await client.get("{path}")
+        return first, served, time.perf_counter()
+
+first, served, warm = asyncio.run(hit())
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": (served - first) * 1000,
+    "warm_request_ms": (warm - served) * 1000,
+    "total_ms": (served - started) * 1000,
+    "rss_mb": rss_mb(),
+}}))
+"""
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def run_probe(source: str, importtime: bool = False) -> tuple[dict, str]:
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", source]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    return json.loads(completed.stdout.strip().splitlines()[-1]), completed.stderr
+
+
+def parse_importtime(stderr: str, module: str, package: str) -> tuple[float, dict[str, float]]:
+    """Return the module's cumulative import ms and self ms grouped by top-level package."""
+    cumulative_ms = 0.0
+    by_package: dict[str, float] = defaultdict(float)
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        if name == module:
+            cumulative_ms = int(cumulative_us) / 1000
+        # * Our own modules are reported per module, third-party ones per distribution
+        group = name[len(package) + 1 :] if name.startswith(package + ".") else name.split(".")[0]
+        by_package[group] += int(self_us) / 1000
+    return cumulative_ms, by_package
+
+
+def measure_module(package: str, module: str, runs: int, baseline_mb: float, top: int) -> dict:
+    full_name = f"{package}.{module}"
+    import_ms, rss, groups = [], [], defaultdict(list)
+    for _ in range(runs):
+        result, stderr = run_probe(IMPORT_PROBE.format(module=full_name), importtime=True)
+        cumulative_ms, by_package = parse_importtime(stderr, full_name, package)
+        import_ms.append(cumulative_ms)
+        rss.append(result["rss_mb"])
+        for group, ms in by_package.items():
+            groups[group].append(ms)
+    heaviest = sorted(
+        ((group, statistics.median(values)) for group, values in groups.items()),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:top]
+    rss_mb = statistics.median(rss)
+    return {
+        "import_ms": round(statistics.median(import_ms), 2),
+        "rss_mb": round(rss_mb, 2),
+        "rss_delta_mb": round(rss_mb - baseline_mb, 2),
+        "top_self_ms": {group: round(ms, 2) for group, ms in heaviest},
+    }
+
+
+def measure_first_request(package: str, router: str, path: str, runs: int) -> dict:
+    module, _, attr = router.partition(":")
+    source = FIRST_REQUEST_PROBE.format(module=f"{package}.{module}", attr=attr or "router", path=path)
+    samples = [run_probe(source)[0] for _ in range(runs)]
+    return {key: round(statistics.median(s[key] for s in samples), 2) for key in samples[0]}
+
+
+def check_budgets(results: dict, budgets: dict) -> list[str]:
+    """Compare results against budgets; missing per-module entries use `default`."""
+    violations = []
+    module_budgets = budgets.get("modules", {})
+    for module, result in results["modules"].items():
+        if "error" in result:
+            violations.append(f"{module}: import failed ({result['error']})")
+            continue
+        budget = {**module_budgets.get("default", {}), **module_budgets.get(module, {})}
+        for metric, limit in budget.items():
+            if result.get(metric, 0) > limit:
+                violations.append(f"{module}: {metric} {result[metric]} > {limit}")
+    first_request = results.get("first_request")
+    if first_request is not None:
+        if "error" in first_request:
+            violations.append(f"first_request: failed ({first_request['error']})")
+        else:
+            for metric, limit in budgets.get("first_request", {}).items():
+                if first_request.get(metric, 0) > limit:
+                    violations.append(f"first_request: {metric} {first_request[metric]} > {limit}")
+    return violations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--package", default=PACKAGE)
+    parser.add_argument("--modules", nargs="*", default=MODULES)
+    parser.add_argument("--router", default="sdk.urls:router", help="module:attr, or '' to skip")
+    parser.add_argument("--path", default="/openapi.json")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="heaviest dependencies to report")
+    parser.add_argument("--budgets", type=Path, default=DEFAULT_BUDGETS)
+    parser.add_argument("--output", type=Path, help="also write the JSON results here")
+    args = parser.parse_args()
+
+    bare_probe = RSS + "print(json.dumps({'rss_mb': rss_mb()}))"
+    baseline_mb = statistics.median(run_probe(bare_probe)[0]["rss_mb"] for _ in range(args.runs))
+    results: dict = {"runs": args.runs, "baseline_rss_mb": round(baseline_mb, 2), "modules": {}}
+    for module in args.modules:
+        try:
+            results["modules"][module] = measure_module(args.package, module, args.runs, baseline_mb, args.top)
+        except RuntimeError as e:
+            results["modules"][module] = {"error": str(e)}
+    if args.router:
+        try:
+            results["first_request"] = measure_first_request(args.package, args.router, args.path, args.runs)
+        except RuntimeError as e:
+            results["first_request"] = {"error": str(e)}
+
+    budgets = json.loads(args.budgets.read_text()) if args.budgets.exists() else {}
+    results["violations"] = check_budgets(results, budgets)
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        args.output.write_text(output + "\n")
+    if results["violations"]:
+        print(f"{len(results['violations'])} cold-start budget(s) exceeded", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
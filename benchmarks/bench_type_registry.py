@@ -0,0 +1,89 @@
+"""
+Import-time and memory check for the Stripe type registry in api/_dynamic_types.py.
+
+Compares, in fresh interpreters, the old reflection build (walk every stripe
+export and `getattr` it) against loading the prebuilt snapshot written by
+api/_build_registry.py. Reports median import time and resident memory added by
+the import, plus the snapshot size.
+
+Run from the backend root so the package is importable:
+    python -m app.core.third_party_integrations.stripe_home.benchmarks.bench_type_registry
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PACKAGE = "app.core.third_party_integrations.stripe_home"
+
+RSS = """
+import json, time
+
+def rss_kb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4096 // 1024
+
+rss_before = rss_kb()
+started = time.perf_counter()
+"""
+
+PROBES = {
+    "reflection": RSS
+    + """
+import stripe
+registry = {{}}
+for name in set(dir(stripe)) | set(getattr(stripe, "_import_map", {{}})):
+    obj = getattr(stripe, name)
+    if isinstance(obj, type) and obj.__module__.startswith("stripe") and not name.startswith("_"):
+        registry[name] = obj
+print(json.dumps({{"import_s": time.perf_counter() - started, "rss_kb": rss_kb() - rss_before, "types": len(registry)}}))
+""",
+    "snapshot": RSS
+    + """
+from {package}.api._dynamic_types import STRIPE_TYPE_REGISTRY as registry
+print(json.dumps({{"import_s": time.perf_counter() - started, "rss_kb": rss_kb() - rss_before, "types": len(registry)}}))
+""",
+}
+
+
+def sample(package: str, mode: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBES[mode].format(package=package)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(samples: list[dict]) -> dict:
+    return {
+        "import_ms": round(statistics.median(s["import_s"] for s in samples) * 1000, 2),
+        "rss_kb": statistics.median(s["rss_kb"] for s in samples),
+        "types": samples[0]["types"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--package", default=PACKAGE)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # Make sure the snapshot exists so the "after" runs measure the steady state
+    subprocess.run(
+        [sys.executable, "-m", f"{args.package}.api._build_registry"],
+        capture_output=True,
+        check=True,
+    )
+    results = {
+        mode: summarize([sample(args.package, mode) for _ in range(args.runs)])
+        for mode in ("reflection", "snapshot")
+    }
+    print(json.dumps({"runs": args.runs, "median": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
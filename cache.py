@@ -0,0 +1,210 @@
+"""
+Two-tier caching for Stripe data.
+- TTLCache: in-process LRU with per-entry expiry (no network hop on hits).
+- TieredCache: TTLCache in front of a shared Valkey tier holding JSON values.
+- NegativeCache: short-lived "known missing" markers over a TieredCache.
+- AsyncSingleFlight: concurrent misses for one key share a single load.
+Valkey errors are logged and treated as misses, so a cache outage only costs
+latency, never correctness.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from threading import Lock
+from typing import Any
+
+import valkey
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after being set."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires <= self._clock():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        with self._lock:
+            self._data[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    Local TTLCache backed by Valkey under `prefix`. Values must be JSON-serializable.
+    Reads fill the local tier from Valkey; writes and deletes hit both tiers.
+    Other workers' local tiers converge within `local_ttl`.
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        client=None,
+        async_client=None,
+        ttl: int = 3600,
+        local_ttl: float = 30,
+        maxsize: int = 1024,
+    ):
+        self.prefix = prefix
+        self.client = client
+        self.async_client = async_client
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=maxsize, ttl=local_ttl)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def _decode(self, key: str, raw) -> Any:
+        if raw is None:
+            return _MISSING
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return value
+
+    def _encode(self, value: Any) -> str:
+        return json.dumps(value, default=str)
+
+    # --- sync ---
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.local.get(key, _MISSING)
+        if value is _MISSING and self.client is not None:
+            try:
+                value = self._decode(key, self.client.get(self._key(key)))
+            except valkey.ValkeyError as e:
+                logger.warning(f"Cache read failed for {self.prefix}: {e}")
+        return default if value is _MISSING else value
+
+    def set(self, key: str, value: Any) -> None:
+        self.local.set(key, value)
+        if self.client is not None:
+            try:
+                self.client.set(self._key(key), self._encode(value), ex=self.ttl)
+            except valkey.ValkeyError as e:
+                logger.warning(f"Cache write failed for {self.prefix}: {e}")
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.local.delete(key)
+        if self.client is not None and keys:
+            try:
+                self.client.delete(*(self._key(key) for key in keys))
+            except valkey.ValkeyError as e:
+                logger.warning(f"Cache delete failed for {self.prefix}: {e}")
+
+    # --- async ---
+    async def aget(self, key: str, default: Any = None) -> Any:
+        value = self.local.get(key, _MISSING)
+        if value is _MISSING and self.async_client is not None:
+            try:
+                value = self._decode(key, await self.async_client.get(self._key(key)))
+            except valkey.ValkeyError as e:
+                logger.warning(f"Cache read failed for {self.prefix}: {e}")
+        return default if value is _MISSING else value
+
+    async def aset(self, key: str, value: Any) -> None:
+        self.local.set(key, value)
+        if self.async_client is not None:
+            try:
+                await self.async_client.set(self._key(key), self._encode(value), ex=self.ttl)
+            except valkey.ValkeyError as e:
+                logger.warning(f"Cache write failed for {self.prefix}: {e}")
+
+    async def adelete(self, *keys: str) -> None:
+        for key in keys:
+            self.local.delete(key)
+        if self.async_client is not None and keys:
+            try:
+                await self.async_client.delete(*(self._key(key) for key in keys))
+            except valkey.ValkeyError as e:
+                logger.warning(f"Cache delete failed for {self.prefix}: {e}")
+
+    async def aclear(self) -> None:
+        """Drop every entry under the prefix in both tiers."""
+        self.local.clear()
+        if self.async_client is None:
+            return
+        try:
+            keys = [key async for key in self.async_client.scan_iter(match=f"{self.prefix}:*")]
+            if keys:
+                await self.async_client.delete(*keys)
+        except valkey.ValkeyError as e:
+            logger.warning(f"Cache clear failed for {self.prefix}: {e}")
+
+
+class NegativeCache:
+    """
+    Markers for ids recently found missing (no local row, Stripe 404), so
+    repeated lookups of unknown objects cost one cache read instead of a
+    database miss and a Stripe GET. Markers expire with the tier's TTL and are
+    cleared as soon as the object is created or its create webhook arrives.
+    """
+
+    def __init__(self, cache: TieredCache):
+        self.cache = cache
+
+    async def is_missing(self, key: str) -> bool:
+        return await self.cache.aget(key) is not None
+
+    async def mark_missing(self, key: str) -> None:
+        await self.cache.aset(key, 1)
+
+    async def clear(self, *keys: str) -> None:
+        await self.cache.adelete(*keys)
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent calls per key: the first caller starts `fn` as a task
+    and every caller awaits that task, so one caller being cancelled does not
+    abort the shared work. Nothing is cached after the call settles.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
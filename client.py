@@ -1,39 +1,492 @@
+import asyncio
+import json
 import logging
+import time
+import uuid
+from collections.abc import Mapping
+from contextlib import asynccontextmanager
+from functools import partial
+from threading import Lock
+from typing import Any
 
+import requests
 import stripe
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, params
+from requests.adapters import HTTPAdapter
+from stripe import StripeClient
 
 from app.core.config import StripeSettings
 
-# --- Singleton StripeClient Management ---
-_stripe_client = None
+from .coalesce import RequestCoalescer
+from .config import ValkeyConfig
+from .rate_limit import StripeRateLimiter
+from .retry import (
+    RetryBudget,
+    RetryPolicy,
+    endpoint_label,
+    parse_retry_after,
+    retry_reason,
+    stripe_RETRIES,
+    stripe_RETRY_BUDGET_EXHAUSTED,
+)
+from .shard import close_shard_router
+from .valkey_pool import ValkeyPool, close_valkey_pool, get_valkey_pool
+
+logger = logging.getLogger(__name__)
+
+# Registry key: (secret key, livemode, API version)
+ClientKey = tuple[str, bool, str | None]
+
+
+# --- Async Transport ---
+class _PooledHTTPX:
+    """The httpx module as seen by HTTPXClient, with AsyncClient's pool limits preset."""
+
+    def __init__(self, httpx, limits):
+        self._httpx = httpx
+        self._limits = limits
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._httpx, name)
+
+    def AsyncClient(self, **kwargs):
+        return self._httpx.AsyncClient(limits=self._limits, **kwargs)
+
+
+class PooledHTTPXClient(stripe.HTTPXClient):
+    """
+    httpx-backed async transport used under the SDK's `*_async` methods.
+    The stock HTTPXClient builds its AsyncClient with default limits; this one
+    sizes the pool to match the sync transport so one worker can keep hundreds
+    of Stripe calls in flight without blocking the event loop. The limits are
+    handed to the base constructor, so it builds the only AsyncClient.
+    """
+
+    def __init__(
+        self,
+        max_connections: int,
+        connect_timeout: float,
+        read_timeout: float,
+        **kwargs,
+    ):
+        import httpx
+
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        super().__init__(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            _lib=_PooledHTTPX(httpx, limits),
+            **kwargs,
+        )
+
+
+# --- Policy-Enforcing Transport ---
+class StripeHTTPClient(stripe.HTTPClient):
+    """
+    Wraps the pooled transport so cross-cutting policies apply to every call a
+    StripeClient makes, sync or async, without callers changing anything:
+    - cluster-wide rate limiting (see rate_limit.py), one token per attempt
+    - retries with backoff, Retry-After and retry budgets (see retry.py);
+      the SDK's own retry loop is disabled underneath so attempts don't multiply
+    - coalescing of concurrent identical GETs into one request (see coalesce.py)
+    """
+
+    def __init__(
+        self,
+        transport: stripe.HTTPClient,
+        rate_limiter: StripeRateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        retry_budget: RetryBudget | None = None,
+        coalescer: RequestCoalescer | None = None,
+    ):
+        super().__init__()
+        self.transport = transport
+        self.coalescer = coalescer
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_budget = retry_budget or RetryBudget()
+        self.name = transport.name
+
+    @staticmethod
+    def _with_idempotency_key(method: str, headers: Mapping[str, str]) -> dict:
+        """Make sure every POST carries one idempotency key reused by all attempts."""
+        headers = dict(headers)
+        if method.lower() == "post":
+            headers.setdefault("Idempotency-Key", str(uuid.uuid4()))
+        return headers
+
+    def _next_delay(
+        self,
+        url: str,
+        retry: int,
+        max_retries: int,
+        started: float,
+        response,
+        error: Exception | None,
+    ) -> float | None:
+        """Seconds to sleep before the next attempt, or None to stop retrying."""
+        if retry > max_retries:
+            return None
+        status, rheaders = (response[1], response[2]) if response else (None, None)
+        reason = retry_reason(status, rheaders, error)
+        if reason is None:
+            return None
+        delay = self.retry_policy.delay(retry, parse_retry_after(rheaders))
+        if delay is None or time.monotonic() - started + delay > self.retry_policy.deadline:
+            return None
+        endpoint = endpoint_label(url)
+        if not self.retry_budget.try_withdraw():
+            stripe_RETRY_BUDGET_EXHAUSTED.labels(endpoint=endpoint).inc()
+            return None
+        stripe_RETRIES.labels(endpoint=endpoint, reason=reason).inc()
+        logger.info(f"Retrying Stripe {endpoint} ({reason}) in {delay:.2f}s, retry {retry}")
+        return delay
+
+    def request_with_retries(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        post_data: Any = None,
+        max_network_retries: int | None = None,
+        *,
+        _usage: list[str] | None = None,
+    ):
+        send = partial(
+            self._request_with_retries, method, url, headers, post_data, max_network_retries, _usage
+        )
+        return send() if self.coalescer is None else self.coalescer.call(method, url, headers, send)
+
+    def _request_with_retries(self, method, url, headers, post_data, max_network_retries, _usage):
+        headers = self._with_idempotency_key(method, headers)
+        max_retries = (
+            self.retry_policy.attempts if max_network_retries is None else max_network_retries
+        )
+        self.retry_budget.record_call()
+        started = time.monotonic()
+        retry = 0
+        while True:
+            if self.rate_limiter:
+                self.rate_limiter.acquire(method, headers)
+            try:
+                response = self.transport.request_with_retries(
+                    method, url, headers, post_data, 0, _usage=_usage
+                )
+                error = None
+            except stripe.APIConnectionError as e:
+                response, error = None, e
+            retry += 1
+            delay = self._next_delay(url, retry, max_retries, started, response, error)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            time.sleep(delay)
+
+    async def request_with_retries_async(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        post_data: Any = None,
+        max_network_retries: int | None = None,
+        *,
+        _usage: list[str] | None = None,
+    ):
+        send = partial(
+            self._request_with_retries_async, method, url, headers, post_data, max_network_retries, _usage
+        )
+        if self.coalescer is None:
+            return await send()
+        return await self.coalescer.acall(method, url, headers, send)
+
+    async def _request_with_retries_async(self, method, url, headers, post_data, max_network_retries, _usage):
+        headers = self._with_idempotency_key(method, headers)
+        max_retries = (
+            self.retry_policy.attempts if max_network_retries is None else max_network_retries
+        )
+        self.retry_budget.record_call()
+        started = time.monotonic()
+        retry = 0
+        while True:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire_async(method, headers)
+            try:
+                response = await self.transport.request_with_retries_async(
+                    method, url, headers, post_data, 0, _usage=_usage
+                )
+                error = None
+            except stripe.APIConnectionError as e:
+                response, error = None, e
+            retry += 1
+            delay = self._next_delay(url, retry, max_retries, started, response, error)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            await asyncio.sleep(delay)
+
+    def request_stream_with_retries(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        post_data: Any = None,
+        max_network_retries: int | None = None,
+        *,
+        _usage: list[str] | None = None,
+    ):
+        if self.rate_limiter:
+            self.rate_limiter.acquire(method, headers)
+        return self.transport.request_stream_with_retries(
+            method, url, headers, post_data, max_network_retries, _usage=_usage
+        )
+
+    async def request_stream_with_retries_async(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        post_data: Any = None,
+        max_network_retries: int | None = None,
+        *,
+        _usage: list[str] | None = None,
+    ):
+        if self.rate_limiter:
+            await self.rate_limiter.acquire_async(method, headers)
+        return await self.transport.request_stream_with_retries_async(
+            method, url, headers, post_data, max_network_retries, _usage=_usage
+        )
+
+    def request(self, method, url, headers, post_data=None):
+        return self.transport.request(method, url, headers, post_data)
+
+    async def request_async(self, method, url, headers, post_data=None):
+        return await self.transport.request_async(method, url, headers, post_data)
+
+    def close(self):
+        self.transport.close()
+
+    async def close_async(self):
+        await self.transport.close_async()
+
+
+# --- Pooled StripeClient Registry ---
+class StripeClientRegistry:
+    """
+    Process-wide registry of long-lived StripeClient instances.
+    Clients are keyed by (secret key, livemode, API version) and each one owns a
+    keep-alive HTTP connection pool, so concurrent requests never mutate the
+    module-global `stripe.api_key` and TCP/TLS connections are reused.
+    Sync calls go through requests; `*_async` calls go through a pooled httpx
+    AsyncClient so async routes never block the event loop.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = ValkeyConfig.STRIPE_HTTP_POOL_CONNECTIONS,
+        pool_maxsize: int = ValkeyConfig.STRIPE_HTTP_POOL_MAXSIZE,
+        connect_timeout: float = ValkeyConfig.STRIPE_HTTP_CONNECT_TIMEOUT,
+        read_timeout: float = ValkeyConfig.STRIPE_HTTP_READ_TIMEOUT,
+        base_addresses: dict[str, str] | None = None,
+        rate_limiter: StripeRateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        coalesce_gets: bool = ValkeyConfig.STRIPE_HTTP_COALESCE_GETS,
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        # Override API hosts (e.g. stripe-mock or a local fake in benchmarks)
+        self.base_addresses = base_addresses
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        # One budget per process: every client draws retries from the same pool
+        self.retry_budget = RetryBudget()
+        # Shared by every client; the key includes the Authorization header so accounts never mix
+        self.coalescer = RequestCoalescer() if coalesce_gets else None
+        self._clients: dict[ClientKey, StripeClient] = {}
+        self._http_clients: list[stripe.HTTPClient] = []
+        self._lock = Lock()
+
+    @staticmethod
+    def make_key(secret_key: str, api_version: str | None = None) -> ClientKey:
+        """Build the registry key for a secret key / API version pair."""
+        return (secret_key, not secret_key.startswith("sk_test_"), api_version)
+
+    def get(self, secret_key: str, api_version: str | None = None) -> StripeClient:
+        """Return the shared client for this key, creating it on first use."""
+        key = self.make_key(secret_key, api_version)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._build_client(secret_key, api_version)
+                self._clients[key] = client
+                logger.info(
+                    f"StripeClient created (livemode={key[1]}, api_version={api_version})"
+                )
+        return client
+
+    def _build_http_client(self) -> stripe.HTTPClient:
+        """Build a requests-backed HTTP client with a tuned keep-alive pool
+        and a pooled httpx fallback for the async methods, wrapped in the
+        policy-enforcing StripeHTTPClient."""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        transport = stripe.RequestsClient(
+            timeout=(self.connect_timeout, self.read_timeout),
+            session=session,
+            async_fallback_client=PooledHTTPXClient(
+                max_connections=self.pool_maxsize,
+                connect_timeout=self.connect_timeout,
+                read_timeout=self.read_timeout,
+            ),
+        )
+        return StripeHTTPClient(
+            transport,
+            rate_limiter=self.rate_limiter,
+            retry_policy=self.retry_policy,
+            retry_budget=self.retry_budget,
+            coalescer=self.coalescer,
+        )
+
+    def _build_client(self, secret_key: str, api_version: str | None) -> StripeClient:
+        http_client = self._build_http_client()
+        self._http_clients.append(http_client)
+        return StripeClient(
+            secret_key,
+            stripe_version=api_version,
+            base_addresses=self.base_addresses,
+            max_network_retries=self.retry_policy.attempts,
+            http_client=http_client,
+        )
+
+    def close(self) -> None:
+        """Close every pooled sync HTTP client and forget all cached clients."""
+        with self._lock:
+            for http_client in self._http_clients:
+                try:
+                    http_client.close()
+                except Exception as e:
+                    logger.warning(f"Failed to close Stripe HTTP client: {e}")
+            self._http_clients.clear()
+            self._clients.clear()
+
+    async def aclose(self) -> None:
+        """Close the async transports, then the sync pools."""
+        for http_client in list(self._http_clients):
+            try:
+                await http_client.close_async()
+            except Exception as e:
+                logger.warning(f"Failed to close async Stripe HTTP client: {e}")
+        self.close()
+
+
+_registry: StripeClientRegistry | None = None
+_registry_lock = Lock()
+
+
+def get_client_registry() -> StripeClientRegistry:
+    """Return the process-wide registry, creating it lazily outside the lifespan."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = StripeClientRegistry()
+    return _registry
+
+
+def _build_rate_limiter(pool: ValkeyPool) -> StripeRateLimiter | None:
+    """Build the cluster-wide Stripe rate limiter on the shared Valkey pool when enabled."""
+    if not ValkeyConfig.VALKEY_STRIPE_RATE_LIMIT_ENABLED:
+        return None
+    return StripeRateLimiter(pool.client, pool.async_client)
+
+
+async def _warm_caches() -> None:
+    """Preload hot lookups; a cold cache only costs latency, so failures are logged."""
+    from .sdk.catalog import get_catalog
+    from .sdk.plan_cache import get_plan_cache
+    from .sdk.tiers import get_tier_matcher, tier_overrides
+
+    try:
+        count = await get_plan_cache().warm()
+        logging.info(f"Plan cache warmed with {count} plans.")
+    except Exception as e:
+        logging.warning(f"Plan cache warm-up failed: {e}")
+    try:
+        snapshot = await get_catalog().get(get_stripe_client(StripeSettings))
+        logging.info("Product catalog snapshot ready.")
+        # Tier overrides come from product metadata already in the snapshot (no extra Stripe calls)
+        overrides = tier_overrides(entry["product"] for entry in json.loads(snapshot.body))
+        get_tier_matcher().load_overrides(overrides)
+        logging.info(f"Tier matcher loaded {len(overrides)} product overrides.")
+    except Exception as e:
+        logging.warning(f"Product catalog warm-up failed: {e}")
 
 
 def register_stripe_startup(app: FastAPI) -> None:
     """
-    Register startup logic to initialize the StripeClient singleton.
+    Register lifespan logic that opens the shared Valkey pool, creates the
+    StripeClient registry on startup, warms the default client, the plan
+    cache and the product catalog, then closes all pooled connections on shutdown.
     """
 
-    @app.lifespan
+    @asynccontextmanager
     async def lifespan(_app: FastAPI):
-        global _stripe_client
+        global _registry
+        valkey_pool = get_valkey_pool()
+        if not await valkey_pool.aping():
+            logging.warning("Valkey is unreachable; rate limiting will fail open.")
         try:
-            _stripe_client = get_stripe_client(StripeSettings.STRIPE_SECRET_KEY)
-            logging.info("StripeClient initialized successfully.")
+            _registry = StripeClientRegistry(rate_limiter=_build_rate_limiter(valkey_pool))
+            get_stripe_client(StripeSettings)
+            logging.info("StripeClient registry initialized successfully.")
+            await _warm_caches()
         except Exception as e:
-            logging.error(f"Failed to initialize StripeClient: {e}")
+            logging.error(f"Failed to initialize StripeClient registry: {e}")
+            await close_valkey_pool()
             raise
-        yield
+        try:
+            yield
+        finally:
+            await _registry.aclose()
+            await close_shard_router()
+            await close_valkey_pool()
+
+    app.router.lifespan_context = lifespan
+
+
+def _resolve_secret_key(settings) -> str:
+    """Pick the test key when TESTING is enabled, mirroring the Django views."""
+    if getattr(settings, "TESTING", False) and getattr(
+        settings, "STRIPE_SECRET_KEY_TEST", None
+    ):
+        return settings.STRIPE_SECRET_KEY_TEST
+    return getattr(settings, "STRIPE_SECRET_KEY", None) or "sk_test_default"
 
 
-def get_stripe_client(settings: StripeSettings = Depends(StripeSettings)):
+def get_stripe_client(
+    settings: StripeSettings = Depends(StripeSettings),
+) -> StripeClient:
     """
-    Returns the configured Stripe client/module for API calls.
-    Sets the API key based on environment (test or production).
-    Extend here for multi-account or advanced scenarios.
+    Returns the shared, pooled StripeClient for the configured account.
+    Safe to call concurrently: no module-global Stripe state is touched.
+    Can be used via Depends(get_stripe_client) or called directly.
     """
-    stripe.api_key = settings.STRIPE_SECRET_KEY or "sk_test_default"
-    return stripe
+    if settings is None or isinstance(settings, params.Depends):
+        settings = StripeSettings
+    api_version = getattr(settings, "STRIPE_API_VERSION", None) or (
+        ValkeyConfig.STRIPE_API_VERSION
+    )
+    return get_client_registry().get(_resolve_secret_key(settings), api_version)
 
 
 # --- Optional: StripeConfig Utilities (Test helpers) ---
@@ -72,6 +525,6 @@ class StripeConfig:
 
 
 # Usage in your main app:
-# from .config import register_stripe_startup, get_stripe_client
+# from .client import register_stripe_startup, get_stripe_client
 # register_stripe_startup(app)
 # Use Depends(get_stripe_client) in your endpoints/services
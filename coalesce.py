@@ -0,0 +1,109 @@
+"""
+Request coalescing (singleflight) for Stripe GETs.
+Concurrent identical reads (same method, resource, query and expand set, on
+the same account and API version) share one in-flight request: the first
+caller runs it and everyone else waits for its response or error. Nothing is
+cached once the request settles, so reads are never staler than the slowest
+overlapping caller. Writes are never coalesced.
+"""
+
+import asyncio
+import re
+from collections.abc import Awaitable, Callable, Mapping
+from concurrent.futures import Future
+from threading import Lock
+from typing import Any
+from urllib.parse import parse_qsl, urlsplit
+
+from prometheus_client import Counter
+
+from .retry import endpoint_label
+
+stripe_COALESCED_REQUESTS = Counter(
+    "stripe_coalesced_requests",
+    "Stripe GETs served by another caller's in-flight request",
+    ["endpoint"],
+)
+
+# Headers that change what a GET returns; anything else (telemetry, user agent) is ignored
+KEY_HEADERS = ("authorization", "stripe-account", "stripe-context", "stripe-version")
+
+_EXPAND_INDEX = re.compile(r"^expand\[\d+\]$")
+
+CoalesceKey = tuple[str, str, str, tuple[tuple[str, str], ...]]
+
+
+def coalesce_key(method: str, url: str, headers: Mapping[str, str]) -> CoalesceKey | None:
+    """Key identifying a GET by resource, normalized query and auth context; None for writes."""
+    if method.lower() != "get":
+        return None
+    parts = urlsplit(url)
+    # expand[0]=a&expand[1]=b and expand[0]=b&expand[1]=a fetch the same object
+    query = sorted(
+        ("expand[]" if _EXPAND_INDEX.match(name) else name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+    )
+    lowered = {name.lower(): value for name, value in headers.items()}
+    context = tuple((name, lowered[name]) for name in KEY_HEADERS if name in lowered)
+    return (parts.netloc, parts.path, "&".join(f"{n}={v}" for n, v in query), context)
+
+
+class RequestCoalescer:
+    """
+    Per-process singleflight for sync and asyncio callers.
+    Sync callers on other threads wait on the leader's Future; async callers
+    share a task per event loop, awaited through `shield` so one cancelled
+    caller does not abort the request for the others.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._inflight: dict[CoalesceKey, Future] = {}
+        self._inflight_async: dict[tuple[asyncio.AbstractEventLoop, CoalesceKey], asyncio.Task] = {}
+
+    def call(self, method: str, url: str, headers: Mapping[str, str], fn: Callable[[], Any]) -> Any:
+        key = coalesce_key(method, url, headers)
+        if key is None:
+            return fn()
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        if not leader:
+            stripe_COALESCED_REQUESTS.labels(endpoint=endpoint_label(url)).inc()
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._settle(key)
+            future.set_exception(e)
+            raise
+        self._settle(key)
+        future.set_result(result)
+        return result
+
+    def _settle(self, key: CoalesceKey) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    async def acall(
+        self, method: str, url: str, headers: Mapping[str, str], fn: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        key = coalesce_key(method, url, headers)
+        if key is None:
+            return await fn()
+        # Tasks are bound to their loop, so each loop coalesces separately
+        loop_key = (asyncio.get_running_loop(), key)
+        task = self._inflight_async.get(loop_key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight_async[loop_key] = task
+            task.add_done_callback(lambda _: self._inflight_async.pop(loop_key, None))
+        else:
+            stripe_COALESCED_REQUESTS.labels(endpoint=endpoint_label(url)).inc()
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._inflight) + len(self._inflight_async)
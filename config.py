@@ -32,6 +32,8 @@ class ValkeyConfig:
         ],
     )
     VALKEY_CLUSTER_MODE = getattr(settings, "VAPI_CLUSTER_MODE", False)
+    # Virtual nodes per shard on the client-side consistent-hash ring (see shard.py)
+    VALKEY_SHARD_VNODES = getattr(settings, "VAPI_SHARD_VNODES", 160)
 
     # --- Connection (shared, REDIS_*) ---
     VALKEY_HOST = getattr(settings, "REDIS_HOST", "localhost")
@@ -41,6 +43,8 @@ class ValkeyConfig:
     VALKEY_MAX_CONNECTIONS = getattr(settings, "REDIS_MAX_CONNECTIONS", 100)
     VALKEY_SOCKET_TIMEOUT = getattr(settings, "REDIS_SOCKET_TIMEOUT", 5)
     VALKEY_SOCKET_CONNECT_TIMEOUT = getattr(settings, "REDIS_SOCKET_CONNECT_TIMEOUT", 5)
+    # PING idle connections before reuse once they have been idle this many seconds
+    VALKEY_HEALTH_CHECK_INTERVAL = getattr(settings, "REDIS_HEALTH_CHECK_INTERVAL", 30)
 
     # --- Cluster Mode (Valkey-only, VAPI_*) ---
     VALKEY_CLUSTER = getattr(settings, "VAPI_CLUSTER", False)
@@ -57,6 +61,14 @@ class ValkeyConfig:
     )
     VALKEY_RETRY_BACKOFF_BASE = getattr(settings, "VAPI_RETRY_BACKOFF_BASE", 0.01)
     VALKEY_RETRY_BACKOFF_CAP = getattr(settings, "VAPI_RETRY_BACKOFF_CAP", 0.5)
+    # Longest Retry-After (seconds) we will honor; beyond it the call fails fast
+    VALKEY_RETRY_AFTER_MAX = getattr(settings, "VAPI_RETRY_AFTER_MAX", 10)
+    # Total seconds one call may spend on retries
+    VALKEY_RETRY_DEADLINE = getattr(settings, "VAPI_RETRY_DEADLINE", 10)
+    # Retry budget: retries may not exceed this ratio of calls in the window (per process)
+    VALKEY_RETRY_BUDGET_RATIO = getattr(settings, "VAPI_RETRY_BUDGET_RATIO", 0.2)
+    VALKEY_RETRY_BUDGET_MIN_RETRIES = getattr(settings, "VAPI_RETRY_BUDGET_MIN_RETRIES", 10)
+    VALKEY_RETRY_BUDGET_WINDOW = getattr(settings, "VAPI_RETRY_BUDGET_WINDOW", 10)  # seconds
 
     # --- Stripe Configuration ---
     STRIPE_SECRET_KEY = getattr(settings, "STRIPE_SECRET_KEY", "sk_live_your_key")
@@ -65,6 +77,74 @@ class ValkeyConfig:
     STRIPE_SUCCESS_URL = getattr(settings, "STRIPE_SUCCESS_URL", "http://localhost:8000/success")
     STRIPE_CANCEL_URL = getattr(settings, "STRIPE_CANCEL_URL", "http://localhost:8000/cancel")
     STRIPE_PORTAL_RETURN_URL = getattr(settings, "STRIPE_PORTAL_RETURN_URL", "http://localhost:8000/portal")
+    # Plan name -> subscription tier; product `subscription_tier` metadata overrides it (see sdk/tiers.py)
+    STRIPE_PLAN_TIERS = getattr(
+        settings,
+        "STRIPE_PLAN_TIERS",
+        {
+            "Free Plan": "free",
+            "Basic Plan": "basic",
+            "Premium Plan": "premium",
+            "Enterprise Plan": "enterprise",
+        },
+    )
+    STRIPE_DEFAULT_TIER = getattr(settings, "STRIPE_DEFAULT_TIER", "basic")
+
+    # --- Stripe Mirror (local SQLite copy for admin reads, STRIPE_*) ---
+    STRIPE_MIRROR_ENABLED = getattr(settings, "STRIPE_MIRROR_ENABLED", False)
+    STRIPE_MIRROR_PATH = getattr(settings, "STRIPE_MIRROR_PATH", "stripe_mirror.sqlite3")
+
+    # --- Stripe Analytics (local SQLite aggregates for reporting, STRIPE_*) ---
+    STRIPE_ANALYTICS_ENABLED = getattr(settings, "STRIPE_ANALYTICS_ENABLED", False)
+    STRIPE_ANALYTICS_PATH = getattr(settings, "STRIPE_ANALYTICS_PATH", "stripe_analytics.sqlite3")
+
+    # --- Stripe HTTP Client (connection pooling, STRIPE_*) ---
+    STRIPE_API_VERSION = getattr(settings, "STRIPE_API_VERSION", None)
+    STRIPE_HTTP_POOL_CONNECTIONS = getattr(settings, "STRIPE_HTTP_POOL_CONNECTIONS", 10)
+    STRIPE_HTTP_POOL_MAXSIZE = getattr(settings, "STRIPE_HTTP_POOL_MAXSIZE", 100)
+    STRIPE_HTTP_CONNECT_TIMEOUT = getattr(settings, "STRIPE_HTTP_CONNECT_TIMEOUT", 5)
+    STRIPE_HTTP_READ_TIMEOUT = getattr(settings, "STRIPE_HTTP_READ_TIMEOUT", 30)
+    # Share one in-flight request between concurrent identical GETs (see coalesce.py)
+    STRIPE_HTTP_COALESCE_GETS = getattr(settings, "STRIPE_HTTP_COALESCE_GETS", True)
+
+    # --- Stripe Rate Limiting (Valkey-only, VAPI_*) ---
+    # Token buckets shared by every worker; rates are requests/second per Stripe account.
+    VALKEY_STRIPE_RATE_LIMIT_ENABLED = getattr(settings, "VAPI_STRIPE_RATE_LIMIT_ENABLED", True)
+    VALKEY_STRIPE_READ_RATE = getattr(settings, "VAPI_STRIPE_READ_RATE", 100)
+    VALKEY_STRIPE_WRITE_RATE = getattr(settings, "VAPI_STRIPE_WRITE_RATE", 100)
+    VALKEY_STRIPE_TEST_RATE = getattr(settings, "VAPI_STRIPE_TEST_RATE", 25)  # test mode, read and write
+    # Fraction of each bucket only interactive calls may spend (batch calls stop above it)
+    VALKEY_STRIPE_BATCH_RESERVE = getattr(settings, "VAPI_STRIPE_BATCH_RESERVE", 0.2)
+    VALKEY_STRIPE_MAX_WAIT = getattr(settings, "VAPI_STRIPE_MAX_WAIT", 5)  # seconds before rejecting
+
+    # --- Stripe Caching (Valkey-only, VAPI_*) ---
+    # Plans: in-process LRU (short TTL bounds staleness on other workers) over a Valkey tier
+    VALKEY_STRIPE_PLAN_CACHE_TTL = getattr(settings, "VAPI_STRIPE_PLAN_CACHE_TTL", 3600)
+    VALKEY_STRIPE_PLAN_CACHE_LOCAL_TTL = getattr(settings, "VAPI_STRIPE_PLAN_CACHE_LOCAL_TTL", 30)
+    VALKEY_STRIPE_PLAN_CACHE_MAXSIZE = getattr(settings, "VAPI_STRIPE_PLAN_CACHE_MAXSIZE", 1024)
+    # Customers: user id -> Stripe customer id (stable, so cached for longer)
+    VALKEY_STRIPE_CUSTOMER_CACHE_TTL = getattr(settings, "VAPI_STRIPE_CUSTOMER_CACHE_TTL", 86400)
+    VALKEY_STRIPE_CUSTOMER_CACHE_LOCAL_TTL = getattr(settings, "VAPI_STRIPE_CUSTOMER_CACHE_LOCAL_TTL", 300)
+    VALKEY_STRIPE_CUSTOMER_CACHE_MAXSIZE = getattr(settings, "VAPI_STRIPE_CUSTOMER_CACHE_MAXSIZE", 10000)
+    # Missing plans/customers (no DB row, Stripe 404): short-lived markers, cleared on create
+    VALKEY_STRIPE_NEGATIVE_CACHE_TTL = getattr(settings, "VAPI_STRIPE_NEGATIVE_CACHE_TTL", 60)
+    VALKEY_STRIPE_NEGATIVE_CACHE_LOCAL_TTL = getattr(settings, "VAPI_STRIPE_NEGATIVE_CACHE_LOCAL_TTL", 5)
+    # Catalog snapshot: rebuilt on product/price webhooks, so the Valkey TTL is only a safety net
+    VALKEY_STRIPE_CATALOG_TTL = getattr(settings, "VAPI_STRIPE_CATALOG_TTL", 86400)
+    VALKEY_STRIPE_CATALOG_LOCAL_TTL = getattr(settings, "VAPI_STRIPE_CATALOG_LOCAL_TTL", 5)
+    # Customer dashboard: fresh for FRESH_TTL, then served stale (and refreshed) until STALE_TTL
+    VALKEY_STRIPE_DASHBOARD_FRESH_TTL = getattr(settings, "VAPI_STRIPE_DASHBOARD_FRESH_TTL", 30)
+    VALKEY_STRIPE_DASHBOARD_STALE_TTL = getattr(settings, "VAPI_STRIPE_DASHBOARD_STALE_TTL", 600)
+    # Max concurrent Stripe calls from dashboard fan-out per worker
+    VALKEY_STRIPE_DASHBOARD_CONCURRENCY = getattr(settings, "VAPI_STRIPE_DASHBOARD_CONCURRENCY", 20)
+
+    # --- Stripe Idempotency (Valkey-only, VAPI_*) ---
+    # Stored responses live as long as Stripe keeps idempotency keys (24h)
+    VALKEY_STRIPE_IDEMPOTENCY_TTL = getattr(settings, "VAPI_STRIPE_IDEMPOTENCY_TTL", 86400)
+    # In-flight marker lifetime; must outlast one Stripe call including its retry deadline
+    VALKEY_STRIPE_IDEMPOTENCY_LOCK_TTL = getattr(settings, "VAPI_STRIPE_IDEMPOTENCY_LOCK_TTL", 60)
+    # How long a duplicate waits for the in-flight request before answering 409
+    VALKEY_STRIPE_IDEMPOTENCY_WAIT = getattr(settings, "VAPI_STRIPE_IDEMPOTENCY_WAIT", 30)
 
     # --- Locking (Valkey-only, VAPI_*) ---
     VALKEY_LOCK_TIMEOUT = getattr(settings, "VAPI_LOCK_TIMEOUT", 10)
@@ -0,0 +1,204 @@
+"""
+Cluster-wide token-bucket rate limiter for outbound Stripe traffic.
+Buckets live in Valkey and are updated by one atomic script, so every worker on
+every node draws from the same budget. Reads and writes get separate buckets
+per Stripe account, and interactive calls can spend a reserve that batch calls
+must leave alone.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections.abc import Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from prometheus_client import Counter, Histogram
+
+from .api._exceptions import StripeRateLimitExceeded
+from .config import ValkeyConfig
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes: interactive (checkout, portal) preempts batch (admin listing, imports)
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+_current_lane: ContextVar[str] = ContextVar("stripe_lane", default=INTERACTIVE)
+
+stripe_RATE_LIMIT_WAIT = Histogram(
+    "stripe_rate_limit_wait_seconds",
+    "Time spent waiting for a Stripe rate limit token",
+    ["bucket", "lane"],
+)
+stripe_RATE_LIMIT_REJECTIONS = Counter(
+    "stripe_rate_limit_rejections",
+    "Stripe calls rejected locally after exceeding the max wait",
+    ["bucket", "lane"],
+)
+
+# KEYS[1] = bucket key
+# ARGV = rate (tokens/s), capacity, cost, reserve (tokens the caller must leave)
+# Returns {allowed (0/1), wait_ms}. Uses server TIME so node clocks don't matter.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local reserve = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+  tokens = capacity
+  ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+local allowed = 0
+local wait_ms = 0
+if tokens - cost >= reserve then
+  tokens = tokens - cost
+  allowed = 1
+else
+  wait_ms = math.ceil((cost + reserve - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return {allowed, wait_ms}
+"""
+
+
+@contextmanager
+def stripe_lane(lane: str):
+    """Run the enclosed Stripe calls in the given priority lane."""
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+def batch_lane(func):
+    """Decorator: run a (sync) function's Stripe calls in the batch lane."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with stripe_lane(BATCH):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def current_lane() -> str:
+    return _current_lane.get()
+
+
+class StripeRateLimiter:
+    """
+    Token-bucket limiter shared across workers via Valkey.
+    Pass a sync client for the sync transport and/or an asyncio client for the
+    async transport. If Valkey is unreachable the limiter fails open: Stripe's
+    own 429s are still handled by the caller.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        async_client=None,
+        *,
+        read_rate: float = ValkeyConfig.VALKEY_STRIPE_READ_RATE,
+        write_rate: float = ValkeyConfig.VALKEY_STRIPE_WRITE_RATE,
+        test_rate: float = ValkeyConfig.VALKEY_STRIPE_TEST_RATE,
+        batch_reserve: float = ValkeyConfig.VALKEY_STRIPE_BATCH_RESERVE,
+        max_wait: float = ValkeyConfig.VALKEY_STRIPE_MAX_WAIT,
+        prefix: str = "stripe:ratelimit",
+    ):
+        self.read_rate = read_rate
+        self.write_rate = write_rate
+        self.test_rate = test_rate
+        self.batch_reserve = batch_reserve
+        self.max_wait = max_wait
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT) if client else None
+        self._async_script = (
+            async_client.register_script(TOKEN_BUCKET_SCRIPT) if async_client else None
+        )
+
+    def bucket_for(self, method: str, headers: Mapping[str, str]) -> tuple[str, str, float]:
+        """
+        Return (valkey key, bucket name, rate) for a request.
+        The account is the Stripe-Account header for Connect calls, otherwise a
+        hash of the API key (secret keys never end up in Valkey).
+        """
+        api_key = headers.get("Authorization", "").removeprefix("Bearer ")
+        account = headers.get("Stripe-Account") or hashlib.sha256(
+            api_key.encode()
+        ).hexdigest()[:16]
+        kind = "read" if method.lower() == "get" else "write"
+        if api_key.startswith(("sk_test_", "rk_test_")):
+            rate = self.test_rate
+        else:
+            rate = self.read_rate if kind == "read" else self.write_rate
+        return f"{self.prefix}:{account}:{kind}", kind, rate
+
+    def _args(self, rate: float, lane: str, cost: int) -> list:
+        reserve = rate * self.batch_reserve if lane == BATCH else 0
+        return [rate, rate, cost, reserve]
+
+    def _reject(self, kind: str, lane: str, waited: float):
+        stripe_RATE_LIMIT_REJECTIONS.labels(bucket=kind, lane=lane).inc()
+        logger.warning(
+            f"Stripe {kind} rate limit: gave up after {waited:.2f}s in {lane} lane"
+        )
+        raise StripeRateLimitExceeded(
+            "Local Stripe rate limit exceeded", http_status=429
+        )
+
+    def acquire(self, method: str, headers: Mapping[str, str], cost: int = 1) -> float:
+        """Block until a token is available; return seconds waited."""
+        if self._script is None:
+            return 0.0
+        key, kind, rate = self.bucket_for(method, headers)
+        lane = current_lane()
+        started = time.monotonic()
+        while True:
+            try:
+                allowed, wait_ms = self._script(keys=[key], args=self._args(rate, lane, cost))
+            except Exception as e:
+                logger.warning(f"Stripe rate limiter unavailable, failing open: {e}")
+                return 0.0
+            waited = time.monotonic() - started
+            if allowed:
+                stripe_RATE_LIMIT_WAIT.labels(bucket=kind, lane=lane).observe(waited)
+                return waited
+            if waited + wait_ms / 1000 > self.max_wait:
+                self._reject(kind, lane, waited)
+            time.sleep(wait_ms / 1000)
+
+    async def acquire_async(
+        self, method: str, headers: Mapping[str, str], cost: int = 1
+    ) -> float:
+        """Await a token without blocking the event loop; return seconds waited."""
+        if self._async_script is None:
+            return 0.0
+        key, kind, rate = self.bucket_for(method, headers)
+        lane = current_lane()
+        started = time.monotonic()
+        while True:
+            try:
+                allowed, wait_ms = await self._async_script(
+                    keys=[key], args=self._args(rate, lane, cost)
+                )
+            except Exception as e:
+                logger.warning(f"Stripe rate limiter unavailable, failing open: {e}")
+                return 0.0
+            waited = time.monotonic() - started
+            if allowed:
+                stripe_RATE_LIMIT_WAIT.labels(bucket=kind, lane=lane).observe(waited)
+                return waited
+            if waited + wait_ms / 1000 > self.max_wait:
+                self._reject(kind, lane, waited)
+            await asyncio.sleep(wait_ms / 1000)
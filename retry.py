@@ -0,0 +1,169 @@
+"""
+Retry engine for Stripe calls, driven by the VAPI_RETRY_* settings in ValkeyConfig.
+- Backoff: exponential, jitter (full jitter) or constant, capped.
+- Honors Retry-After and Stripe-Should-Retry response headers.
+- Per-call limits (attempts and deadline) plus a process-wide retry budget so
+  retries cannot amplify an outage.
+"""
+
+import random
+import re
+import time
+from collections import deque
+from collections.abc import Mapping
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from urllib.parse import urlsplit
+
+from prometheus_client import Counter
+
+from .config import ValkeyConfig
+
+stripe_RETRIES = Counter(
+    "stripe_retries", "Stripe call retries by endpoint and reason", ["endpoint", "reason"]
+)
+stripe_RETRY_BUDGET_EXHAUSTED = Counter(
+    "stripe_retry_budget_exhausted",
+    "Stripe retries skipped because the retry budget was spent",
+    ["endpoint"],
+)
+
+# Path segments that are object ids (cus_123, sub_ABC, acct_1Ab...) collapse to {id}
+_ID_SEGMENT = re.compile(r"^[a-z]+(?:_[a-z]+)*_[A-Za-z0-9]+$")
+
+
+class RetryPolicy:
+    """Backoff schedule and per-call limits."""
+
+    def __init__(
+        self,
+        attempts: int = ValkeyConfig.VALKEY_RETRY_ATTEMPTS,
+        backoff_type: str = ValkeyConfig.VALKEY_RETRY_BACKOFF_TYPE,
+        base: float = ValkeyConfig.VALKEY_RETRY_BACKOFF_BASE,
+        cap: float = ValkeyConfig.VALKEY_RETRY_BACKOFF_CAP,
+        retry_after_max: float = ValkeyConfig.VALKEY_RETRY_AFTER_MAX,
+        deadline: float = ValkeyConfig.VALKEY_RETRY_DEADLINE,
+    ):
+        if backoff_type not in ("exponential", "jitter", "constant"):
+            raise ValueError(f"Unsupported backoff type: {backoff_type}")
+        self.attempts = attempts
+        self.backoff_type = backoff_type
+        self.base = base
+        self.cap = cap
+        self.retry_after_max = retry_after_max
+        self.deadline = deadline
+
+    def backoff(self, retry: int) -> float:
+        """Seconds to wait before the given retry (1-based)."""
+        if self.backoff_type == "constant":
+            return min(self.cap, self.base)
+        delay = min(self.cap, self.base * 2 ** (retry - 1))
+        if self.backoff_type == "jitter":
+            return random.uniform(0, delay)
+        return delay
+
+    def delay(self, retry: int, retry_after: float | None = None) -> float | None:
+        """Backoff for this retry, never shorter than Retry-After.
+        Returns None when the server asks us to wait longer than we allow."""
+        if retry_after is None:
+            return self.backoff(retry)
+        if retry_after > self.retry_after_max:
+            return None
+        return max(retry_after, self.backoff(retry))
+
+
+class RetryBudget:
+    """
+    Sliding-window retry budget shared by all calls in the process.
+    Retries are allowed while retries <= max(min_retries, ratio * calls)
+    over the last `window` seconds, so a failing dependency sees at most
+    (1 + ratio) times normal traffic instead of (1 + attempts) times.
+    """
+
+    def __init__(
+        self,
+        ratio: float = ValkeyConfig.VALKEY_RETRY_BUDGET_RATIO,
+        min_retries: int = ValkeyConfig.VALKEY_RETRY_BUDGET_MIN_RETRIES,
+        window: float = ValkeyConfig.VALKEY_RETRY_BUDGET_WINDOW,
+    ):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._calls: deque[float] = deque()
+        self._retries: deque[float] = deque()
+        self._lock = Lock()
+
+    def _trim(self, now: float) -> None:
+        horizon = now - self.window
+        for events in (self._calls, self._retries):
+            while events and events[0] < horizon:
+                events.popleft()
+
+    def record_call(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            self._calls.append(now)
+
+    def try_withdraw(self) -> bool:
+        """Reserve one retry; False when the budget is spent."""
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            allowed = max(self.min_retries, self.ratio * len(self._calls))
+            if len(self._retries) >= allowed:
+                return False
+            self._retries.append(now)
+            return True
+
+
+def endpoint_label(url: str) -> str:
+    """Low-cardinality endpoint label, e.g. /v1/customers/{id}."""
+    path = urlsplit(url).path
+    return "/".join(
+        "{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/")
+    )
+
+
+def _header(headers: Mapping[str, str] | None, name: str) -> str | None:
+    if not headers:
+        return None
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def parse_retry_after(headers: Mapping[str, str] | None) -> float | None:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    value = _header(headers, "retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_reason(
+    status: int | None, headers: Mapping[str, str] | None, error: Exception | None
+) -> str | None:
+    """Return why a response/error is retryable, or None if it is not."""
+    if error is not None:
+        return "connection_error" if getattr(error, "should_retry", True) else None
+    should_retry = _header(headers, "stripe-should-retry")
+    if should_retry == "false":
+        return None
+    if should_retry == "true":
+        return "stripe_should_retry"
+    if status == 409:
+        return "conflict"
+    if status == 429:
+        return "rate_limited"
+    if status is not None and status >= 500:
+        return "server_error"
+    return None
@@ -1,129 +1,51 @@
-import logging
+from collections.abc import AsyncIterator, Callable
 from typing import Any
 
 from stripe import StripeClient
 
+from .pagination import PAGE_SIZE, RESOURCES, Created, paginate, paginate_sync  # noqa: F401
+
 # Utility functions for Stripe admin operations using the Stripe SDK
 # These are NOT FastAPI routes and do not depend on HTTP or FastAPI.
 # All functions raise RuntimeError on failure and log errors.
-
-def list_stripe_customers(stripe: StripeClient) -> list[dict[str, Any]]:
-    """list Stripe customers using the Stripe SDK."""
-    try:
-        response = stripe.customers.list(limit=20)
-        return list(response.auto_paging_iter())
-    except Exception as e:
-        logging.error(f"Error listing Stripe customers: {e}")
-        raise RuntimeError("Stripe API error") from e
-
-
-def list_stripe_subscriptions(stripe: StripeClient) -> list[dict[str, Any]]:
-    """list Stripe subscriptions using the Stripe SDK."""
-    try:
-        response = stripe.subscriptions.list(limit=20)
-        return list(response.auto_paging_iter())
-    except Exception as e:
-        logging.error(f"Error listing Stripe subscriptions: {e}")
-        raise RuntimeError("Stripe API error") from e
-
-
-def list_stripe_plans(stripe: StripeClient) -> list[dict[str, Any]]:
-    """list Stripe plans using the Stripe SDK."""
-    try:
-        response = stripe.plans.list(limit=20)
-        return list(response.auto_paging_iter())
-    except Exception as e:
-        logging.error(f"Error listing Stripe plans: {e}")
-        raise RuntimeError("Stripe API error") from e
-
-
-def list_stripe_invoices(stripe: StripeClient) -> list[dict[str, Any]]:
-    """list Stripe invoices using the Stripe SDK."""
-    try:
-        response = stripe.invoices.list(limit=20)
-        return list(response.auto_paging_iter())
-    except Exception as e:
-        logging.error(f"Error listing Stripe invoices: {e}")
-        raise RuntimeError("Stripe API error") from e
-
-
-def list_stripe_charges(stripe: StripeClient) -> list[dict[str, Any]]:
-    """list Stripe charges using the Stripe SDK."""
-    try:
-        response = stripe.charges.list(limit=20)
-        return list(response.auto_paging_iter())
-    except Exception as e:
-        logging.error(f"Error listing Stripe charges: {e}")
-        raise RuntimeError("Stripe API error") from e
-
-
-def list_stripe_products(stripe: StripeClient) -> list[dict[str, Any]]:
-    """list Stripe products using the Stripe SDK."""
-    try:
-        response = stripe.products.list(limit=20)
-        return list(response.auto_paging_iter())
-    except Exception as e:
-        logging.error(f"Error listing Stripe products: {e}")
-        raise RuntimeError("Stripe API error") from e
-
-
-def list_stripe_payment_intents(stripe: StripeClient) -> list[dict[str, Any]]:
-    """list Stripe payment intents using the Stripe SDK."""
-    try:
-        response = stripe.payment_intents.list(limit=20)
-        return list(response.auto_paging_iter())
-    except Exception as e:
-        logging.error(f"Error listing Stripe payment intents: {e}")
-        raise RuntimeError("Stripe API error") from e
+# Listings are thin wrappers over the pagination engine (pagination.py): max
+# page size, next page prefetched in the background, batch rate-limit lane.
+# Any resource in pagination.RESOURCES works with list_stripe/stream_stripe;
+# list_stripe_<resource> aliases are generated for the registered ones.
 
 
-def list_stripe_refunds(stripe: StripeClient) -> list[dict[str, Any]]:
-    """list Stripe refunds using the Stripe SDK."""
-    try:
-        response = stripe.refunds.list(limit=20)
-        return list(response.auto_paging_iter())
-    except Exception as e:
-        logging.error(f"Error listing Stripe refunds: {e}")
-        raise RuntimeError("Stripe API error") from e
+def list_stripe(
+    stripe: StripeClient, resource: str, created: Created | None = None, **filters: Any
+) -> list[dict[str, Any]]:
+    """list every Stripe `resource` object using the Stripe SDK."""
+    return list(paginate_sync(stripe, resource, created, **filters))
 
 
-def list_stripe_balance_transactions(stripe: StripeClient) -> list[dict[str, Any]]:
-    """list Stripe balance transactions using the Stripe SDK."""
-    try:
-        response = stripe.balance_transactions.list(limit=20)
-        return list(response.auto_paging_iter())
-    except Exception as e:
-        logging.error(f"Error listing Stripe balance transactions: {e}")
-        raise RuntimeError("Stripe API error") from e
+def stream_stripe(
+    stripe: StripeClient, resource: str, created: Created | None = None, **filters: Any
+) -> AsyncIterator[Any]:
+    """
+    Stream Stripe `resource` objects, optionally filtered by `created` and list
+    params. Yields objects one by one while holding a single page in memory,
+    so callers can start processing after the first page.
+    """
+    return paginate(stripe, resource, created, **filters)
 
 
-def list_stripe_payouts(stripe: StripeClient) -> list[dict[str, Any]]:
-    """list Stripe payouts using the Stripe SDK."""
-    try:
-        response = stripe.payouts.list(limit=20)
-        return list(response.auto_paging_iter())
-    except Exception as e:
-        logging.error(f"Error listing Stripe payouts: {e}")
-        raise RuntimeError("Stripe API error") from e
+def _list_alias(resource: str) -> Callable[..., list[dict[str, Any]]]:
+    def list_resource(
+        stripe: StripeClient, created: Created | None = None, **filters: Any
+    ) -> list[dict[str, Any]]:
+        return list_stripe(stripe, resource, created, **filters)
 
+    list_resource.__name__ = list_resource.__qualname__ = f"list_stripe_{resource}"
+    list_resource.__doc__ = f"list Stripe {resource.replace('_', ' ')} using the Stripe SDK."
+    return list_resource
 
-def list_stripe_disputes(stripe: StripeClient) -> list[dict[str, Any]]:
-    """list Stripe disputes using the Stripe SDK."""
-    try:
-        response = stripe.disputes.list(limit=20)
-        return list(response.auto_paging_iter())
-    except Exception as e:
-        logging.error(f"Error listing Stripe disputes: {e}")
-        raise RuntimeError("Stripe API error") from e
 
+# list_stripe_customers, list_stripe_invoices, ... (one per registered resource)
+for _resource in RESOURCES:
+    globals()[f"list_stripe_{_resource}"] = _list_alias(_resource)
 
-def list_stripe_events(stripe: StripeClient) -> list[dict[str, Any]]:
-    """list Stripe events using the Stripe SDK."""
-    try:
-        response = stripe.events.list(limit=20)
-        return list(response.auto_paging_iter())
-    except Exception as e:
-        logging.error(f"Error listing Stripe events: {e}")
-        raise RuntimeError("Stripe API error") from e
 
 # End of SDK utility functions for Stripe admin operations
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
+from typing import Any, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from stripe import StripeClient
+
+from app.api.deps import get_current_user
+
+from ..client import get_stripe_client
+from ..config import ValkeyConfig
+from . import mirror
+from .pagination import RESOURCES, paginate
+
+logger = logging.getLogger(__name__)
+
+# Streaming admin listings over the pagination engine (pagination.py).
+# Bytes go out page by page, so the first object arrives after one Stripe
+# round trip and memory per request stays at about one page.
+# Resume an interrupted download with ?starting_after=<last id received>.
+# With the mirror enabled, /admin/mirror/ serves the same objects from the
+# local copy (mirror.py) without calling Stripe.
+
+router = APIRouter()
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+
+def require_staff(user: Any = Depends(get_current_user)) -> Any:
+    if not getattr(user, "is_staff", False):
+        raise HTTPException(status_code=403, detail="Staff access required")
+    return user
+
+
+def _created(gt: int | None, gte: int | None, lt: int | None, lte: int | None) -> dict[str, int] | None:
+    bounds = {"gt": gt, "gte": gte, "lt": lt, "lte": lte}
+    return {op: ts for op, ts in bounds.items() if ts is not None} or None
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj.to_dict() if hasattr(obj, "to_dict") else obj, default=str)
+
+
+# Both bodies close the page stream when they stop for any reason (client
+# disconnect included), so its prefetched page is dropped right away
+
+
+async def _ndjson(first: Any, stream: AsyncIterator[Any]) -> AsyncIterator[str]:
+    last_id = first["id"]
+    try:
+        yield _dumps(first) + "\n"
+        async for obj in stream:
+            last_id = obj["id"]
+            yield _dumps(obj) + "\n"
+    except RuntimeError:
+        # Headers are already sent: report the failure in-band with the resume cursor
+        yield json.dumps({"error": {"message": "Stripe API error", "starting_after": last_id}}) + "\n"
+    finally:
+        await stream.aclose()
+
+
+async def _json_array(first: Any, stream: AsyncIterator[Any]) -> AsyncIterator[str]:
+    # A failure mid-stream aborts the response, leaving the array unterminated
+    try:
+        yield "[" + _dumps(first)
+        async for obj in stream:
+            yield "," + _dumps(obj)
+        yield "]"
+    finally:
+        await stream.aclose()
+
+
+@router.get("/admin/{resource}", status_code=200)
+async def stream_resource(
+    resource: str,
+    created_gt: int | None = None,
+    created_gte: int | None = None,
+    created_lt: int | None = None,
+    created_lte: int | None = None,
+    starting_after: str | None = None,
+    format: Literal["ndjson", "json"] = Query(default="ndjson"),
+    user: Any = Depends(require_staff),
+    stripe_client: StripeClient = Depends(get_stripe_client),
+):
+    """
+    ```
+    Stream every Stripe object of `resource` (newest first) as NDJSON or a
+    JSON array, optionally filtered by `created` and resumed after an id.
+    ```
+    """
+    if resource not in RESOURCES:
+        raise HTTPException(status_code=404, detail=f"Unknown Stripe resource: {resource}")
+    created = _created(created_gt, created_gte, created_lt, created_lte)
+    filters = {"starting_after": starting_after} if starting_after else {}
+    stream = paginate(stripe_client, resource, created, **filters)
+    # Pull the first page before answering, so Stripe errors still get a real status code
+    try:
+        first = await anext(stream, None)
+    except RuntimeError:
+        raise HTTPException(status_code=502, detail="Stripe API error")
+    if first is None:
+        body = iter([] if format == "ndjson" else ["[]"])
+    else:
+        body = (_ndjson if format == "ndjson" else _json_array)(first, stream)
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format])
+
+
+def _mirror_store(resource: str) -> mirror.MirrorStore:
+    if not ValkeyConfig.STRIPE_MIRROR_ENABLED:
+        raise HTTPException(status_code=404, detail="Stripe mirror is disabled")
+    if resource not in mirror.RESOURCES.values():
+        raise HTTPException(status_code=404, detail=f"Unknown Stripe resource: {resource}")
+    return mirror.get_mirror().store
+
+
+@router.get("/admin/mirror/{resource}", status_code=200)
+async def list_mirrored_resource(
+    resource: str,
+    created_gt: int | None = None,
+    created_gte: int | None = None,
+    created_lt: int | None = None,
+    created_lte: int | None = None,
+    starting_after: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    user: Any = Depends(require_staff),
+):
+    """
+    ```
+    One page of mirrored `resource` objects (newest first), shaped like a
+    Stripe list response. Page on with ?starting_after=<last id>.
+    ```
+    """
+    store = _mirror_store(resource)
+    created = _created(created_gt, created_gte, created_lt, created_lte)
+    data = await asyncio.to_thread(store.list, resource, created, limit + 1, starting_after)
+    return {"object": "list", "data": data[:limit], "has_more": len(data) > limit}
+
+
+@router.get("/admin/mirror/{resource}/{object_id}", status_code=200)
+async def get_mirrored_object(resource: str, object_id: str, user: Any = Depends(require_staff)):
+    """
+    ```
+    A single mirrored object by id, as last seen by the mirror.
+    ```
+    """
+    store = _mirror_store(resource)
+    obj = await asyncio.to_thread(store.get, resource, object_id)
+    if obj is None:
+        raise HTTPException(status_code=404, detail=f"{object_id} is not in the Stripe mirror")
+    return obj
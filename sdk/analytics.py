@@ -0,0 +1,396 @@
+"""
+Local analytical store for revenue and subscription reporting.
+Daily aggregates are maintained incrementally in SQLite, so dashboard queries
+read a few hundred small rows instead of scanning Stripe:
+- MRR movements per day and currency (new, expansion, contraction, churned),
+  from each subscription's current MRR contribution: every change books only
+  the delta. The MRR series is the running sum of the movements.
+- Revenue per day and currency from balance transactions (gross, refunds,
+  fees, net) and paid invoices. Each object is counted once, however often
+  it is seen. Only revenue categories are booked: payouts, transfers and
+  top-ups move money that was already counted (or never was revenue).
+Subscription and invoice webhooks keep it current (STRIPE_ANALYTICS_ENABLED);
+sync_revenue() pulls new balance transactions and paid invoices, and
+backfill() seeds an empty store from Stripe.
+MRR is list price times quantity normalized to a month; discounts and taxes
+are not applied.
+"""
+
+import asyncio
+import logging
+import sqlite3
+from collections.abc import Iterable, Mapping
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any
+
+from stripe import StripeClient
+
+from ..config import ValkeyConfig
+from .pagination import paginate
+from .webhooks import on_event
+
+logger = logging.getLogger(__name__)
+
+# Statuses that count towards MRR
+MRR_STATUSES = {"active", "past_due"}
+
+# Months per billing interval
+MONTHS = {"day": 12 / 365, "week": 12 / 52, "month": 1, "year": 12}
+
+# Balance transaction reporting categories booked as revenue
+REVENUE_CATEGORIES = {
+    "charge",
+    "charge_failure",
+    "partial_capture_reversal",
+    "refund",
+    "refund_failure",
+    "dispute",
+    "dispute_reversal",
+    "fee",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscription_mrr (
+    id TEXT PRIMARY KEY,
+    customer TEXT,
+    currency TEXT NOT NULL,
+    mrr INTEGER NOT NULL,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily_mrr_movements (
+    day TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    new_mrr INTEGER NOT NULL DEFAULT 0,
+    new_count INTEGER NOT NULL DEFAULT 0,
+    expansion_mrr INTEGER NOT NULL DEFAULT 0,
+    expansion_count INTEGER NOT NULL DEFAULT 0,
+    contraction_mrr INTEGER NOT NULL DEFAULT 0,
+    contraction_count INTEGER NOT NULL DEFAULT 0,
+    churned_mrr INTEGER NOT NULL DEFAULT 0,
+    churned_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (currency, day)
+);
+CREATE TABLE IF NOT EXISTS daily_revenue (
+    day TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    gross INTEGER NOT NULL DEFAULT 0,
+    refunds INTEGER NOT NULL DEFAULT 0,
+    fees INTEGER NOT NULL DEFAULT 0,
+    net INTEGER NOT NULL DEFAULT 0,
+    invoices_paid INTEGER NOT NULL DEFAULT 0,
+    invoices_paid_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (currency, day)
+);
+CREATE TABLE IF NOT EXISTS revenue_seen (
+    source TEXT NOT NULL,
+    id TEXT NOT NULL,
+    PRIMARY KEY (source, id)
+);
+CREATE TABLE IF NOT EXISTS analytics_cursors (
+    name TEXT PRIMARY KEY,
+    high_water INTEGER
+);
+"""
+
+
+def day_of(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+
+
+def subscription_mrr(subscription: Mapping, active: bool | None = None) -> int:
+    """Monthly recurring amount (minor units) of a subscription; 0 unless active."""
+    if active is None:
+        active = subscription.get("status") in MRR_STATUSES
+    if not active:
+        return 0
+    total = 0.0
+    for item in (subscription.get("items") or {}).get("data", []):
+        # Prices carry `recurring`; legacy plans carry the interval themselves
+        price = item.get("price") or item.get("plan") or {}
+        recurring = price.get("recurring") or price
+        interval = recurring.get("interval")
+        if interval not in MONTHS:
+            continue
+        amount = price.get("unit_amount", price.get("amount")) or 0
+        total += amount * (item.get("quantity") or 1) / (MONTHS[interval] * (recurring.get("interval_count") or 1))
+    return round(total)
+
+
+def _was_active(subscription: Mapping) -> bool:
+    """Whether an ended subscription ever counted towards MRR (paid, past its trial)."""
+    if subscription.get("status") == "incomplete_expired":
+        return False
+    trial_end, ended = subscription.get("trial_end"), subscription.get("ended_at")
+    return not (trial_end and ended and trial_end >= ended)
+
+
+def _currency(subscription: Mapping) -> str:
+    if subscription.get("currency"):
+        return subscription["currency"]
+    for item in (subscription.get("items") or {}).get("data", []):
+        price = item.get("price") or item.get("plan") or {}
+        if price.get("currency"):
+            return price["currency"]
+    return "usd"
+
+
+def _id(value: Any) -> str | None:
+    return value if value is None or isinstance(value, str) else value.get("id")
+
+
+class AnalyticsStore:
+    """SQLite store for incrementally maintained daily aggregates (thread-safe)."""
+
+    def __init__(self, path: str = ValkeyConfig.STRIPE_ANALYTICS_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = Lock()
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    # --- Writes ---
+
+    def _move(self, day: str, currency: str, kind: str, amount: int) -> None:
+        self._conn.execute(
+            f"INSERT INTO daily_mrr_movements (day, currency, {kind}_mrr, {kind}_count) VALUES (?, ?, ?, 1) "
+            f"ON CONFLICT (currency, day) DO UPDATE SET "
+            f"{kind}_mrr = {kind}_mrr + excluded.{kind}_mrr, {kind}_count = {kind}_count + 1",
+            (day, currency, amount),
+        )
+
+    def _write_subscription(self, subscription: Mapping, currency: str, mrr: int, version: int) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO subscription_mrr VALUES (?, ?, ?, ?, ?)",
+            (subscription["id"], _id(subscription.get("customer")), currency, mrr, version),
+        )
+
+    def apply_subscription(self, subscription: Mapping, at: int) -> str | None:
+        """
+        Book the change in a subscription's MRR at time `at` (the event time).
+        Returns the movement kind, or None when MRR did not change or the
+        update is older than the stored one.
+        """
+        currency = _currency(subscription)
+        mrr = subscription_mrr(subscription)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT mrr, version FROM subscription_mrr WHERE id = ?", (subscription["id"],)
+            ).fetchone()
+            if row is not None and row["version"] > at:
+                return None
+            old = row["mrr"] if row is not None else 0
+            self._write_subscription(subscription, currency, mrr, at)
+            if mrr == old:
+                return None
+            if not old:
+                kind = "new"
+            elif not mrr:
+                kind = "churned"
+            else:
+                kind = "expansion" if mrr > old else "contraction"
+            self._move(day_of(at), currency, kind, abs(mrr - old))
+        return kind
+
+    def seed_subscription(self, subscription: Mapping) -> bool:
+        """
+        Book a subscription's history from its current state (backfill):
+        new at start_date and, once ended, churned at ended_at. Subscriptions
+        already tracked are left alone.
+        """
+        currency = _currency(subscription)
+        ended = subscription.get("ended_at")
+        # Ended subscriptions counted while they ran, if they ever did; the rest count by status
+        mrr = subscription_mrr(subscription, active=_was_active(subscription) if ended else None)
+        with self._lock, self._conn:
+            exists = self._conn.execute(
+                "SELECT 1 FROM subscription_mrr WHERE id = ?", (subscription["id"],)
+            ).fetchone()
+            if exists:
+                return False
+            self._write_subscription(subscription, currency, 0 if ended else mrr, 0)
+            if mrr:
+                self._move(day_of(subscription.get("start_date") or subscription["created"]), currency, "new", mrr)
+                if ended:
+                    self._move(day_of(ended), currency, "churned", mrr)
+        return True
+
+    def _claim(self, source: str, object_id: str) -> bool:
+        cursor = self._conn.execute("INSERT OR IGNORE INTO revenue_seen VALUES (?, ?)", (source, object_id))
+        return cursor.rowcount == 1
+
+    def _add_revenue(self, day: str, currency: str, **amounts: int) -> None:
+        columns = ", ".join(amounts)
+        updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in amounts)
+        self._conn.execute(
+            f"INSERT INTO daily_revenue (day, currency, {columns}) VALUES (?, ?{', ?' * len(amounts)}) "
+            f"ON CONFLICT (currency, day) DO UPDATE SET {updates}",
+            (day, currency, *amounts.values()),
+        )
+
+    def add_balance_transactions(self, transactions: Iterable[Mapping]) -> int:
+        """Add gross, refunds, fees and net of unseen revenue balance transactions."""
+        added = 0
+        with self._lock, self._conn:
+            for txn in transactions:
+                category = txn.get("reporting_category") or txn.get("type")
+                if category not in REVENUE_CATEGORIES or not self._claim("balance_transaction", txn["id"]):
+                    continue
+                self._add_revenue(
+                    day_of(txn["created"]),
+                    txn["currency"],
+                    gross=txn["amount"] if category == "charge" else 0,
+                    refunds=-txn["amount"] if category in ("refund", "refund_failure") else 0,
+                    # Stripe fees billed on their own (e.g. Billing) carry the amount, not `fee`
+                    fees=(txn.get("fee") or 0) - (txn["amount"] if category == "fee" else 0),
+                    net=txn.get("net") or 0,
+                )
+                added += 1
+        return added
+
+    def add_paid_invoices(self, invoices: Iterable[Mapping]) -> int:
+        """Add amount_paid of unseen paid invoices on the day they were paid."""
+        added = 0
+        with self._lock, self._conn:
+            for invoice in invoices:
+                if invoice.get("status") != "paid" or not self._claim("invoice", invoice["id"]):
+                    continue
+                paid_at = (invoice.get("status_transitions") or {}).get("paid_at") or invoice["created"]
+                self._add_revenue(
+                    day_of(paid_at),
+                    invoice["currency"],
+                    invoices_paid=invoice.get("amount_paid") or 0,
+                    invoices_paid_count=1,
+                )
+                added += 1
+        return added
+
+    def cursor(self, name: str) -> int | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT high_water FROM analytics_cursors WHERE name = ?", (name,)
+            ).fetchone()
+        return row["high_water"] if row else None
+
+    def set_cursor(self, name: str, high_water: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO analytics_cursors VALUES (?, ?)", (name, high_water))
+
+    # --- Reads (days are inclusive "YYYY-MM-DD" strings) ---
+
+    def mrr_series(self, currency: str, start: str, end: str) -> list[dict]:
+        """MRR at the end of each day with movements, plus that day's net new MRR."""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT day, mrr, net_new FROM (
+                    SELECT day,
+                        new_mrr + expansion_mrr - contraction_mrr - churned_mrr AS net_new,
+                        SUM(new_mrr + expansion_mrr - contraction_mrr - churned_mrr)
+                            OVER (ORDER BY day) AS mrr
+                    FROM daily_mrr_movements WHERE currency = ?
+                ) WHERE day BETWEEN ? AND ? ORDER BY day
+                """,
+                (currency, start, end),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def movements(self, currency: str, start: str, end: str) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM daily_mrr_movements WHERE currency = ? AND day BETWEEN ? AND ? ORDER BY day",
+                (currency, start, end),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def revenue(self, currency: str, start: str, end: str) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM daily_revenue WHERE currency = ? AND day BETWEEN ? AND ? ORDER BY day",
+                (currency, start, end),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def current_mrr(self, currency: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COALESCE(SUM(mrr), 0) FROM subscription_mrr WHERE currency = ?", (currency,)
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class StripeAnalytics:
+    """Feeds an AnalyticsStore from Stripe webhooks and listings."""
+
+    def __init__(self, store: AnalyticsStore):
+        self.store = store
+
+    async def apply_event(self, event: Any) -> bool:
+        obj = event.data.object
+        if event.type.startswith("customer.subscription."):
+            await asyncio.to_thread(self.store.apply_subscription, obj, event.created)
+            return True
+        if event.type == "invoice.paid":
+            await asyncio.to_thread(self.store.add_paid_invoices, [obj])
+            return True
+        return False
+
+    async def _sync(self, stripe: StripeClient, resource: str, add, **filters: Any) -> int:
+        # Re-reads the high-water second; the seen ledger drops the duplicates
+        high_water = await asyncio.to_thread(self.store.cursor, resource)
+        created = {"gte": high_water} if high_water is not None else None
+        added, batch, newest = 0, [], high_water
+        async for obj in paginate(stripe, resource, created, **filters):
+            batch.append(obj)
+            newest = max(newest or 0, obj["created"])
+            if len(batch) >= 500:
+                added += await asyncio.to_thread(add, batch)
+                batch = []
+        added += await asyncio.to_thread(add, batch)
+        if newest is not None:
+            await asyncio.to_thread(self.store.set_cursor, resource, newest)
+        return added
+
+    async def sync_revenue(self, stripe: StripeClient) -> dict[str, int]:
+        """
+        Add balance transactions and paid invoices created since the last sync.
+        Invoices paid after a later sync has passed their creation time arrive
+        through the invoice.paid webhook instead.
+        """
+        return {
+            "balance_transactions": await self._sync(
+                stripe, "balance_transactions", self.store.add_balance_transactions
+            ),
+            "invoices": await self._sync(stripe, "invoices", self.store.add_paid_invoices, status="paid"),
+        }
+
+    async def backfill(self, stripe: StripeClient) -> dict[str, int]:
+        """Seed MRR history from every subscription, then sync revenue."""
+        seeded = 0
+        async for subscription in paginate(stripe, "subscriptions", status="all"):
+            seeded += await asyncio.to_thread(self.store.seed_subscription, subscription)
+        logger.info(f"Analytics seeded {seeded} subscriptions")
+        return {"subscriptions": seeded, **await self.sync_revenue(stripe)}
+
+
+_analytics: StripeAnalytics | None = None
+
+
+def get_analytics() -> StripeAnalytics:
+    global _analytics
+    if _analytics is None:
+        _analytics = StripeAnalytics(AnalyticsStore())
+    return _analytics
+
+
+async def _analytics_event(event) -> None:
+    await get_analytics().apply_event(event)
+
+
+if ValkeyConfig.STRIPE_ANALYTICS_ENABLED:
+    on_event("customer.subscription.*", "invoice.paid")(_analytics_event)
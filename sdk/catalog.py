@@ -0,0 +1,166 @@
+"""
+Materialized product catalog for pricing pages.
+The snapshot (active products, their active prices, and local credit fields
+for recurring prices) is built from two paginated Stripe listings plus one
+database query, serialized once to canonical JSON, and tagged with a strong
+ETag from its content. It is shared through the two-tier cache and rebuilt in
+the background when product or price webhooks arrive.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+
+from stripe import StripeClient
+
+from ..cache import AsyncSingleFlight, TieredCache
+from ..client import get_stripe_client
+from ..config import ValkeyConfig
+from ..valkey_pool import get_valkey_pool
+from .models import StripePlan
+from .webhooks import on_event
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = "snapshot"
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_data(cls, data) -> "CatalogSnapshot":
+        # Canonical JSON so every worker derives the same ETag from the same catalog
+        body = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str).encode()
+        return cls(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+    def matches(self, if_none_match: str | None) -> bool:
+        """RFC 9110 If-None-Match: `*` or any listed tag, compared weakly."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return self.etag in tags
+
+
+def _load_local_plans(plan_ids: list[str]) -> dict[str, dict]:
+    """Credit fields for many prices in one query (instead of one per price)."""
+    if not plan_ids:
+        return {}
+    return {
+        plan.plan_id: {
+            "id": plan.id,
+            "initial_credits": plan.initial_credits,
+            "monthly_credits": plan.monthly_credits,
+            "active": plan.active,
+        }
+        for plan in StripePlan.objects.filter(plan_id__in=plan_ids)
+    }
+
+
+async def build_catalog(stripe_client: StripeClient, load_local_plans=_load_local_plans) -> list[dict]:
+    products_page, prices_page = await asyncio.gather(
+        stripe_client.products.list_async(params={"active": True, "limit": 100}),
+        stripe_client.prices.list_async(params={"active": True, "limit": 100}),
+    )
+    products = [product.to_dict() async for product in products_page.auto_paging_iter()]
+    prices_by_product: dict[str, list[dict]] = {}
+    async for price in prices_page.auto_paging_iter():
+        prices_by_product.setdefault(price["product"], []).append(price.to_dict())
+
+    recurring_ids = [
+        price["id"]
+        for prices in prices_by_product.values()
+        for price in prices
+        if price.get("recurring")
+    ]
+    local_plans = await asyncio.to_thread(load_local_plans, recurring_ids)
+    return [
+        {
+            "product": product,
+            "prices": prices_by_product.get(product["id"], []),
+            "local_plans": [
+                local_plans[price["id"]]
+                for price in prices_by_product.get(product["id"], [])
+                if price["id"] in local_plans
+            ],
+        }
+        for product in sorted(products, key=lambda p: p["id"])
+    ]
+
+
+class Catalog:
+    """Serves the shared snapshot, building it on first use and on webhooks."""
+
+    def __init__(self, cache: TieredCache, builder=build_catalog):
+        self.cache = cache
+        self._builder = builder
+        self._flight = AsyncSingleFlight()
+        self._rebuild: asyncio.Task | None = None
+        self._dirty = False
+
+    async def get(self, stripe_client: StripeClient) -> CatalogSnapshot:
+        cached = await self.cache.aget(SNAPSHOT_KEY)
+        if cached is not None:
+            return CatalogSnapshot(body=cached["body"].encode(), etag=cached["etag"])
+        return await self._flight.do(SNAPSHOT_KEY, lambda: self.rebuild(stripe_client))
+
+    async def rebuild(self, stripe_client: StripeClient) -> CatalogSnapshot:
+        snapshot = CatalogSnapshot.from_data(await self._builder(stripe_client))
+        await self.cache.aset(SNAPSHOT_KEY, {"body": snapshot.body.decode(), "etag": snapshot.etag})
+        return snapshot
+
+    def schedule_rebuild(self, stripe_client: StripeClient) -> asyncio.Task:
+        """
+        Rebuild in the background. A burst of webhooks collapses into at most
+        one running rebuild plus one follow-up that sees the final state.
+        """
+        if self._rebuild is not None and not self._rebuild.done():
+            self._dirty = True
+            return self._rebuild
+
+        async def run():
+            while True:
+                self._dirty = False
+                try:
+                    await self.rebuild(stripe_client)
+                except Exception as e:
+                    logger.error(f"Catalog rebuild failed: {e}")
+                if not self._dirty:
+                    return
+
+        self._rebuild = asyncio.ensure_future(run())
+        return self._rebuild
+
+
+_catalog: Catalog | None = None
+
+
+def get_catalog() -> Catalog:
+    global _catalog
+    if _catalog is None:
+        pool = get_valkey_pool()
+        _catalog = Catalog(
+            TieredCache(
+                "stripe:catalog",
+                pool.client,
+                pool.async_client,
+                ttl=ValkeyConfig.VALKEY_STRIPE_CATALOG_TTL,
+                local_ttl=ValkeyConfig.VALKEY_STRIPE_CATALOG_LOCAL_TTL,
+                maxsize=1,
+            )
+        )
+    return _catalog
+
+
+@on_event("product.*", "price.*")
+async def _rebuild_catalog(event) -> None:
+    # No catalog in this process (not started by the lifespan or a request): nothing to refresh
+    if _catalog is None:
+        return
+    _catalog.schedule_rebuild(get_stripe_client())
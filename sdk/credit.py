@@ -6,7 +6,8 @@ from fastapi import Depends
 from pydantic import BaseModel
 from stripe import StripeClient
 
-from .client import get_stripe_client
+from ..client import get_stripe_client
+from .tiers import get_tier_matcher
 
 # Import your Stripe models (for type hints and validation)
 
@@ -61,41 +62,39 @@ async def map_plan_to_subscription_tier(
 ) -> PlanMappingResult:
     """
     Map Stripe plan name to subscription tier.
+    Exact names (configured or from product metadata) win, then the first
+    configured rule whose keyword appears in the name, then the default tier.
     """
     logger.info(f"Mapping plan {req.plan_name} to subscription tier")
     try:
-        mapping = {
-            "Free Plan": "free",
-            "Basic Plan": "basic",
-            "Premium Plan": "premium",
-            "Enterprise Plan": "enterprise",
-        }
-
-        # Try exact match first
-        if req.plan_name in mapping:
-            return PlanMappingResult(
-                plan_name=req.plan_name,
-                subscription_tier=mapping[req.plan_name],
-            )
-
-        # Try partial match
-        for key, value in mapping.items():
-            if key.lower().split()[0] in req.plan_name.lower():
-                return PlanMappingResult(
-                    plan_name=req.plan_name,
-                    subscription_tier=value,
-                )
-
-        # Default to basic
         return PlanMappingResult(
             plan_name=req.plan_name,
-            subscription_tier="basic",
+            subscription_tier=get_tier_matcher().match(req.plan_name),
         )
     except Exception as e:
         logger.error(f"Failed to map plan to subscription tier: {e}")
         raise
 
 
+class PlanMappingBatchRequest(BaseModel):
+    plan_names: list[str]
+
+
+async def map_plans_to_subscription_tiers(
+    req: PlanMappingBatchRequest,
+) -> list[PlanMappingResult]:
+    """
+    Map many plan names at once (migrations, reconciliation runs).
+    Each distinct name is matched once; results keep the request order.
+    """
+    logger.info(f"Mapping {len(req.plan_names)} plans to subscription tiers")
+    tiers = get_tier_matcher().match_many(req.plan_names)
+    return [
+        PlanMappingResult(plan_name=name, subscription_tier=tiers[name])
+        for name in req.plan_names
+    ]
+
+
 async def handle_subscription_change(
     req: Subscription.SubscriptionChangeRequest,
 ) -> Subscription.SubscriptionChangeResult:
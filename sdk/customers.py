@@ -0,0 +1,177 @@
+"""
+Cached Stripe customer resolution for checkout.
+Maps user id -> Stripe customer id through the two-tier cache, falling back
+to the database and finally to creating the customer in Stripe. Concurrent
+misses for one user share a single in-flight resolution, and the create call
+carries an idempotency key derived from the user id and the create params, so
+racing workers get the same Stripe customer instead of duplicates. Changed
+details get a new key, and so does the first create after the user's customer
+is deleted, so Stripe never replays the deleted customer. Users without a
+customer are remembered briefly in a negative cache, cleared when the
+customer is created here or its customer.created webhook arrives.
+"""
+
+import asyncio
+import logging
+from typing import Any
+
+from stripe import StripeClient
+
+from app.core.config import StripeSettings
+
+from ..cache import AsyncSingleFlight, NegativeCache, TieredCache
+from ..config import ValkeyConfig
+from ..valkey_pool import get_valkey_pool
+from .idempotency import fingerprint
+from .models import StripeCustomer
+from .webhooks import on_event
+
+logger = logging.getLogger(__name__)
+
+
+def idempotency_key(user_id: Any, params: dict, generation: str | None = None) -> str:
+    """Same user, params and generation (last deleted customer) -> same key."""
+    return f"customer-create-{user_id}-{fingerprint([params, generation])[:32]}"
+
+
+def _livemode() -> bool:
+    return not StripeSettings.STRIPE_SECRET_KEY.startswith("sk_test_")
+
+
+def _load_customer_id(user) -> str | None:
+    try:
+        return StripeCustomer.objects.get(user=user).customer_id
+    except StripeCustomer.DoesNotExist:
+        return None
+
+
+def _save_customer_id(user, customer_id: str) -> str:
+    """Persist the link; if another worker won the race, keep its row."""
+    customer, _created = StripeCustomer.objects.get_or_create(
+        user=user, defaults={"customer_id": customer_id, "livemode": _livemode()}
+    )
+    return customer.customer_id
+
+
+def _delete_customer_id(user_id: Any, customer_id: str) -> None:
+    """Drop the link, unless it already points at a newer customer."""
+    StripeCustomer.objects.filter(user_id=user_id, customer_id=customer_id).delete()
+
+
+class CustomerResolver:
+    """Resolves (and on first checkout creates) the Stripe customer for a user."""
+
+    def __init__(
+        self,
+        cache: TieredCache,
+        load=_load_customer_id,
+        save=_save_customer_id,
+        delete=_delete_customer_id,
+        negative: NegativeCache | None = None,
+    ):
+        self.cache = cache
+        self._load = load
+        self._save = save
+        self._delete = delete
+        # Local-only markers unless a shared tier is passed in (see get_customer_resolver)
+        self.negative = negative or NegativeCache(TieredCache(f"{cache.prefix}:missing", ttl=60, local_ttl=5))
+        self._flight = AsyncSingleFlight()
+
+    @staticmethod
+    def _key(user_id: Any) -> str:
+        # Test and live customers differ for the same user
+        return f"{'live' if _livemode() else 'test'}:user:{user_id}"
+
+    async def resolve(self, user, stripe_client: StripeClient) -> str:
+        key = self._key(user.id)
+        customer_id = await self.cache.aget(key)
+        if customer_id is not None:
+            return customer_id
+        return await self._flight.do(key, lambda: self._load_or_create(key, user, stripe_client))
+
+    async def lookup(self, user) -> str | None:
+        """Existing customer id for the user, without creating one."""
+        key = self._key(user.id)
+        customer_id = await self.cache.aget(key)
+        if customer_id is None and not await self.negative.is_missing(key):
+            customer_id = await self._flight.do(f"lookup:{key}", lambda: self._load_only(key, user))
+        return customer_id
+
+    async def _load_only(self, key: str, user) -> str | None:
+        customer_id = await asyncio.to_thread(self._load, user)
+        if customer_id is None:
+            await self.negative.mark_missing(key)
+        else:
+            await self.cache.aset(key, customer_id)
+        return customer_id
+
+    async def _load_or_create(self, key: str, user, stripe_client: StripeClient) -> str:
+        customer_id = await asyncio.to_thread(self._load, user)
+        if customer_id is None:
+            params = {
+                "email": user.email,
+                "name": getattr(user, "get_full_name", lambda: user.username)(),
+                "metadata": {"user_id": str(user.id)},
+            }
+            # Kept as long as Stripe keeps idempotency keys (the cache TTL, 24h by default)
+            generation = await self.cache.aget(f"{key}:deleted")
+            customer = await stripe_client.customers.create_async(
+                params=params,
+                options={"idempotency_key": idempotency_key(user.id, params, generation)},
+            )
+            customer_id = await asyncio.to_thread(self._save, user, customer.id)
+        await self.cache.aset(key, customer_id)
+        await self.negative.clear(key)
+        return customer_id
+
+    async def forget(self, user_id: Any, customer_id: str | None = None) -> None:
+        """Drop the cached link; with the deleted customer's id, also its DB row."""
+        key = self._key(user_id)
+        if customer_id is not None:
+            await asyncio.to_thread(self._delete, user_id, customer_id)
+            await self.cache.aset(f"{key}:deleted", customer_id)
+        await self.cache.adelete(key)
+
+
+_resolver: CustomerResolver | None = None
+
+
+def get_customer_resolver() -> CustomerResolver:
+    global _resolver
+    if _resolver is None:
+        pool = get_valkey_pool()
+        _resolver = CustomerResolver(
+            TieredCache(
+                "stripe:customer",
+                pool.client,
+                pool.async_client,
+                ttl=ValkeyConfig.VALKEY_STRIPE_CUSTOMER_CACHE_TTL,
+                local_ttl=ValkeyConfig.VALKEY_STRIPE_CUSTOMER_CACHE_LOCAL_TTL,
+                maxsize=ValkeyConfig.VALKEY_STRIPE_CUSTOMER_CACHE_MAXSIZE,
+            ),
+            negative=NegativeCache(
+                TieredCache(
+                    "stripe:customer:missing",
+                    pool.client,
+                    pool.async_client,
+                    ttl=ValkeyConfig.VALKEY_STRIPE_NEGATIVE_CACHE_TTL,
+                    local_ttl=ValkeyConfig.VALKEY_STRIPE_NEGATIVE_CACHE_LOCAL_TTL,
+                )
+            ),
+        )
+    return _resolver
+
+
+@on_event("customer.created")
+async def _clear_missing_customer(event) -> None:
+    user_id = (event.data.object.get("metadata") or {}).get("user_id")
+    if user_id:
+        resolver = get_customer_resolver()
+        await resolver.negative.clear(resolver._key(user_id))
+
+
+@on_event("customer.deleted")
+async def _forget_deleted_customer(event) -> None:
+    user_id = (event.data.object.get("metadata") or {}).get("user_id")
+    if user_id:
+        await get_customer_resolver().forget(user_id, event.data.object["id"])
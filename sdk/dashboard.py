@@ -0,0 +1,199 @@
+"""
+Customer dashboard data with a fixed Stripe fan-out and stale-while-revalidate.
+Each refresh makes exactly three Stripe calls, run concurrently under a
+per-worker semaphore:
+- subscriptions.list with `data.latest_invoice` expanded
+- payment_methods.list (cards)
+- customers.retrieve (default payment method, fetched once)
+Plan names come from the plan cache. Results are cached per customer: fresh
+entries are served as-is, stale ones are served immediately while one
+background refresh runs, and subscription/invoice/payment method webhooks
+drop the entry.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Mapping
+from typing import Any
+
+from stripe import StripeClient
+
+from ..cache import AsyncSingleFlight, TieredCache
+from ..config import ValkeyConfig
+from ..valkey_pool import get_valkey_pool
+from .plan_cache import get_plan_cache
+from .webhooks import on_event
+
+logger = logging.getLogger(__name__)
+
+
+def dashboard_url(kind: str, object_id: str, livemode: bool) -> str:
+    """Stripe dashboard link, as on the StripeCustomer/StripeSubscription models."""
+    return f"https://dashboard.stripe.com/{'' if livemode else 'test/'}{kind}/{object_id}"
+
+
+def _period(subscription: Mapping, field: str) -> Any:
+    # Newer API versions moved billing periods from the subscription to its items
+    value = subscription.get(field)
+    if value is None:
+        items = (subscription.get("items") or {}).get("data") or []
+        value = items[0].get(field) if items else None
+    return value
+
+
+def _invoice_summary(invoice: Mapping | None) -> dict | None:
+    if not invoice or isinstance(invoice, str):
+        return None
+    return {
+        "id": invoice["id"],
+        "amount_paid": invoice.get("amount_paid", 0) / 100,
+        "currency": (invoice.get("currency") or "").upper(),
+        "invoice_pdf": invoice.get("invoice_pdf"),
+        "status": invoice.get("status"),
+        "hosted_invoice_url": invoice.get("hosted_invoice_url"),
+    }
+
+
+async def _subscription_summary(subscription: Mapping) -> dict:
+    items = (subscription.get("items") or {}).get("data") or []
+    price = items[0]["price"] if items else {}
+    plan = await get_plan_cache().get_by_plan_id(price["id"]) if price else None
+    recurring = price.get("recurring") or {}
+    return {
+        "id": subscription["id"],
+        "status": subscription["status"],
+        "plan_name": plan.name if plan else (price.get("nickname") or "Unknown Plan"),
+        "amount": (price.get("unit_amount") or 0) / 100,
+        "currency": (price.get("currency") or "").upper(),
+        "interval": recurring.get("interval"),
+        "current_period_start": _period(subscription, "current_period_start"),
+        "current_period_end": _period(subscription, "current_period_end"),
+        "cancel_at_period_end": subscription.get("cancel_at_period_end", False),
+        "livemode": subscription.get("livemode", False),
+        "latest_invoice": _invoice_summary(subscription.get("latest_invoice")),
+    }
+
+
+class DashboardService:
+    """Per-customer dashboard payloads with bounded concurrent fetches."""
+
+    def __init__(
+        self,
+        cache: TieredCache,
+        fresh_ttl: float = ValkeyConfig.VALKEY_STRIPE_DASHBOARD_FRESH_TTL,
+        concurrency: int = ValkeyConfig.VALKEY_STRIPE_DASHBOARD_CONCURRENCY,
+        clock=time.time,
+    ):
+        self.cache = cache
+        self.fresh_ttl = fresh_ttl
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._flight = AsyncSingleFlight()
+        self._clock = clock
+        self._background: set[asyncio.Task] = set()
+
+    async def _call(self, coro):
+        async with self._semaphore:
+            return await coro
+
+    async def fetch(self, customer_id: str, stripe_client: StripeClient) -> dict:
+        """Build the payload with exactly three concurrent Stripe calls."""
+        subscriptions, payment_methods, customer = await asyncio.gather(
+            self._call(
+                stripe_client.subscriptions.list_async(
+                    params={
+                        "customer": customer_id,
+                        "status": "all",
+                        "limit": 100,
+                        "expand": ["data.latest_invoice"],
+                    }
+                )
+            ),
+            self._call(
+                stripe_client.payment_methods.list_async(
+                    params={"customer": customer_id, "type": "card", "limit": 100}
+                )
+            ),
+            self._call(stripe_client.customers.retrieve_async(customer_id)),
+        )
+        default_pm = (customer.get("invoice_settings") or {}).get("default_payment_method")
+        return {
+            "livemode": customer.get("livemode", False),
+            "subscriptions": [await _subscription_summary(sub) for sub in subscriptions.data],
+            "payment_methods": [
+                {
+                    "id": pm["id"],
+                    "brand": pm["card"]["brand"],
+                    "last4": pm["card"]["last4"],
+                    "exp_month": pm["card"]["exp_month"],
+                    "exp_year": pm["card"]["exp_year"],
+                    "is_default": pm["id"] == default_pm,
+                }
+                for pm in payment_methods.data
+            ],
+        }
+
+    async def _refresh(self, customer_id: str, stripe_client: StripeClient) -> dict:
+        data = await self.fetch(customer_id, stripe_client)
+        await self.cache.aset(customer_id, {"data": data, "fetched_at": self._clock()})
+        return data
+
+    def _refresh_once(self, customer_id: str, stripe_client: StripeClient):
+        return self._flight.do(customer_id, lambda: self._refresh(customer_id, stripe_client))
+
+    async def get(self, customer_id: str, stripe_client: StripeClient) -> dict:
+        entry = await self.cache.aget(customer_id)
+        if entry is None:
+            return await self._refresh_once(customer_id, stripe_client)
+        if self._clock() - entry["fetched_at"] > self.fresh_ttl:
+            task = asyncio.ensure_future(self._revalidate(customer_id, stripe_client))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        return entry["data"]
+
+    async def _revalidate(self, customer_id: str, stripe_client: StripeClient) -> None:
+        try:
+            await self._refresh_once(customer_id, stripe_client)
+        except Exception as e:
+            logger.warning(f"Dashboard refresh failed for {customer_id}: {e}")
+
+    async def invalidate(self, customer_id: str) -> None:
+        await self.cache.adelete(customer_id)
+
+
+_dashboard: DashboardService | None = None
+
+
+def get_dashboard_service() -> DashboardService:
+    global _dashboard
+    if _dashboard is None:
+        pool = get_valkey_pool()
+        _dashboard = DashboardService(
+            TieredCache(
+                "stripe:dashboard",
+                pool.client,
+                pool.async_client,
+                # Valkey keeps entries for the whole stale window; past it a read refetches
+                ttl=ValkeyConfig.VALKEY_STRIPE_DASHBOARD_STALE_TTL,
+                local_ttl=ValkeyConfig.VALKEY_STRIPE_DASHBOARD_FRESH_TTL,
+                maxsize=ValkeyConfig.VALKEY_STRIPE_CUSTOMER_CACHE_MAXSIZE,
+            )
+        )
+    return _dashboard
+
+
+@on_event(
+    "customer.updated",
+    "customer.subscription.*",
+    "invoice.*",
+    "payment_method.attached",
+    "payment_method.detached",
+    "payment_method.updated",
+)
+async def _invalidate_dashboard(event) -> None:
+    obj = event.data.object
+    customer_id = obj["id"] if event.type == "customer.updated" else obj.get("customer")
+    # payment_method.detached carries the previous customer
+    previous = (getattr(event.data, "previous_attributes", None) or {}).get("customer")
+    for cid in {customer_id, previous} - {None}:
+        await get_dashboard_service().invalidate(cid)
@@ -0,0 +1,154 @@
+"""
+Time-partitioned parallel export of large Stripe collections.
+Cursor pagination is inherently sequential, so the `created` range is cut into
+windows that are paged concurrently (each through the prefetching pagination
+engine), under a cap on windows in flight. Window sizes adapt to observed
+density: sparse history is covered by a few wide windows, busy periods by many
+narrow ones. Results are merged either in Stripe's order (newest first) or as
+they arrive.
+Memory is bounded by per-window queues: windows that run ahead of the
+consumer block once their queue is full. In ordered mode each queue holds a
+whole typical window (the planner's target), so later windows finish
+fetching while the head window is still being consumed.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from collections.abc import AsyncIterator
+from typing import Any
+
+from stripe import StripeClient
+
+from .pagination import PAGE_SIZE, RESOURCES, paginate
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+
+# Objects buffered per window in ordered mode: about one planned window
+WINDOW_BUFFER = 10 * PAGE_SIZE
+
+
+class WindowPlanner:
+    """
+    Walks [start, end) from newest to oldest, sizing each window so it holds
+    about `target` objects given the density observed so far.
+    """
+
+    def __init__(
+        self,
+        start: int,
+        end: int,
+        initial: int = DAY,
+        target: int = 1000,
+        min_window: int = 60,
+        max_window: int = 365 * DAY,
+    ):
+        self.start = start
+        self.cursor = end
+        self.size = initial
+        self.target = target
+        self.min_window = min_window
+        self.max_window = max_window
+        self._objects = 0
+        self._seconds = 0
+
+    def next(self) -> tuple[int, int] | None:
+        if self.cursor <= self.start:
+            return None
+        window = (max(self.start, self.cursor - self.size), self.cursor)
+        self.cursor = window[0]
+        return window
+
+    def observe(self, window: tuple[int, int], count: int) -> None:
+        self._objects += count
+        self._seconds += window[1] - window[0]
+        if self._objects:
+            size = self.target * self._seconds / self._objects
+        else:
+            # Nothing seen yet: widen quickly across empty history
+            size = self.size * 4
+        self.size = int(min(self.max_window, max(self.min_window, size)))
+
+
+class _WindowEnd:
+    def __init__(self, error: BaseException | None = None):
+        self.error = error
+
+
+async def export_stripe(
+    stripe: StripeClient,
+    resource: str,
+    start: int,
+    end: int,
+    *,
+    ordered: bool = True,
+    concurrency: int = 8,
+    planner: WindowPlanner | None = None,
+    **filters: Any,
+) -> AsyncIterator[Any]:
+    """
+    Yield every `resource` object (e.g. "charges", "invoices",
+    "balance_transactions", "events") created in [start, end).
+    `ordered=True` preserves Stripe's newest-first order; `ordered=False`
+    yields objects as soon as any window produces them. The `created` filter
+    belongs to the windows, so it cannot be passed in `filters`: narrow
+    [start, end) instead.
+    """
+    if resource not in RESOURCES:
+        raise ValueError(f"Unknown Stripe resource for export: {resource}")
+    if "created" in filters:
+        raise ValueError("export_stripe sets `created` per window; pass the range as start and end")
+    planner = planner or WindowPlanner(start, end)
+    shared: asyncio.Queue = asyncio.Queue(maxsize=PAGE_SIZE * concurrency)
+    # Ordered mode: one bounded queue per window in flight, oldest launch first
+    windows: deque[asyncio.Queue] = deque()
+    tasks: set[asyncio.Task] = set()
+    in_flight = 0
+
+    async def run_window(window: tuple[int, int], queue: asyncio.Queue) -> None:
+        count = 0
+        try:
+            async for item in paginate(stripe, resource, created={"gte": window[0], "lt": window[1]}, **filters):
+                await queue.put(item)
+                count += 1
+        except Exception as e:
+            await queue.put(_WindowEnd(e))
+            return
+        planner.observe(window, count)
+        logger.debug(f"Exported {count} {resource} for window {window}")
+        await queue.put(_WindowEnd())
+
+    def launch() -> bool:
+        nonlocal in_flight
+        window = planner.next()
+        if window is None:
+            return False
+        queue = shared
+        if ordered:
+            queue = asyncio.Queue(maxsize=max(WINDOW_BUFFER, planner.target))
+            windows.append(queue)
+        task = asyncio.ensure_future(run_window(window, queue))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        in_flight += 1
+        return True
+
+    try:
+        while in_flight < concurrency and launch():
+            pass
+        while in_flight:
+            item = await (windows[0] if ordered else shared).get()
+            if not isinstance(item, _WindowEnd):
+                yield item
+                continue
+            if item.error is not None:
+                raise item.error
+            in_flight -= 1
+            if ordered:
+                windows.popleft()
+            launch()
+    finally:
+        for task in list(tasks):
+            task.cancel()
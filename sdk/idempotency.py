@@ -0,0 +1,195 @@
+"""
+Idempotent responses for Stripe-creating endpoints.
+Clients send an `Idempotency-Key` header; the first request under a key runs
+and its response is stored in Valkey, later ones get the stored response back
+without touching Stripe. Duplicates that arrive while the first is still
+running wait for it: in-process through a shared task, across workers by
+polling a pending marker taken with SET NX. The same key (scoped) is sent to
+Stripe, so even a request that outlives its marker cannot create twice.
+A key reused with a different payload is rejected. Valkey errors fail open
+to Stripe's own idempotency.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import stripe
+import valkey
+from prometheus_client import Counter
+
+from ..api._exceptions import StripeIdempotencyConflict, StripeIdempotencyInProgress
+from ..cache import AsyncSingleFlight
+from ..config import ValkeyConfig
+from ..valkey_pool import get_valkey_pool
+
+logger = logging.getLogger(__name__)
+
+stripe_IDEMPOTENT_REPLAYS = Counter(
+    "stripe_idempotent_replays",
+    "Requests answered from a stored idempotent response",
+    ["scope", "source"],
+)
+
+# Client keys we accept, and the longest key Stripe itself accepts
+MAX_KEY_LENGTH = 200
+STRIPE_MAX_KEY_LENGTH = 255
+
+PENDING = "pending"
+DONE = "done"
+
+
+def fingerprint(payload: Any) -> str:
+    """Stable digest of the request payload, so key reuse with other params is caught."""
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def stripe_idempotency_key(scope: str, key: str) -> str:
+    """
+    Key forwarded to Stripe: scoped so two callers choosing the same key never collide.
+    A scope (which carries the owner) can push it past Stripe's limit; such keys
+    are sent as a digest of the scoped key instead.
+    """
+    scoped = f"{scope}:{key}"
+    if len(scoped) <= STRIPE_MAX_KEY_LENGTH:
+        return scoped
+    return hashlib.sha256(scoped.encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """Pending markers and stored responses under `prefix:{scope}:{key}`."""
+
+    def __init__(
+        self,
+        client=None,
+        prefix: str = "stripe:idem",
+        ttl: int = ValkeyConfig.VALKEY_STRIPE_IDEMPOTENCY_TTL,
+        lock_ttl: int = ValkeyConfig.VALKEY_STRIPE_IDEMPOTENCY_LOCK_TTL,
+        wait: float = ValkeyConfig.VALKEY_STRIPE_IDEMPOTENCY_WAIT,
+        poll_interval: float = 0.05,
+    ):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.wait = wait
+        self.poll_interval = poll_interval
+        self._flight = AsyncSingleFlight()
+
+    def _key(self, scope: str, key: str) -> str:
+        return f"{self.prefix}:{scope}:{key}"
+
+    async def run(
+        self,
+        scope: str,
+        key: str,
+        payload_fingerprint: str,
+        fn: Callable[[], Awaitable[dict]],
+    ) -> tuple[dict, bool]:
+        """
+        Return `(record, replayed)`, the response being `record["response"]`.
+        `fn` runs at most once per key while the stored response lives; it must
+        return a JSON-serializable dict.
+        """
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise stripe.InvalidRequestError(
+                f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters", param="Idempotency-Key"
+            )
+        leader = []
+
+        async def first():
+            leader.append(True)
+            return await self._run(scope, key, payload_fingerprint, fn)
+
+        response, replayed = await self._flight.do(self._key(scope, key), first)
+        if not leader:
+            # Joined another in-process request for the same key
+            if response["fingerprint"] != payload_fingerprint:
+                raise StripeIdempotencyConflict("Idempotency-Key reused with a different payload")
+            stripe_IDEMPOTENT_REPLAYS.labels(scope=scope, source="inflight").inc()
+            replayed = True
+        return response, replayed
+
+    async def _run(self, scope, key, payload_fingerprint, fn) -> tuple[dict, bool]:
+        if self.client is None:
+            return self._record(payload_fingerprint, await fn()), False
+        name = self._key(scope, key)
+        deadline = time.monotonic() + self.wait
+        try:
+            while True:
+                stored = await self.client.get(name)
+                if stored is not None:
+                    record = json.loads(stored)
+                    if record["fingerprint"] != payload_fingerprint:
+                        raise StripeIdempotencyConflict("Idempotency-Key reused with a different payload")
+                    if record["state"] == DONE:
+                        stripe_IDEMPOTENT_REPLAYS.labels(scope=scope, source="stored").inc()
+                        return record, True
+                    if time.monotonic() >= deadline:
+                        raise StripeIdempotencyInProgress("A request with this Idempotency-Key is still running")
+                    # Another worker is running it
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                pending = json.dumps({"state": PENDING, "fingerprint": payload_fingerprint})
+                if await self.client.set(name, pending, nx=True, ex=self.lock_ttl):
+                    break
+        except valkey.ValkeyError as e:
+            logger.warning(f"Idempotency store unavailable, relying on Stripe keys: {e}")
+            return self._record(payload_fingerprint, await fn()), False
+
+        try:
+            response = await fn()
+        except BaseException:
+            # Let a retry run again; Stripe's key still prevents a second object
+            await self._release(name)
+            raise
+        record = self._record(payload_fingerprint, response)
+        try:
+            await self.client.set(name, json.dumps(record, default=str), ex=self.ttl)
+        except valkey.ValkeyError as e:
+            logger.warning(f"Failed to store idempotent response for {scope}: {e}")
+        return record, False
+
+    @staticmethod
+    def _record(payload_fingerprint: str, response: dict) -> dict:
+        return {"state": DONE, "fingerprint": payload_fingerprint, "response": response}
+
+    async def _release(self, name: str) -> None:
+        try:
+            await self.client.delete(name)
+        except valkey.ValkeyError as e:
+            logger.warning(f"Failed to release idempotency marker {name}: {e}")
+
+
+_store: IdempotencyStore | None = None
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    global _store
+    if _store is None:
+        _store = IdempotencyStore(get_valkey_pool().async_client)
+    return _store
+
+
+async def idempotent(
+    scope: str,
+    key: str | None,
+    payload: Any,
+    fn: Callable[[str | None], Awaitable[dict]],
+) -> tuple[dict, bool]:
+    """
+    Run `fn(stripe_key)` once per client key and return `(response, replayed)`.
+    Without a key the call runs as usual and `fn` gets None.
+    """
+    if key is None:
+        return await fn(None), False
+    stripe_key = stripe_idempotency_key(scope, key)
+    record, replayed = await get_idempotency_store().run(
+        scope, key, fingerprint(payload), lambda: fn(stripe_key)
+    )
+    return record["response"], replayed
@@ -4,13 +4,15 @@ Implements production best practices: type safety, async, DRY, SOLID, and OpenAP
 See _docs/best_practices/stripe_async_capture.md for rationale and webhook caveats.
 """
 
-from typing import Literal
+from typing import Any, Literal
 
 import stripe
 from fastapi import HTTPException
 from pydantic import BaseModel, ConfigDict, field_validator
 
+from ..api._exceptions import StripeIdempotencyConflict, StripeIdempotencyInProgress
 from ..client import get_stripe_client
+from .idempotency import idempotent
 
 
 # --- Pydantic models ---
@@ -46,30 +48,54 @@ class PaymentIntentCreateResponse(BaseModel):
 async def create_payment_intent(
     payload: PaymentIntentCreateRequest,
     stripe_settings=None,  # Optionally inject settings for testing/multi-account
+    idempotency_key: str | None = None,
+    *,
+    owner: Any = None,
 ) -> PaymentIntentCreateResponse:
     """
     Create a Stripe PaymentIntent with asynchronous capture enabled.
     See Stripe docs for async capture webhook/response caveats:
     - balance_transaction, transfer, application_fee may be null initially
     - Downstream logic must handle delayed settlement
+    With an `idempotency_key` (the client's Idempotency-Key header), retries
+    return the first response instead of creating another PaymentIntent.
+    Such a key requires `owner` (the caller's user id or Stripe customer id),
+    which scopes it, so one caller's key never replays another's PaymentIntent
+    and client_secret.
     """
+    if idempotency_key is not None and owner in (None, ""):
+        raise ValueError("create_payment_intent needs an owner to scope idempotency keys")
     try:
         stripe_client = get_stripe_client(stripe_settings)
-        pi = stripe_client.PaymentIntent.create(
-            amount=payload.amount,
-            currency=payload.currency,
-            payment_method_types=payload.payment_method_types,
-            payment_method=payload.payment_method,
-            confirm=payload.confirm,
-            capture_method=payload.capture_method,
-        )
-        return PaymentIntentCreateResponse(
-            id=pi["id"],
-            status=pi["status"],
-            capture_method=pi["capture_method"],
-            client_secret=pi.get("client_secret"),
-            latest_charge=pi.get("latest_charge"),
+
+        async def create(stripe_key: str | None) -> dict:
+            pi = await stripe_client.payment_intents.create_async(
+                params={
+                    "amount": payload.amount,
+                    "currency": payload.currency,
+                    "payment_method_types": payload.payment_method_types,
+                    "payment_method": payload.payment_method,
+                    "confirm": payload.confirm,
+                    "capture_method": payload.capture_method,
+                },
+                options={"idempotency_key": stripe_key} if stripe_key else None,
+            )
+            return PaymentIntentCreateResponse(
+                id=pi["id"],
+                status=pi["status"],
+                capture_method=pi["capture_method"],
+                client_secret=pi.get("client_secret"),
+                latest_charge=pi.get("latest_charge"),
+            ).model_dump()
+
+        response, _ = await idempotent(
+            f"payment_intent:{owner}", idempotency_key, payload.model_dump(), create
         )
+        return PaymentIntentCreateResponse(**response)
+    except StripeIdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except StripeIdempotencyInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except stripe.error.StripeError as e:
         # ! Secure logging only, do not expose internals
         raise HTTPException(status_code=400, detail=f"Stripe error: {str(e)}")
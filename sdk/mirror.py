@@ -0,0 +1,316 @@
+"""
+Incremental local mirror of Stripe objects for admin and reporting reads.
+Objects live in one SQLite table keyed by (resource, id) with their JSON,
+`created` and a version timestamp; reads by id or by created range never
+touch Stripe.
+- sync(resource) pages only objects at or after the resource's high-water
+  mark (newest first) and upserts them in bulk. Progress (the pending mark and
+  the last id written) is persisted with every batch, so an interrupted pass
+  resumes with `starting_after` instead of starting over.
+- Updates and deletions arrive as events, either from the webhook dispatcher
+  or from sync_events() over the events API. A write only lands if it is not
+  older than the stored version, so replays and out-of-order events are safe.
+  sync_events() walks the delta in fixed `created` windows, oldest first,
+  applies each window oldest event first (so of several events in the same
+  second the last one Stripe recorded wins) and advances its cursor per
+  window: memory stays at one window and an interrupted run resumes there.
+- The staff admin routes serve mirrored objects under /admin/mirror/
+  (see admin_views.py).
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections.abc import Iterable, Mapping
+from threading import Lock
+from typing import Any
+
+from stripe import StripeClient
+
+from ..config import ValkeyConfig
+from . import admin
+from .webhooks import on_event
+
+logger = logging.getLogger(__name__)
+
+# Stripe `object` type -> mirrored resource (the pagination resource name)
+RESOURCES = {
+    "customer": "customers",
+    "subscription": "subscriptions",
+    "plan": "plans",
+    "invoice": "invoices",
+    "charge": "charges",
+    "product": "products",
+    "payment_intent": "payment_intents",
+    "refund": "refunds",
+    "balance_transaction": "balance_transactions",
+    "payout": "payouts",
+    "dispute": "disputes",
+}
+
+# Cursor name for the events delta feed
+EVENTS = "events"
+
+# Seconds of events fetched and applied per step of sync_events()
+EVENTS_WINDOW = 3600
+
+# How far back Stripe keeps events (the first delta run starts there)
+EVENTS_RETENTION = 30 * 86400
+
+# `*.deleted` events whose object still exists in Stripe (a canceled subscription)
+NOT_DELETIONS = {"customer.subscription.deleted"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stripe_objects (
+    resource TEXT NOT NULL,
+    id TEXT NOT NULL,
+    created INTEGER,
+    livemode INTEGER NOT NULL DEFAULT 0,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (resource, id)
+);
+CREATE INDEX IF NOT EXISTS stripe_objects_created ON stripe_objects (resource, created DESC, id DESC);
+CREATE TABLE IF NOT EXISTS stripe_sync_cursors (
+    resource TEXT PRIMARY KEY,
+    high_water INTEGER,
+    pending_high_water INTEGER,
+    resume_after TEXT
+);
+"""
+
+UPSERT = """
+INSERT INTO stripe_objects (resource, id, created, livemode, deleted, version, data)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (resource, id) DO UPDATE SET
+    created = excluded.created,
+    livemode = excluded.livemode,
+    deleted = excluded.deleted,
+    version = excluded.version,
+    data = excluded.data
+WHERE excluded.version >= stripe_objects.version
+"""
+
+
+def _as_dict(obj: Any) -> dict:
+    return obj.to_dict() if hasattr(obj, "to_dict") else dict(obj)
+
+
+class MirrorStore:
+    """SQLite storage for mirrored objects and sync cursors (thread-safe)."""
+
+    def __init__(self, path: str = ValkeyConfig.STRIPE_MIRROR_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = Lock()
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def upsert_many(
+        self,
+        resource: str,
+        objects: Iterable[Mapping],
+        version: int,
+        deleted: bool = False,
+        cursor: Mapping[str, Any] | None = None,
+    ) -> int:
+        """Write objects (and optionally the resource's cursor) in one transaction."""
+        rows = [
+            (
+                resource,
+                obj["id"],
+                obj.get("created"),
+                int(bool(obj.get("livemode", False))),
+                int(deleted or bool(obj.get("deleted", False))),
+                version,
+                json.dumps(obj, default=str),
+            )
+            for obj in map(_as_dict, objects)
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(UPSERT, rows)
+            if cursor is not None:
+                self._write_cursor(resource, cursor)
+        return len(rows)
+
+    def _write_cursor(self, resource: str, cursor: Mapping[str, Any]) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO stripe_sync_cursors VALUES (?, ?, ?, ?)",
+            (resource, cursor.get("high_water"), cursor.get("pending_high_water"), cursor.get("resume_after")),
+        )
+
+    def cursor(self, resource: str) -> dict[str, Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT high_water, pending_high_water, resume_after FROM stripe_sync_cursors WHERE resource = ?",
+                (resource,),
+            ).fetchone()
+        return dict(row) if row else {"high_water": None, "pending_high_water": None, "resume_after": None}
+
+    def set_cursor(self, resource: str, cursor: Mapping[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._write_cursor(resource, cursor)
+
+    def get(self, resource: str, object_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM stripe_objects WHERE resource = ? AND id = ? AND deleted = 0",
+                (resource, object_id),
+            ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def list(
+        self,
+        resource: str,
+        created: Mapping[str, int] | None = None,
+        limit: int = 100,
+        starting_after: str | None = None,
+    ) -> list[dict]:
+        """Newest-first page, filtered like Stripe's list endpoints."""
+        clauses, args = ["resource = ?", "deleted = 0"], [resource]
+        for op, sql in (("gt", ">"), ("gte", ">="), ("lt", "<"), ("lte", "<=")):
+            if created and op in created:
+                clauses.append(f"created {sql} ?")
+                args.append(created[op])
+        with self._lock:
+            if starting_after:
+                anchor = self._conn.execute(
+                    "SELECT created FROM stripe_objects WHERE resource = ? AND id = ?",
+                    (resource, starting_after),
+                ).fetchone()
+                if anchor is not None:
+                    clauses.append("(created < ? OR (created = ? AND id < ?))")
+                    args += [anchor["created"], anchor["created"], starting_after]
+            rows = self._conn.execute(
+                f"SELECT data FROM stripe_objects WHERE {' AND '.join(clauses)} "
+                "ORDER BY created DESC, id DESC LIMIT ?",
+                (*args, limit),
+            ).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def count(self, resource: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM stripe_objects WHERE resource = ? AND deleted = 0", (resource,)
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class StripeMirror:
+    """Keeps a MirrorStore current from Stripe listings and events."""
+
+    def __init__(
+        self,
+        store: MirrorStore,
+        batch_size: int = admin.PAGE_SIZE,
+        clock=time.time,
+        events_window: int = EVENTS_WINDOW,
+    ):
+        self.store = store
+        self.batch_size = batch_size
+        self.events_window = events_window
+        self._clock = clock
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def _lock(self, resource: str) -> asyncio.Lock:
+        return self._locks.setdefault(resource, asyncio.Lock())
+
+    async def sync(self, resource: str, stripe_client: StripeClient) -> int:
+        """Fetch objects created since the high-water mark; returns how many were written."""
+        if resource not in RESOURCES.values():
+            raise ValueError(f"Unknown Stripe resource for mirroring: {resource}")
+        async with self._lock(resource):
+            cursor = await asyncio.to_thread(self.store.cursor, resource)
+            filters = {}
+            if cursor["resume_after"]:
+                filters["starting_after"] = cursor["resume_after"]
+            created = {"gte": cursor["high_water"]} if cursor["high_water"] is not None else None
+            version = int(self._clock())
+            written, batch = 0, []
+            async for obj in admin.stream_stripe(stripe_client, resource, created=created, **filters):
+                if cursor["pending_high_water"] is None:
+                    # Newest first: the first object of a pass is the next high-water mark
+                    cursor["pending_high_water"] = obj["created"]
+                batch.append(obj)
+                if len(batch) >= self.batch_size:
+                    written += await self._flush(resource, batch, version, cursor)
+                    batch = []
+            written += await self._flush(resource, batch, version, cursor)
+            done = {
+                "high_water": cursor["pending_high_water"] or cursor["high_water"],
+                "pending_high_water": None,
+                "resume_after": None,
+            }
+            await asyncio.to_thread(self.store.set_cursor, resource, done)
+        logger.info(f"Mirror synced {written} {resource}")
+        return written
+
+    async def _flush(self, resource: str, batch: list, version: int, cursor: dict) -> int:
+        if not batch:
+            return 0
+        cursor["resume_after"] = batch[-1]["id"]
+        return await asyncio.to_thread(self.store.upsert_many, resource, batch, version, False, dict(cursor))
+
+    async def apply_event(self, event: Any) -> bool:
+        """Upsert (or mark deleted) the event's object if its type is mirrored."""
+        obj = event.data.object
+        resource = RESOURCES.get(obj.get("object"))
+        if resource is None:
+            return False
+        deleted = event.type.endswith(".deleted") and event.type not in NOT_DELETIONS
+        await asyncio.to_thread(self.store.upsert_many, resource, [obj], event.created, deleted)
+        return True
+
+    async def sync_events(self, stripe_client: StripeClient) -> int:
+        """Apply events created since the last delta run (Stripe keeps 30 days of events)."""
+        async with self._lock(EVENTS):
+            cursor = await asyncio.to_thread(self.store.cursor, EVENTS)
+            end = int(self._clock())
+            start = cursor["high_water"]
+            if start is None:
+                start = max(0, end - EVENTS_RETENTION)
+            applied = 0
+            for lo in range(start, end, self.events_window):
+                hi = min(lo + self.events_window, end)
+                window = admin.stream_stripe(stripe_client, EVENTS, created={"gte": lo, "lt": hi})
+                # Stripe lists newest first (also within a second): apply the window in reverse
+                events = [event async for event in window]
+                for event in reversed(events):
+                    applied += await self.apply_event(event)
+                await asyncio.to_thread(
+                    self.store.set_cursor, EVENTS, {"high_water": hi, "pending_high_water": None, "resume_after": None}
+                )
+        return applied
+
+    async def sync_all(self, stripe_client: StripeClient) -> dict[str, int]:
+        """New objects for every resource, then the events delta for updates."""
+        counts = {resource: await self.sync(resource, stripe_client) for resource in RESOURCES.values()}
+        counts[EVENTS] = await self.sync_events(stripe_client)
+        return counts
+
+
+_mirror: StripeMirror | None = None
+
+
+def get_mirror() -> StripeMirror:
+    global _mirror
+    if _mirror is None:
+        _mirror = StripeMirror(MirrorStore())
+    return _mirror
+
+
+async def _mirror_event(event) -> None:
+    await get_mirror().apply_event(event)
+
+
+# Registered only when enabled, so unrelated events are still reported as ignored
+if ValkeyConfig.STRIPE_MIRROR_ENABLED:
+    on_event("*")(_mirror_event)
@@ -1,3 +1,5 @@
+from enum import Enum
+
 from pydantic import BaseModel, Field
 
 
@@ -20,6 +22,7 @@ class StripeCustomer(BaseModel):
 class StripePlan(BaseModel):
     """Store plan information from Stripe"""
 
+    id: int | None = None  # Local primary key
     plan_id: str
     name: str
     amount: int  # in cents
@@ -37,7 +40,7 @@ class StripePlan(BaseModel):
 class StripeSubscription(BaseModel):
     """Store subscription information"""
 
-    class StatusEnum(str):
+    class StatusEnum(str, Enum):
         ACTIVE = "active"
         PAST_DUE = "past_due"
         UNPAID = "unpaid"
@@ -0,0 +1,171 @@
+"""
+Pipelined pagination over Stripe list endpoints, keyed by resource name.
+Pages are requested at Stripe's maximum size, and the next page is requested
+as soon as the current one arrives, so Stripe latency overlaps with the
+caller's processing while only one page (plus the one in flight) is held in
+memory. Stopping early (break, close, cancellation) drops the prefetched
+page. Every page records its latency and object count.
+All calls run in the batch rate-limit lane so checkout traffic preempts them.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections.abc import AsyncIterator, Iterator, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from prometheus_client import Counter, Histogram
+from stripe import StripeClient
+
+from ..rate_limit import BATCH, stripe_lane
+
+logger = logging.getLogger(__name__)
+
+# Stripe's maximum page size
+PAGE_SIZE = 100
+
+# `created` filter: a Unix timestamp or a range such as {"gte": start, "lt": end}
+Created = int | Mapping[str, int]
+
+stripe_PAGE_LATENCY = Histogram(
+    "stripe_page_latency_seconds",
+    "Time to fetch one page from a Stripe list endpoint",
+    ["resource"],
+)
+stripe_PAGE_OBJECTS = Counter(
+    "stripe_page_objects",
+    "Objects received from Stripe list endpoints",
+    ["resource"],
+)
+
+# resource name -> StripeClient service attribute
+RESOURCES: dict[str, str] = {}
+
+# Background fetches for the sync engine (the async engine uses the event loop)
+_prefetch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="stripe-prefetch")
+
+
+def register(resource: str, service: str | None = None) -> None:
+    """Make `resource` paginable; `service` defaults to the same attribute name."""
+    RESOURCES[resource] = service or resource
+
+
+for _resource in (
+    "customers",
+    "subscriptions",
+    "plans",
+    "invoices",
+    "charges",
+    "products",
+    "payment_intents",
+    "refunds",
+    "balance_transactions",
+    "payouts",
+    "disputes",
+    "events",
+):
+    register(_resource)
+
+
+def _service(stripe: StripeClient, resource: str) -> Any:
+    if resource not in RESOURCES:
+        raise ValueError(f"Unknown Stripe resource for pagination: {resource}")
+    return getattr(stripe, RESOURCES[resource])
+
+
+def list_params(
+    created: Created | None, filters: Mapping[str, Any], page_size: int = PAGE_SIZE
+) -> dict[str, Any]:
+    params = {"limit": page_size, **filters}
+    if created is not None:
+        params["created"] = created
+    return params
+
+
+def _observe(resource: str, started: float, page: Any) -> Any:
+    stripe_PAGE_LATENCY.labels(resource=resource).observe(time.perf_counter() - started)
+    stripe_PAGE_OBJECTS.labels(resource=resource).inc(len(page.data))
+    return page
+
+
+def _next_params(params: dict[str, Any], page: Any) -> dict[str, Any] | None:
+    if not (page.has_more and page.data):
+        return None
+    return {**params, "starting_after": page.data[-1]["id"]}
+
+
+async def paginate(
+    stripe: StripeClient,
+    resource: str,
+    created: Created | None = None,
+    *,
+    page_size: int = PAGE_SIZE,
+    **filters: Any,
+) -> AsyncIterator[Any]:
+    """Yield every `resource` object, newest first, with the next page prefetched."""
+    service = _service(stripe, resource)
+    params = list_params(created, filters, page_size)
+
+    async def fetch(page_params: dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        return _observe(resource, started, await service.list_async(params=page_params))
+
+    def start(page_params: dict[str, Any]) -> asyncio.Future:
+        # The task copies the current context, so its Stripe call runs in the batch lane
+        with stripe_lane(BATCH):
+            return asyncio.ensure_future(fetch(page_params))
+
+    pending = start(params)
+    try:
+        while pending is not None:
+            page = await pending
+            next_params = _next_params(params, page)
+            pending = start(next_params) if next_params else None
+            for item in page.data:
+                yield item
+    except Exception as e:
+        logger.error(f"Error listing Stripe {resource.replace('_', ' ')}: {e}")
+        raise RuntimeError("Stripe API error") from e
+    finally:
+        # Consumer stopped early (break, cancellation): drop the prefetched page
+        if pending is not None:
+            pending.cancel()
+
+
+def paginate_sync(
+    stripe: StripeClient,
+    resource: str,
+    created: Created | None = None,
+    *,
+    page_size: int = PAGE_SIZE,
+    **filters: Any,
+) -> Iterator[Any]:
+    """Sync counterpart of paginate(): the next page is fetched on a worker thread."""
+    service = _service(stripe, resource)
+    params = list_params(created, filters, page_size)
+
+    def fetch(page_params: dict[str, Any]) -> Any:
+        started = time.perf_counter()
+        return _observe(resource, started, service.list(params=page_params))
+
+    def start(page_params: dict[str, Any]) -> Future:
+        with stripe_lane(BATCH):
+            context = contextvars.copy_context()
+        return _prefetch_pool.submit(context.run, fetch, page_params)
+
+    pending = start(params)
+    try:
+        while pending is not None:
+            page = pending.result()
+            next_params = _next_params(params, page)
+            pending = start(next_params) if next_params else None
+            yield from page.data
+    except Exception as e:
+        logger.error(f"Error listing Stripe {resource.replace('_', ' ')}: {e}")
+        raise RuntimeError("Stripe API error") from e
+    finally:
+        # A request already on the wire finishes in the background and is discarded
+        if pending is not None:
+            pending.cancel()
@@ -0,0 +1,244 @@
+"""
+Columnar Parquet export of balance transactions and invoices for finance.
+Objects are streamed from the time-partitioned export (export.py) straight
+into Arrow record batches with a fixed schema, then appended to one Parquet
+file per calendar month of `created`:
+
+    <root>/<resource>/created_month=YYYY-MM/part-0.parquet
+
+The requested range is widened to whole months, so every file always holds
+its complete month and a re-run replaces it rather than truncating it to the
+new range; a month with no rows gets an empty file, replacing any stale one.
+Exports are never filtered, since a filtered subset would replace the full
+month under the same path. Files are written under a hidden temporary name and renamed into
+place only once the export succeeds; a failed run leaves the previous files.
+Only one batch of rows per open month is held in memory; each full batch is
+written as a row group and dropped. Amounts are int64 in the currency's
+minor unit, timestamps are timestamp[s] (UTC), and low-cardinality strings
+(currency, status, type...) are dictionary-encoded. Parquet has no seconds
+unit, so timestamps are stored as milliseconds; pass `schema=schema(resource)`
+when reading to get timestamp[s] back.
+pyarrow is an optional dependency, needed only by this module.
+"""
+
+import asyncio
+import logging
+import os
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import Any
+
+from stripe import StripeClient
+
+from .export import export_stripe
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # finance exports only
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+# Rows buffered per month before they are written out as a row group
+BATCH_ROWS = 10_000
+
+# Column kinds -> Arrow types (resolved lazily, pyarrow may be missing)
+_TYPES: dict[str, Callable[[], Any]] = {
+    "id": lambda: pa.string(),
+    "string": lambda: pa.string(),
+    "category": lambda: pa.dictionary(pa.int32(), pa.string()),
+    "amount": lambda: pa.int64(),
+    "timestamp": lambda: pa.timestamp("s"),
+    "float": lambda: pa.float64(),
+    "bool": lambda: pa.bool_(),
+}
+
+# resource -> [(column, kind, dotted path in the Stripe object)]
+COLUMNS: dict[str, list[tuple[str, str, str]]] = {
+    "balance_transactions": [
+        ("id", "string", "id"),
+        ("created", "timestamp", "created"),
+        ("available_on", "timestamp", "available_on"),
+        ("type", "category", "type"),
+        ("reporting_category", "category", "reporting_category"),
+        ("status", "category", "status"),
+        ("currency", "category", "currency"),
+        ("amount", "amount", "amount"),
+        ("fee", "amount", "fee"),
+        ("net", "amount", "net"),
+        ("exchange_rate", "float", "exchange_rate"),
+        ("source", "id", "source"),
+        ("description", "string", "description"),
+    ],
+    "invoices": [
+        ("id", "string", "id"),
+        ("number", "string", "number"),
+        ("customer", "id", "customer"),
+        ("subscription", "id", "parent.subscription_details.subscription"),
+        ("created", "timestamp", "created"),
+        ("period_start", "timestamp", "period_start"),
+        ("period_end", "timestamp", "period_end"),
+        ("due_date", "timestamp", "due_date"),
+        ("paid_at", "timestamp", "status_transitions.paid_at"),
+        ("status", "category", "status"),
+        ("billing_reason", "category", "billing_reason"),
+        ("collection_method", "category", "collection_method"),
+        ("currency", "category", "currency"),
+        ("subtotal", "amount", "subtotal"),
+        ("total", "amount", "total"),
+        ("amount_due", "amount", "amount_due"),
+        ("amount_paid", "amount", "amount_paid"),
+        ("amount_remaining", "amount", "amount_remaining"),
+        ("livemode", "bool", "livemode"),
+    ],
+}
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("pyarrow is required for Parquet exports (pip install pyarrow)")
+
+
+def schema(resource: str) -> "pa.Schema":
+    """Fixed Arrow schema for an exportable resource."""
+    _require_pyarrow()
+    if resource not in COLUMNS:
+        raise ValueError(f"Unknown Stripe resource for Parquet export: {resource}")
+    return pa.schema([pa.field(name, _TYPES[kind]()) for name, kind, _ in COLUMNS[resource]])
+
+
+def _extract(obj: Any, path: str, kind: str) -> Any:
+    value = obj
+    for key in path.split("."):
+        if value is None:
+            return None
+        value = value.get(key)
+    if kind == "id" and value is not None and not isinstance(value, str):
+        # Expanded object: keep its id
+        value = value.get("id")
+    return value
+
+
+class _MonthBuffer:
+    """Column-wise row buffer and the open Parquet writer for one month."""
+
+    def __init__(self, path: str, schema: "pa.Schema"):
+        self.path = path
+        # Hidden, so dataset readers skip it while it is being written
+        self.tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+        self.schema = schema
+        self.columns: list[list] = [[] for _ in schema]
+        self.writer: "pq.ParquetWriter | None" = None
+        self.rows = 0
+
+    def __len__(self) -> int:
+        return len(self.columns[0])
+
+    def flush(self) -> None:
+        if not len(self):
+            return
+        batch = pa.record_batch(
+            [pa.array(values, type=field.type) for values, field in zip(self.columns, self.schema)],
+            schema=self.schema,
+        )
+        if self.writer is None:
+            self._open()
+        self.writer.write_batch(batch)
+        self.rows += batch.num_rows
+        self.columns = [[] for _ in self.schema]
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.writer = pq.ParquetWriter(self.tmp_path, self.schema, compression="zstd")
+
+    def close(self, commit: bool = True) -> None:
+        """Finish the file and move it into place, or (commit=False) discard it."""
+        if commit:
+            self.flush()
+            if self.writer is None:
+                # No rows this run: an empty file still replaces the month
+                self._open()
+        writer, self.writer = self.writer, None
+        if writer is None:
+            return
+        writer.close()
+        if commit:
+            os.replace(self.tmp_path, self.path)
+        else:
+            os.remove(self.tmp_path)
+
+
+def _month(created: int) -> str:
+    return datetime.fromtimestamp(created, timezone.utc).strftime("%Y-%m")
+
+
+def _month_start(timestamp: int) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(month: datetime) -> datetime:
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+def month_bounds(start: int, end: int) -> tuple[int, int]:
+    """[start, end) widened to the first second of start's month and of the month after end."""
+    last = _month_start(end)
+    if last.timestamp() < end:
+        last = _next_month(last)
+    return int(_month_start(start).timestamp()), int(last.timestamp())
+
+
+def _months(start: int, end: int) -> list[str]:
+    """YYYY-MM of every month starting in [start, end)."""
+    months, month = [], _month_start(start)
+    while month.timestamp() < end:
+        months.append(month.strftime("%Y-%m"))
+        month = _next_month(month)
+    return months
+
+
+async def export_parquet(
+    stripe: StripeClient,
+    resource: str,
+    start: int,
+    end: int,
+    root: str,
+    *,
+    batch_rows: int = BATCH_ROWS,
+    concurrency: int = 8,
+) -> dict[str, int]:
+    """
+    Write every `resource` object ("balance_transactions" or "invoices")
+    created in the months overlapping [start, end) under `root`, one file
+    per month. Returns the number of rows written per month (0 for empty
+    months). Re-running replaces the month files only if the whole export
+    succeeds.
+    """
+    arrow_schema = schema(resource)
+    columns = COLUMNS[resource]
+    start, end = month_bounds(start, end)
+    months = {
+        month: _MonthBuffer(os.path.join(root, resource, f"created_month={month}", "part-0.parquet"), arrow_schema)
+        for month in _months(start, end)
+    }
+    committed = False
+    try:
+        # Unordered: rows land in their month's buffer regardless of arrival order
+        async for obj in export_stripe(stripe, resource, start, end, ordered=False, concurrency=concurrency):
+            buffer = months[_month(obj["created"])]
+            for values, (_, kind, path) in zip(buffer.columns, columns):
+                values.append(_extract(obj, path, kind))
+            if len(buffer) >= batch_rows:
+                await asyncio.to_thread(buffer.flush)
+        for buffer in months.values():
+            await asyncio.to_thread(buffer.close)
+        committed = True
+    finally:
+        if not committed:
+            # No writer is left open and no partial month replaces a complete one
+            for buffer in months.values():
+                await asyncio.to_thread(buffer.close, False)
+    counts = {month: buffer.rows for month, buffer in sorted(months.items())}
+    logger.info(f"Exported {sum(counts.values())} {resource} to Parquet under {root}")
+    return counts
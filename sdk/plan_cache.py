@@ -0,0 +1,225 @@
+"""
+Read-through plan catalog cache for checkout and webhook paths.
+Plans are looked up by local `id` (checkout) or Stripe price id `plan_id`
+(webhooks) through one TieredCache: in-process LRU first, then Valkey, then
+the database. Price and product webhooks keep it current, and the
+lifespan warms it with every active plan on startup. Ids with no plan (no row,
+Stripe 404) are remembered briefly in a negative cache until a price or plan
+create webhook (or a write through put()) clears them.
+"""
+
+import asyncio
+import datetime
+import logging
+from collections.abc import Callable, Mapping
+from typing import Any
+
+import stripe
+from stripe import StripeClient
+
+from ..cache import NegativeCache, TieredCache
+from ..config import ValkeyConfig
+from ..valkey_pool import get_valkey_pool
+from .models import StripePlan
+from .webhooks import on_event
+
+logger = logging.getLogger(__name__)
+
+PLAN_FIELDS = tuple(StripePlan.model_fields)
+
+
+def _credits(metadata: Mapping, key: str) -> int:
+    try:
+        return int(metadata.get(key, 0))
+    except (ValueError, TypeError):
+        return 0
+
+
+def plan_to_dict(plan: Any) -> dict:
+    """Cacheable dict from an ORM row or StripePlan; datetimes become ISO strings."""
+    data = {}
+    for field in PLAN_FIELDS:
+        if hasattr(plan, field):
+            value = getattr(plan, field)
+            data[field] = value.isoformat() if isinstance(value, datetime.datetime) else value
+    return data
+
+
+def plan_from_price(price: Mapping) -> dict:
+    """Plan dict from a Stripe Price with its product expanded."""
+    product = price["product"]
+    recurring = price.get("recurring") or {}
+    created = datetime.datetime.fromtimestamp(price["created"], tz=datetime.timezone.utc).isoformat()
+    return {
+        "plan_id": price["id"],
+        "name": product["name"],
+        "amount": price.get("unit_amount") or 0,
+        "currency": price["currency"],
+        "interval": recurring.get("interval", "one_time"),
+        "initial_credits": _credits(product.get("metadata") or {}, "initial_credits"),
+        "monthly_credits": _credits(product.get("metadata") or {}, "monthly_credits"),
+        "active": bool(price.get("active", True) and product.get("active", True)),
+        "livemode": bool(price.get("livemode", False)),
+        "created_at": created,
+        "updated_at": created,
+    }
+
+
+def _load_plan(**lookup) -> dict | None:
+    try:
+        return plan_to_dict(StripePlan.objects.get(active=True, **lookup))
+    except StripePlan.DoesNotExist:
+        return None
+
+
+def _load_active_plans() -> list[dict]:
+    return [plan_to_dict(plan) for plan in StripePlan.objects.filter(active=True)]
+
+
+class PlanCache:
+    """Plan lookups indexed by local id and Stripe plan_id, sharing one cached value."""
+
+    def __init__(
+        self,
+        cache: TieredCache,
+        loader: Callable[..., dict | None] = _load_plan,
+        bulk_loader: Callable[[], list[dict]] = _load_active_plans,
+        negative: NegativeCache | None = None,
+    ):
+        self.cache = cache
+        self._loader = loader
+        self._bulk_loader = bulk_loader
+        # Local-only markers unless a shared tier is passed in (see get_plan_cache)
+        self.negative = negative or NegativeCache(TieredCache(f"{cache.prefix}:missing", ttl=60, local_ttl=5))
+
+    async def get_by_id(self, id: int) -> StripePlan | None:
+        data = await self.cache.aget(f"id:{id}")
+        if data is None:
+            if await self.negative.is_missing(f"id:{id}"):
+                return None
+            data = await asyncio.to_thread(self._loader, id=id)
+            if data is None:
+                await self.negative.mark_missing(f"id:{id}")
+                return None
+            await self.put(data)
+        return StripePlan.model_validate(data)
+
+    async def get_by_plan_id(
+        self, plan_id: str, stripe_client: StripeClient | None = None
+    ) -> StripePlan | None:
+        """
+        Cached plan for a Stripe price. On a database miss, fetches the price
+        with its product expanded (one call instead of Price + Product).
+        """
+        data = await self.cache.aget(f"price:{plan_id}")
+        if data is None:
+            if await self.negative.is_missing(f"price:{plan_id}"):
+                return None
+            data = await asyncio.to_thread(self._loader, plan_id=plan_id)
+            if data is None and stripe_client is not None:
+                try:
+                    price = await stripe_client.prices.retrieve_async(
+                        plan_id, params={"expand": ["product"]}
+                    )
+                    data = plan_from_price(price)
+                except stripe.InvalidRequestError as e:
+                    if e.http_status != 404:
+                        raise
+            if data is None:
+                await self.negative.mark_missing(f"price:{plan_id}")
+                return None
+            await self.put(data)
+        return StripePlan.model_validate(data)
+
+    async def put(self, data: dict) -> None:
+        if not data.get("active", True):
+            await self.evict(data["plan_id"])
+            return
+        keys = [f"price:{data['plan_id']}"]
+        if data.get("id") is not None:
+            keys.append(f"id:{data['id']}")
+        for key in keys:
+            await self.cache.aset(key, data)
+        await self.negative.clear(*keys)
+
+    async def evict(self, plan_id: str) -> None:
+        cached = await self.cache.aget(f"price:{plan_id}")
+        keys = [f"price:{plan_id}"]
+        if cached and cached.get("id") is not None:
+            keys.append(f"id:{cached['id']}")
+        await self.cache.adelete(*keys)
+
+    async def warm(self) -> int:
+        plans = await asyncio.to_thread(self._bulk_loader)
+        for data in plans:
+            await self.put(data)
+        return len(plans)
+
+    async def clear(self) -> None:
+        await self.cache.aclear()
+
+
+_plan_cache: PlanCache | None = None
+
+
+def get_plan_cache() -> PlanCache:
+    global _plan_cache
+    if _plan_cache is None:
+        pool = get_valkey_pool()
+        _plan_cache = PlanCache(
+            TieredCache(
+                "stripe:plan",
+                pool.client,
+                pool.async_client,
+                ttl=ValkeyConfig.VALKEY_STRIPE_PLAN_CACHE_TTL,
+                local_ttl=ValkeyConfig.VALKEY_STRIPE_PLAN_CACHE_LOCAL_TTL,
+                maxsize=ValkeyConfig.VALKEY_STRIPE_PLAN_CACHE_MAXSIZE,
+            ),
+            negative=NegativeCache(
+                TieredCache(
+                    "stripe:plan:missing",
+                    pool.client,
+                    pool.async_client,
+                    ttl=ValkeyConfig.VALKEY_STRIPE_NEGATIVE_CACHE_TTL,
+                    local_ttl=ValkeyConfig.VALKEY_STRIPE_NEGATIVE_CACHE_LOCAL_TTL,
+                )
+            ),
+        )
+    return _plan_cache
+
+
+# --- Webhook refresh ---
+@on_event("price.updated")
+async def _refresh_price(event) -> None:
+    price = event.data.object
+    plans = get_plan_cache()
+    cached = await plans.cache.aget(f"price:{price['id']}")
+    if cached is None:
+        return
+    recurring = price.get("recurring") or {}
+    await plans.put(
+        {
+            **cached,
+            "amount": price.get("unit_amount") or 0,
+            "currency": price["currency"],
+            "interval": recurring.get("interval", cached["interval"]),
+            "active": bool(price.get("active", True)),
+        }
+    )
+
+
+@on_event("price.created", "plan.created")
+async def _clear_missing_price(event) -> None:
+    await get_plan_cache().negative.clear(f"price:{event.data.object['id']}")
+
+
+@on_event("price.deleted")
+async def _evict_price(event) -> None:
+    await get_plan_cache().evict(event.data.object["id"])
+
+
+@on_event("product.updated", "product.deleted")
+async def _clear_plans(event) -> None:
+    # Product names and credit metadata are copied into every plan of the product;
+    # product events are rare, so drop the catalog and let reads repopulate it
+    await get_plan_cache().clear()
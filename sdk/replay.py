@@ -0,0 +1,213 @@
+"""
+Backfill and replay of Stripe events through the webhook dispatch table.
+After an outage (or to reprocess with fixed handlers) events for a time range
+are listed from the events API and run through `webhooks.dispatch_event`,
+exactly as if they had been delivered again.
+- The range is walked oldest to newest in fixed windows. Each window's events
+  are put back in chronological order and partitioned by customer (falling
+  back to the object id), so one customer's subscription changes are never
+  reordered while different customers are processed concurrently.
+- The next window is fetched while the current one is dispatched.
+- A checkpoint (the end of the last fully dispatched window) is saved in
+  Valkey after every window; a re-run of the same name resumes from it if it
+  falls inside the new range. At most one window is dispatched twice, which
+  handlers already tolerate since Stripe itself delivers webhooks at least once.
+- Handler errors are counted, and the checkpoint never moves past a window in
+  which a handler failed, so a re-run retries it.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from functools import partial
+from typing import Any
+
+import valkey
+from prometheus_client import Counter
+from stripe import StripeClient
+
+from ..rate_limit import BATCH, stripe_lane
+from ..valkey_pool import get_valkey_pool
+from .pagination import paginate
+from .webhooks import dispatch_event
+
+logger = logging.getLogger(__name__)
+
+# Seconds of events fetched and dispatched per step
+WINDOW = 3600
+
+# Customer partitions dispatched at once
+CONCURRENCY = 32
+
+CHECKPOINT_PREFIX = "stripe:replay:"
+
+stripe_REPLAYED_EVENTS = Counter(
+    "stripe_replayed_events",
+    "Stripe events re-dispatched by the replay runner",
+    ["outcome"],
+)
+
+
+@dataclass
+class ReplayResult:
+    events: int = 0
+    handled: int = 0
+    failed: int = 0
+    partitions: int = 0
+    checkpoint: int | None = None
+
+
+def partition_key(event: Any) -> str:
+    """Customer the event belongs to, else its object's id (else the event's)."""
+    obj = event.data.object
+    if obj.get("object") == "customer":
+        return obj["id"]
+    customer = obj.get("customer")
+    if customer is not None:
+        return customer if isinstance(customer, str) else customer["id"]
+    return obj.get("id") or event.id
+
+
+class ReplayCheckpoint:
+    """Replay progress per run name, stored in Valkey (fails open)."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def load(self, name: str) -> int | None:
+        try:
+            value = await self.client.get(f"{CHECKPOINT_PREFIX}{name}")
+        except valkey.ValkeyError as e:
+            logger.warning(f"Could not read replay checkpoint {name}: {e}")
+            return None
+        return int(value) if value is not None else None
+
+    async def save(self, name: str, timestamp: int) -> None:
+        try:
+            await self.client.set(f"{CHECKPOINT_PREFIX}{name}", timestamp)
+        except valkey.ValkeyError as e:
+            logger.warning(f"Could not save replay checkpoint {name}: {e}")
+
+
+class EventReplayer:
+    """Re-dispatches a range of Stripe events, partitioned by customer."""
+
+    def __init__(
+        self,
+        checkpoint: ReplayCheckpoint,
+        dispatch: Callable[[Any], Any] = partial(dispatch_event, strict=True),
+        window: int = WINDOW,
+        concurrency: int = CONCURRENCY,
+    ):
+        self.checkpoint = checkpoint
+        self.dispatch = dispatch
+        self.window = window
+        self.concurrency = concurrency
+
+    async def _fetch(self, stripe: StripeClient, lo: int, hi: int, filters: dict) -> list:
+        events = [event async for event in paginate(stripe, "events", {"gte": lo, "lt": hi}, **filters)]
+        # Stripe lists newest first
+        events.reverse()
+        return events
+
+    async def _dispatch_window(self, events: Iterable[Any], result: ReplayResult) -> int:
+        """Dispatch one window; returns how many events raised in their handlers."""
+        failed = 0
+        partitions: dict[str, list] = {}
+        for event in events:
+            partitions.setdefault(partition_key(event), []).append(event)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(partition: list) -> None:
+            nonlocal failed
+            async with semaphore:
+                for event in partition:
+                    # Handlers' own Stripe calls yield to interactive traffic too
+                    try:
+                        with stripe_lane(BATCH):
+                            handled = bool(await self.dispatch(event))
+                    except Exception as e:
+                        # Later events of the partition still run: handlers tolerate redelivery
+                        logger.warning(f"Replaying Stripe event {event.id} failed: {e}")
+                        stripe_REPLAYED_EVENTS.labels(outcome="failed").inc()
+                        result.events += 1
+                        failed += 1
+                        continue
+                    stripe_REPLAYED_EVENTS.labels(outcome="handled" if handled else "ignored").inc()
+                    result.events += 1
+                    result.handled += handled
+
+        await asyncio.gather(*(run(partition) for partition in partitions.values()))
+        result.partitions += len(partitions)
+        result.failed += failed
+        return failed
+
+    async def replay(
+        self,
+        stripe: StripeClient,
+        start: int,
+        end: int | None = None,
+        *,
+        name: str = "default",
+        resume: bool = True,
+        **filters: Any,
+    ) -> ReplayResult:
+        """
+        Dispatch every event created in [start, end) in per-customer order.
+        With `resume`, starts after the checkpoint saved by an earlier run of
+        the same `name`, if it lies within [start, end). `filters` are passed
+        to the events API (e.g. type="customer.subscription.*").
+        """
+        end = int(time.time()) if end is None else end
+        if "created" in filters:
+            raise ValueError("replay sets `created` per window; pass the range as start and end")
+        if resume:
+            saved = await self.checkpoint.load(name)
+            if saved is not None and start <= saved < end:
+                logger.info(f"Resuming event replay {name} from {saved}")
+                start = saved
+            elif saved is not None:
+                logger.warning(
+                    f"Replay checkpoint {saved} for {name} is outside [{start}, {end}); replaying the whole range"
+                )
+        result = ReplayResult(checkpoint=start)
+        # Set by the first window with handler failures: the checkpoint stays at its start
+        stalled = False
+        windows = [(lo, min(lo + self.window, end)) for lo in range(start, end, self.window)]
+        if not windows:
+            return result
+        pending = asyncio.ensure_future(self._fetch(stripe, *windows[0], filters))
+        try:
+            for index, (lo, hi) in enumerate(windows):
+                events = await pending
+                pending = None
+                if index + 1 < len(windows):
+                    pending = asyncio.ensure_future(self._fetch(stripe, *windows[index + 1], filters))
+                failed = await self._dispatch_window(events, result)
+                if stalled:
+                    continue
+                if failed:
+                    logger.warning(f"Handler failures in replay window [{lo}, {hi}); checkpoint stays at {lo}")
+                    stalled = True
+                await self.checkpoint.save(name, lo if failed else hi)
+                result.checkpoint = lo if failed else hi
+        finally:
+            if pending is not None:
+                pending.cancel()
+        logger.info(
+            f"Replayed {result.events} Stripe events ({result.handled} handled, {result.failed} failed) "
+            f"across {result.partitions} partitions up to {result.checkpoint}"
+        )
+        return result
+
+
+_replayer: EventReplayer | None = None
+
+
+def get_event_replayer() -> EventReplayer:
+    global _replayer
+    if _replayer is None:
+        _replayer = EventReplayer(ReplayCheckpoint(get_valkey_pool().async_client))
+    return _replayer
@@ -0,0 +1,140 @@
+"""
+Plan name to subscription tier matching.
+Rules come from STRIPE_PLAN_TIERS, with product `subscription_tier` metadata
+(written by create_product) layered on top. Plan names are
+"<product name> - <nickname or price id>" (see create_product), so product
+overrides match a plan name exactly or as its product-name prefix. Names resolve:
+1. exact name (configured or from product metadata)
+2. product override for the plan's product-name prefix (longest first)
+3. first configured rule, in order, whose needle (the first word of its name,
+   lowercased) occurs in the lowercased plan name
+4. STRIPE_DEFAULT_TIER
+Indexes are compiled once per rule set and results are memoized, so batch
+mapping thousands of names costs one lookup per distinct name.
+"""
+
+import logging
+import re
+from collections.abc import Iterable, Mapping
+from functools import lru_cache
+
+from ..config import ValkeyConfig
+from .webhooks import on_event
+
+logger = logging.getLogger(__name__)
+
+TIER_METADATA_KEY = "subscription_tier"
+
+_TOKEN = re.compile(r"\w+")
+
+# Between product name and nickname (or price id) in StripePlan.name
+PLAN_NAME_SEPARATOR = " - "
+
+
+def tier_overrides(products: Iterable[Mapping]) -> dict[str, str]:
+    """Exact name -> tier entries from products carrying `subscription_tier` metadata."""
+    overrides = {}
+    for product in products:
+        tier = (product.get("metadata") or {}).get(TIER_METADATA_KEY)
+        if tier and product.get("name"):
+            overrides[product["name"]] = tier
+    return overrides
+
+
+class TierMatcher:
+    """Compiled, memoized tier rules. Rule order decides which needle wins."""
+
+    def __init__(
+        self,
+        rules: Mapping[str, str] = ValkeyConfig.STRIPE_PLAN_TIERS,
+        default: str = ValkeyConfig.STRIPE_DEFAULT_TIER,
+        overrides: Mapping[str, str] | None = None,
+        memo_size: int = 65536,
+    ):
+        self.rules = dict(rules)
+        self.default = default
+        self.overrides = dict(overrides or {})
+        self._memo_size = memo_size
+        self._compile()
+
+    def _compile(self) -> None:
+        self._exact = {**self.rules, **self.overrides}
+        # (needle, tier) by rule priority; a needle only counts once, at its first rule
+        self._needles: list[tuple[str, str]] = []
+        self._token_rank: dict[str, int] = {}
+        for name, tier in self.rules.items():
+            words = name.lower().split()
+            if not words or words[0] in self._token_rank:
+                continue
+            self._token_rank[words[0]] = len(self._needles)
+            self._needles.append((words[0], tier))
+        self.match = lru_cache(maxsize=self._memo_size)(self._match)
+
+    def _match(self, plan_name: str) -> str:
+        tier = self._exact.get(plan_name)
+        if tier is not None:
+            return tier
+        tier = self._product_override(plan_name)
+        if tier is not None:
+            return tier
+        lowered = plan_name.lower()
+        # A whole-word hit bounds the search: only higher-priority needles can
+        # still win, and only as substrings (e.g. "free" in "Freemium")
+        ranks = [self._token_rank[t] for t in _TOKEN.findall(lowered) if t in self._token_rank]
+        limit = min(ranks, default=len(self._needles))
+        for needle, tier in self._needles[:limit]:
+            if needle in lowered:
+                return tier
+        return self._needles[limit][1] if limit < len(self._needles) else self.default
+
+    def _product_override(self, plan_name: str) -> str | None:
+        # Product names may contain the separator too, so try every split point
+        end = plan_name.rfind(PLAN_NAME_SEPARATOR)
+        while end > 0:
+            tier = self.overrides.get(plan_name[:end])
+            if tier is not None:
+                return tier
+            end = plan_name.rfind(PLAN_NAME_SEPARATOR, 0, end)
+        return None
+
+    def match_many(self, plan_names: Iterable[str]) -> dict[str, str]:
+        """Tier for every distinct name, e.g. for migrations and reconciliation runs."""
+        return {name: self.match(name) for name in dict.fromkeys(plan_names)}
+
+    def set_override(self, plan_name: str, tier: str | None) -> None:
+        """Add, change or (with tier=None) drop an exact override, then recompile."""
+        if tier is None:
+            if self.overrides.pop(plan_name, None) is None:
+                return
+        elif self.overrides.get(plan_name) == tier:
+            return
+        else:
+            self.overrides[plan_name] = tier
+        self._compile()
+
+    def load_overrides(self, overrides: Mapping[str, str]) -> None:
+        """Replace every override at once (e.g. from a catalog snapshot)."""
+        self.overrides = dict(overrides)
+        self._compile()
+
+
+_tier_matcher: TierMatcher | None = None
+
+
+def get_tier_matcher() -> TierMatcher:
+    global _tier_matcher
+    if _tier_matcher is None:
+        _tier_matcher = TierMatcher()
+    return _tier_matcher
+
+
+@on_event("product.created", "product.updated", "product.deleted")
+async def _refresh_tier(event) -> None:
+    product = event.data.object
+    matcher = get_tier_matcher()
+    previous = getattr(event.data, "previous_attributes", None) or {}
+    if previous.get("name"):
+        matcher.set_override(previous["name"], None)
+    tier = (product.get("metadata") or {}).get(TIER_METADATA_KEY)
+    # Archived products keep their tier: existing subscriptions still reference them
+    matcher.set_override(product["name"], None if event.type == "product.deleted" else tier or None)
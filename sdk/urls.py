@@ -1,9 +1,13 @@
 from fastapi import APIRouter
 
+from .admin_views import router as admin_router
 from .views import router as stripe_router
+from .webhooks import router as webhook_router
 
 # This file sets up the FastAPI router for Stripe integration endpoints.
 # All endpoints are now defined in views.py using FastAPI's APIRouter.
 
 router = APIRouter()
 router.include_router(stripe_router, prefix="/stripe", tags=["stripe"])
+router.include_router(webhook_router, prefix="/stripe", tags=["stripe"])
+router.include_router(admin_router, prefix="/stripe", tags=["stripe"])
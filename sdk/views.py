@@ -4,7 +4,8 @@ from types import SimpleNamespace
 from typing import Any
 
 import stripe
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from stripe import StripeClient
 
 from app.core.config import StripeSettings
 from app.api.deps import get_current_user, get_db
@@ -18,11 +19,19 @@ from app.core.third_party_integrations.stripe_home._schemas import (
 )
 
 # Import Stripe client config
-from .client import get_stripe_client
+from ..api._exceptions import StripeIdempotencyConflict, StripeIdempotencyInProgress
+from ..client import get_stripe_client
 
 # Import Django ORM models
 from .models import StripeCustomer, StripePlan
 
+# Cached plan, customer and catalog lookups
+from .catalog import get_catalog
+from .customers import get_customer_resolver
+from .dashboard import dashboard_url, get_dashboard_service
+from .idempotency import idempotent
+from .plan_cache import get_plan_cache
+
 # Logger setup
 logger = logging.getLogger(__name__)
 
@@ -38,7 +47,10 @@ router = APIRouter()
 async def create_checkout_session(
     plan_id: int,
     payload: CheckoutSessionRequest,
+    response: Response,
+    idempotency_key: str | None = Header(None),
     user: Any = Depends(get_current_user),
+    stripe_client: StripeClient = Depends(get_stripe_client),
 ):
     """
     ```
@@ -46,21 +58,40 @@ async def create_checkout_session(
     - Validates plan_id
     - Uses Pydantic for request/response
     - Handles Stripe and general errors
+    - Retries with the same Idempotency-Key header return the first session
     ```
     """
     try:
-        plan = StripePlan.objects.get(id=plan_id, active=True)
+        plan = await get_plan_cache().get_by_id(plan_id)
+        if plan is None:
+            raise HTTPException(status_code=404, detail="Plan not found")
         # Extract URLs and customer_id
         success_url = payload.success_url
         cancel_url = payload.cancel_url
         customer_id = payload.customer_id
-        # Create the checkout session
-        checkout_url = await _create_checkout_session(
-            plan, user, success_url, cancel_url, customer_id
+
+        async def create(stripe_key: str | None) -> dict:
+            checkout_url = await _create_checkout_session(
+                plan, user, stripe_client, success_url, cancel_url, customer_id, stripe_key
+            )
+            return {"checkout_url": checkout_url}
+
+        # Keys are scoped per user, so one user's key never replays another's session
+        result, replayed = await idempotent(
+            f"checkout:{user.id}",
+            idempotency_key,
+            {"plan_id": plan_id, **payload.dict()},
+            create,
         )
-        return CheckoutSessionResponse(checkout_url=checkout_url)
-    except StripePlan.DoesNotExist:
-        raise HTTPException(status_code=404, detail="Plan not found")
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+        return CheckoutSessionResponse(**result)
+    except HTTPException:
+        raise
+    except StripeIdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except StripeIdempotencyInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except stripe.error.StripeError as e:
         logger.error(f"Stripe error: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -70,71 +101,54 @@ async def create_checkout_session(
 
 
 async def _create_checkout_session(
-    plan, user, success_url=None, cancel_url=None, customer_id=None
+    plan,
+    user,
+    stripe_client,
+    success_url=None,
+    cancel_url=None,
+    customer_id=None,
+    idempotency_key=None,
 ):
     # Use provided customer_id or get/create one
     if customer_id:
         customer_obj = StripeCustomer.objects.get(customer_id=customer_id)
         customer = SimpleNamespace(customer_id=customer_id)
     else:
-        customer_obj, created = StripeCustomer.objects.get_or_create(
-            user=user,
-            defaults={
-                "customer_id": _create_stripe_customer(user),
-                "livemode": not StripeSettings.STRIPE_SECRET_KEY.startswith("sk_test_"),
-            },
-        )
-        customer = SimpleNamespace(customer_id=customer_obj.customer_id)
+        customer_id = await get_customer_resolver().resolve(user, stripe_client)
+        customer = SimpleNamespace(customer_id=customer_id)
     default_success_url = (
         f"{StripeSettings.BASE_URL}/subscription/success?session_id={{CHECKOUT_SESSION_ID}}"
     )
     default_cancel_url = f"{StripeSettings.BASE_URL}/subscription/cancel"
-    stripe.api_key = (
-        StripeSettings.STRIPE_SECRET_KEY_TEST
-        if StripeSettings.TESTING
-        else StripeSettings.STRIPE_SECRET_KEY
-    )
-    checkout_session = stripe.checkout.Session.create(
-        customer=customer.customer_id,
-        line_items=[{"price": plan.plan_id, "quantity": 1}],
-        mode="subscription",
-        success_url=success_url or default_success_url,
-        cancel_url=cancel_url or default_cancel_url,
-        allow_promotion_codes=True,
-        billing_address_collection="required",
-        customer_email=user.email if not customer.customer_id else None,
-        client_reference_id=str(user.id),
-        metadata={
+    session_params = {
+        "customer": customer.customer_id,
+        "line_items": [{"price": plan.plan_id, "quantity": 1}],
+        "mode": "subscription",
+        "success_url": success_url or default_success_url,
+        "cancel_url": cancel_url or default_cancel_url,
+        "allow_promotion_codes": True,
+        "billing_address_collection": "required",
+        "client_reference_id": str(user.id),
+        "metadata": {
             "plan_id": str(plan.id),
             "plan_name": plan.name,
             "user_id": str(user.id),
         },
+    }
+    if not customer.customer_id:
+        session_params["customer_email"] = user.email
+    checkout_session = await stripe_client.checkout.sessions.create_async(
+        params=session_params,
+        options={"idempotency_key": idempotency_key} if idempotency_key else None,
     )
     return checkout_session.url
 
 
-def _create_stripe_customer(user):
-    try:
-        stripe.api_key = (
-            StripeSettings.STRIPE_SECRET_KEY_TEST
-            if StripeSettings.TESTING
-            else StripeSettings.STRIPE_SECRET_KEY
-        )
-        customer = stripe.Customer.create(
-            email=user.email,
-            name=getattr(user, "get_full_name", lambda: user.username)(),
-            metadata={"user_id": str(user.id)},
-        )
-        return customer.id
-    except Exception as e:
-        logger.error(f"Error creating Stripe customer: {e}")
-        raise
-
-
 @router.post("/products", response_model=ProductCreateResponse, status_code=201)
 async def create_product(
     payload: ProductCreateRequest,
     user: Any = Depends(get_current_user),
+    stripe_client: StripeClient = Depends(get_stripe_client),
 ):
     """
     ```
@@ -143,7 +157,6 @@ async def create_product(
     ```
     """
     try:
-        stripe_client = get_stripe_client()
         product_data = payload.dict(exclude_unset=True)
         # Metadata handling
         if payload.metadata is not None:
@@ -156,12 +169,7 @@ async def create_product(
                 metadata["subscription_tier"] = payload.subscription_tier
             product_data["metadata"] = metadata
         # Create the product
-        stripe.api_key = (
-            StripeSettings.STRIPE_SECRET_KEY_TEST
-            if StripeSettings.TESTING
-            else StripeSettings.STRIPE_SECRET_KEY
-        )
-        product = stripe_client.products.create(**product_data)
+        product = await stripe_client.products.create_async(params=product_data)
         created_prices = []
         if payload.pricing_plans:
             for plan_data in payload.pricing_plans:
@@ -186,10 +194,12 @@ async def create_product(
                     price_data["nickname"] = plan_data.nickname
                 if plan_data.metadata:
                     price_data["metadata"] = plan_data.metadata
-                price = stripe_client.prices.create(**price_data)
+                price = await stripe_client.prices.create_async(params=price_data)
                 created_prices.append(price)
                 if len(created_prices) == 1:
-                    stripe_client.products.modify(product.id, default_price=price.id)
+                    await stripe_client.products.update_async(
+                        product.id, params={"default_price": price.id}
+                    )
                 if "recurring" in price_data:
                     StripePlan.objects.create(
                         plan_id=price.id,
@@ -217,6 +227,72 @@ async def create_product(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/products", status_code=200)
+async def list_products(
+    if_none_match: str | None = Header(default=None),
+    user: Any = Depends(get_current_user),
+    stripe_client: StripeClient = Depends(get_stripe_client),
+):
+    """
+    ```
+    list active products with their prices and local credit fields.
+    Served from a precomputed snapshot with a strong ETag; conditional
+    requests (If-None-Match) get 304 Not Modified.
+    ```
+    """
+    try:
+        snapshot = await get_catalog().get(stripe_client)
+    except stripe.error.StripeError as e:
+        logger.error(f"Stripe error listing products: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if snapshot.matches(if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+
+@router.get("/dashboard", status_code=200)
+async def customer_dashboard(
+    user: Any = Depends(get_current_user),
+    stripe_client: StripeClient = Depends(get_stripe_client),
+):
+    """
+    ```
+    Subscription, invoice and payment method summary for the current user.
+    Three concurrent Stripe calls per refresh, served stale-while-revalidate.
+    ```
+    """
+    customer_id = await get_customer_resolver().lookup(user)
+    if customer_id is None:
+        return {"has_customer": False, "subscriptions": [], "payment_methods": []}
+    try:
+        data = await get_dashboard_service().get(customer_id, stripe_client)
+    except Exception as e:
+        logger.error(f"Error retrieving dashboard data: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="An unexpected error occurred when retrieving subscription information",
+        )
+    is_staff = getattr(user, "is_staff", False)
+    return {
+        "has_customer": True,
+        "customer_id": customer_id,
+        "customer_dashboard_url": (
+            dashboard_url("customers", customer_id, data["livemode"]) if is_staff else None
+        ),
+        "subscriptions": [
+            {
+                **sub,
+                "dashboard_url": (
+                    dashboard_url("subscriptions", sub["id"], sub["livemode"]) if is_staff else None
+                ),
+            }
+            for sub in data["subscriptions"]
+        ],
+        "payment_methods": data["payment_methods"],
+    }
+
+
 # Add router to FastAPI app in your main.py or app entrypoint
 # from .views import router as stripe_router
 # app.include_router(stripe_router, prefix="/stripe", tags=["stripe"])
@@ -0,0 +1,95 @@
+"""
+Stripe webhook endpoint with a dispatch registry.
+Modules subscribe with `@on_event("price.updated", "product.*")`; the endpoint
+verifies the signature and runs every matching handler. Handler errors are
+logged and the event is still acknowledged, as in the Django reference views.
+"""
+
+import inspect
+import logging
+from collections.abc import Awaitable, Callable
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from typing import Any
+
+import stripe
+from fastapi import APIRouter, Header, HTTPException, Request
+
+from ..config import ValkeyConfig
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+EventHandler = Callable[[Any], Awaitable[None] | None]
+
+# (pattern, handler) in registration order; patterns use fnmatch wildcards
+_HANDLERS: list[tuple[str, EventHandler]] = []
+
+
+def on_event(*patterns: str) -> Callable[[EventHandler], EventHandler]:
+    """Register a sync or async handler taking the Stripe event."""
+
+    def decorator(handler: EventHandler) -> EventHandler:
+        for pattern in patterns:
+            _HANDLERS.append((pattern, handler))
+        handlers_for.cache_clear()
+        return handler
+
+    return decorator
+
+
+@lru_cache(maxsize=256)
+def handlers_for(event_type: str) -> tuple[EventHandler, ...]:
+    handlers = []
+    for pattern, handler in _HANDLERS:
+        if fnmatchcase(event_type, pattern) and handler not in handlers:
+            handlers.append(handler)
+    return tuple(handlers)
+
+
+async def dispatch_event(event, strict: bool = False) -> bool:
+    """
+    Run the handlers for `event`; returns False when none are registered.
+    With `strict`, every handler still runs, then the first handler error is
+    re-raised, for callers that must not count the event as processed (replay).
+    """
+    handlers = handlers_for(event.type)
+    error = None
+    for handler in handlers:
+        try:
+            result = handler(event)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.error(f"Error handling {event.type} in {handler.__qualname__}: {e}")
+            error = error or e
+    if strict and error is not None:
+        raise error
+    return bool(handlers)
+
+
+@router.post("/webhook")
+async def stripe_webhook(
+    request: Request, stripe_signature: str | None = Header(default=None)
+):
+    """
+    ```
+    Receive a Stripe webhook event.
+    - Verifies the Stripe-Signature header
+    - Dispatches to every handler registered for the event type
+    ```
+    """
+    payload = await request.body()
+    try:
+        event = stripe.Webhook.construct_event(
+            payload, stripe_signature, ValkeyConfig.STRIPE_WEBHOOK_SECRET
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid payload")
+    except stripe.error.SignatureVerificationError:
+        raise HTTPException(status_code=400, detail="Invalid signature")
+    handled = await dispatch_event(event)
+    if not handled:
+        logger.warning(f"Unhandled webhook event type: {event.type}")
+    return {"status": "success" if handled else "ignored", "event": event.type}
@@ -0,0 +1,202 @@
+"""
+Client-side sharding over VALKEY_SHARD_NODES.
+Keys (customer ids, user ids, cache keys) are placed on a consistent-hash ring
+with virtual nodes, so adding a shard only moves the keys it takes over.
+Multi-key operations group keys by shard and send one pipeline per shard.
+
+This is for independent Valkey nodes; with VAPI_CLUSTER/VAPI_CLUSTER_MODE the
+cluster client in valkey_pool.py routes by hash slot itself.
+"""
+
+import asyncio
+import bisect
+import hashlib
+from collections.abc import Callable, Iterable, Mapping
+from threading import Lock
+from typing import Any
+
+from .config import ValkeyConfig
+from .valkey_pool import ValkeyPool
+
+# Queues one command for `key` on a (sync or async) pipeline
+PipelineOp = Callable[[Any, str], Any]
+
+
+def _hash(value: str) -> int:
+    # Stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def hash_key(key: str) -> str:
+    """Part of the key that decides placement: the `{tag}` if present, as in Valkey Cluster."""
+    start = key.find("{")
+    if start != -1:
+        end = key.find("}", start + 1)
+        if end > start + 1:
+            return key[start + 1 : end]
+    return key
+
+
+class HashRing:
+    """
+    Consistent-hash ring with `vnodes` points per node.
+    Points and owners are rebuilt together and swapped in with one assignment,
+    so a lookup racing a membership change sees the old ring or the new one.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = ValkeyConfig.VALKEY_SHARD_VNODES):
+        self.vnodes = vnodes
+        self._ring: tuple[list[int], list[str]] = ([], [])
+        self._nodes: frozenset[str] = frozenset()
+        for node in nodes:
+            self.add_node(node)
+
+    @property
+    def nodes(self) -> set[str]:
+        return set(self._nodes)
+
+    def _rebuild(self, nodes: frozenset[str]) -> None:
+        ring = sorted((_hash(f"{node}#{i}"), node) for node in nodes for i in range(self.vnodes))
+        self._ring = ([p for p, _ in ring], [o for _, o in ring])
+        self._nodes = nodes
+
+    def add_node(self, node: str) -> None:
+        if node not in self._nodes:
+            self._rebuild(self._nodes | {node})
+
+    def remove_node(self, node: str) -> None:
+        if node in self._nodes:
+            self._rebuild(self._nodes - {node})
+
+    def node_for(self, key: str) -> str:
+        points, owners = self._ring
+        if not points:
+            raise LookupError("Hash ring has no nodes")
+        index = bisect.bisect(points, _hash(hash_key(key))) % len(points)
+        return owners[index]
+
+
+def node_name(node: Mapping) -> str:
+    return f"{node['host']}:{node['port']}"
+
+
+def _node_pool(node: Mapping, config=ValkeyConfig) -> ValkeyPool:
+    """A standalone pool for one shard, sized at VALKEY_POOL_SIZE connections."""
+    node_config = type(
+        "ShardConfig",
+        (config,),
+        {
+            "VALKEY_HOST": node["host"],
+            "VALKEY_PORT": node["port"],
+            "VALKEY_MAX_CONNECTIONS": config.VALKEY_POOL_SIZE,
+            "VALKEY_CLUSTER": False,
+            "VALKEY_CLUSTER_MODE": False,
+        },
+    )
+    return ValkeyPool(node_config, name=f"shard:{node_name(node)}")
+
+
+class ShardRouter:
+    """Routes keys to per-shard Valkey pools and batches multi-key work per shard."""
+
+    def __init__(
+        self,
+        nodes: Iterable[Mapping] | None = None,
+        vnodes: int = ValkeyConfig.VALKEY_SHARD_VNODES,
+        pool_factory: Callable[[Mapping], ValkeyPool] = _node_pool,
+    ):
+        self.ring = HashRing(vnodes=vnodes)
+        self._pool_factory = pool_factory
+        self._pools: dict[str, ValkeyPool] = {}
+        self._lock = Lock()
+        for node in ValkeyConfig.VALKEY_SHARD_NODES if nodes is None else nodes:
+            self.add_node(node)
+
+    def add_node(self, node: Mapping) -> str:
+        """Add a shard; only keys whose ring segment it takes over move to it."""
+        name = node_name(node)
+        with self._lock:
+            if name not in self._pools:
+                self._pools[name] = self._pool_factory(node)
+                self.ring.add_node(name)
+        return name
+
+    def node_for(self, key: str) -> str:
+        return self.ring.node_for(key)
+
+    def client_for(self, key: str):
+        return self._pools[self.node_for(key)].client
+
+    def async_client_for(self, key: str):
+        return self._pools[self.node_for(key)].async_client
+
+    def group(self, keys: Iterable[str]) -> dict[str, list[str]]:
+        """Keys by shard name, preserving input order within each shard."""
+        groups: dict[str, list[str]] = {}
+        for key in keys:
+            groups.setdefault(self.node_for(key), []).append(key)
+        return groups
+
+    # --- Multi-key operations: one pipeline per shard ---
+    def execute(self, keys: Iterable[str], op: PipelineOp) -> dict[str, Any]:
+        results: dict[str, Any] = {}
+        for name, shard_keys in self.group(keys).items():
+            pipe = self._pools[name].client.pipeline(transaction=False)
+            for key in shard_keys:
+                op(pipe, key)
+            results.update(zip(shard_keys, pipe.execute()))
+        return results
+
+    async def aexecute(self, keys: Iterable[str], op: PipelineOp) -> dict[str, Any]:
+        async def run(name: str, shard_keys: list[str]):
+            pipe = self._pools[name].async_client.pipeline(transaction=False)
+            for key in shard_keys:
+                op(pipe, key)
+            return zip(shard_keys, await pipe.execute())
+
+        results: dict[str, Any] = {}
+        for pairs in await asyncio.gather(
+            *(run(name, shard_keys) for name, shard_keys in self.group(keys).items())
+        ):
+            results.update(pairs)
+        return results
+
+    def mget(self, keys: Iterable[str]) -> dict[str, Any]:
+        return self.execute(keys, lambda pipe, key: pipe.get(key))
+
+    async def amget(self, keys: Iterable[str]) -> dict[str, Any]:
+        return await self.aexecute(keys, lambda pipe, key: pipe.get(key))
+
+    def mset(self, mapping: Mapping[str, Any], ex: int | None = None) -> None:
+        self.execute(mapping, lambda pipe, key: pipe.set(key, mapping[key], ex=ex))
+
+    async def amset(self, mapping: Mapping[str, Any], ex: int | None = None) -> None:
+        await self.aexecute(mapping, lambda pipe, key: pipe.set(key, mapping[key], ex=ex))
+
+    def delete(self, keys: Iterable[str]) -> int:
+        return sum(self.execute(keys, lambda pipe, key: pipe.delete(key)).values())
+
+    async def adelete(self, keys: Iterable[str]) -> int:
+        return sum((await self.aexecute(keys, lambda pipe, key: pipe.delete(key))).values())
+
+    async def aclose(self) -> None:
+        for pool in self._pools.values():
+            await pool.aclose()
+
+
+_router: ShardRouter | None = None
+
+
+def get_shard_router() -> ShardRouter:
+    """Return the shared router over VALKEY_SHARD_NODES (pools connect lazily)."""
+    global _router
+    if _router is None:
+        _router = ShardRouter()
+    return _router
+
+
+async def close_shard_router() -> None:
+    global _router
+    if _router is not None:
+        await _router.aclose()
+        _router = None
@@ -1,6 +1,14 @@
 import uuid
 import pytest
 
+from app.core.third_party_integrations.stripe_home.sdk import catalog
+
+
+@pytest.fixture(autouse=True)
+def no_process_catalog(monkeypatch):
+    """Webhook dispatches in tests must not start catalog rebuilds against Stripe and Valkey."""
+    monkeypatch.setattr(catalog, "_catalog", None)
+
 @pytest.fixture
 def mock_stripe_customer():
     """Mock Stripe customer object for use in tests."""
@@ -0,0 +1,85 @@
+"""
+Test suite for the streaming admin listings (sdk/admin.py).
+- Stripe list endpoints are replaced by an in-memory paginated service.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.third_party_integrations.stripe_home.rate_limit import BATCH, current_lane
+from app.core.third_party_integrations.stripe_home.sdk import admin, pagination
+
+
+class PagedService:
+    """list_async over `total` objects, newest first, like Stripe's cursor pagination."""
+
+    def __init__(self, total, delay=0.0, fail_at=None):
+        self.objects = [{"id": f"obj_{n}", "created": 1000 - n} for n in range(total)]
+        self.delay, self.fail_at = delay, fail_at
+        self.calls, self.lanes, self.started = [], [], 0
+
+    async def list_async(self, params=None, options=None):
+        self.started += 1
+        self.calls.append(dict(params))
+        self.lanes.append(current_lane())
+        await asyncio.sleep(self.delay)
+        if self.fail_at is not None and len(self.calls) > self.fail_at:
+            raise ConnectionError("boom")
+        objects = self.objects
+        if "starting_after" in params:
+            ids = [o["id"] for o in objects]
+            objects = objects[ids.index(params["starting_after"]) + 1 :]
+        page = objects[: params["limit"]]
+        return SimpleNamespace(data=page, has_more=len(objects) > len(page))
+
+
+def client(service):
+    return SimpleNamespace(balance_transactions=service, charges=service)
+
+
+@pytest.mark.asyncio
+async def test_streams_every_page_with_max_page_size_and_filters():
+    service = PagedService(250)
+    stream = admin.stream_stripe(
+        client(service), "balance_transactions", created={"gte": 10, "lt": 20}, type="charge"
+    )
+    ids = [item["id"] async for item in stream]
+    assert ids == [f"obj_{n}" for n in range(250)]
+    assert [c.get("starting_after") for c in service.calls] == [None, "obj_99", "obj_199"]
+    assert all(c["limit"] == 100 and c["created"] == {"gte": 10, "lt": 20} for c in service.calls)
+    assert all(c["type"] == "charge" for c in service.calls)
+    assert service.lanes == [BATCH] * 3
+
+
+@pytest.mark.asyncio
+async def test_next_page_is_prefetched_while_consuming():
+    service = PagedService(150, delay=0.01)
+    stream = admin.stream_stripe(client(service), "charges")
+    first = await stream.__anext__()
+    assert first["id"] == "obj_0"
+    await asyncio.sleep(0)
+    # The first page has arrived and the second request is already in flight
+    assert service.started == 2
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_early_exit_cancels_prefetch_and_errors_raise_runtime_error():
+    service = PagedService(500, delay=0.01)
+    async for item in admin.stream_stripe(client(service), "charges"):
+        break
+    await asyncio.sleep(0.02)
+    assert service.started == 2
+
+    failing = PagedService(300, fail_at=1)
+    with pytest.raises(RuntimeError):
+        [item async for item in admin.stream_stripe(client(failing), "charges")]
+
+
+def test_list_aliases_cover_every_registered_resource():
+    for resource in pagination.RESOURCES:
+        alias = getattr(admin, f"list_stripe_{resource}")
+        assert alias.__name__ == f"list_stripe_{resource}"
+    assert admin.list_stripe_balance_transactions.__doc__ == "list Stripe balance transactions using the Stripe SDK."
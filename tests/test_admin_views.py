@@ -0,0 +1,123 @@
+"""
+Test suite for the streaming admin routes (sdk/admin_views.py).
+- Stripe list endpoints are replaced by an in-memory paginated service.
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_current_user
+from app.core.third_party_integrations.stripe_home.client import get_stripe_client
+from app.core.third_party_integrations.stripe_home.config import ValkeyConfig
+from app.core.third_party_integrations.stripe_home.sdk import admin_views, mirror
+from app.core.third_party_integrations.stripe_home.sdk.admin_views import router
+from app.core.third_party_integrations.stripe_home.sdk.mirror import MirrorStore, StripeMirror
+
+
+class PagedService:
+    """list_async over `total` objects, newest first, like Stripe's cursor pagination."""
+
+    def __init__(self, total, fail_at=None):
+        self.objects = [{"id": f"ch_{n:03d}", "created": 1000 - n} for n in range(total)]
+        self.fail_at = fail_at
+        self.calls = []
+
+    async def list_async(self, params=None, options=None):
+        self.calls.append(dict(params))
+        if self.fail_at is not None and len(self.calls) > self.fail_at:
+            raise ConnectionError("boom")
+        objects = self.objects
+        if "starting_after" in params:
+            ids = [o["id"] for o in objects]
+            objects = objects[ids.index(params["starting_after"]) + 1 :]
+        page = objects[: params["limit"]]
+        return SimpleNamespace(data=page, has_more=len(objects) > len(page))
+
+
+def make_client(service, staff=True):
+    app = FastAPI()
+    app.include_router(router, prefix="/stripe")
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(is_staff=staff)
+    app.dependency_overrides[get_stripe_client] = lambda: SimpleNamespace(charges=service)
+    return TestClient(app)
+
+
+def test_streams_ndjson_with_created_filter_and_resume_cursor():
+    service = PagedService(250)
+    client = make_client(service)
+    response = client.get("/stripe/admin/charges?created_gte=10&created_lt=2000&starting_after=ch_009")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    ids = [json.loads(line)["id"] for line in response.text.splitlines()]
+    assert ids == [f"ch_{n:03d}" for n in range(10, 250)]
+    assert service.calls[0]["created"] == {"gte": 10, "lt": 2000}
+    assert service.calls[0]["starting_after"] == "ch_009"
+
+
+def test_json_array_format_and_empty_results():
+    client = make_client(PagedService(150))
+    assert [o["id"] for o in client.get("/stripe/admin/charges?format=json").json()] == [
+        f"ch_{n:03d}" for n in range(150)
+    ]
+    empty = make_client(PagedService(0))
+    assert empty.get("/stripe/admin/charges?format=json").json() == []
+    assert empty.get("/stripe/admin/charges").text == ""
+
+
+def test_errors_access_and_unknown_resources():
+    # Failure after the first page: reported in-band with the resume cursor
+    lines = make_client(PagedService(250, fail_at=1)).get("/stripe/admin/charges").text.splitlines()
+    assert len(lines) == 101
+    assert json.loads(lines[-1]) == {"error": {"message": "Stripe API error", "starting_after": "ch_099"}}
+    # Failure on the first page: a real status code
+    assert make_client(PagedService(10, fail_at=0)).get("/stripe/admin/charges").status_code == 502
+    assert make_client(PagedService(10), staff=False).get("/stripe/admin/charges").status_code == 403
+    assert make_client(PagedService(10)).get("/stripe/admin/widgets").status_code == 404
+
+
+def test_mirror_routes_read_the_local_mirror(monkeypatch):
+    store = MirrorStore(":memory:")
+    store.upsert_many("charges", PagedService(5).objects, version=1)
+    monkeypatch.setattr(mirror, "_mirror", StripeMirror(store))
+    service = PagedService(0)
+    client = make_client(service)
+
+    monkeypatch.setattr(ValkeyConfig, "STRIPE_MIRROR_ENABLED", False)
+    assert client.get("/stripe/admin/mirror/charges").status_code == 404
+    monkeypatch.setattr(ValkeyConfig, "STRIPE_MIRROR_ENABLED", True)
+
+    page = client.get("/stripe/admin/mirror/charges?limit=2&created_lte=999").json()
+    assert [o["id"] for o in page["data"]] == ["ch_001", "ch_002"] and page["has_more"]
+    rest = client.get("/stripe/admin/mirror/charges?starting_after=ch_002").json()
+    assert [o["id"] for o in rest["data"]] == ["ch_003", "ch_004"] and not rest["has_more"]
+    assert client.get("/stripe/admin/mirror/charges/ch_000").json()["created"] == 1000
+    assert client.get("/stripe/admin/mirror/charges/ch_999").status_code == 404
+    assert client.get("/stripe/admin/mirror/widgets").status_code == 404
+    assert make_client(service, staff=False).get("/stripe/admin/mirror/charges").status_code == 403
+    assert service.calls == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("body", [admin_views._ndjson, admin_views._json_array])
+async def test_bodies_close_the_page_stream_when_abandoned(body):
+    closed = []
+
+    async def stream():
+        try:
+            for n in range(1, 10):
+                yield {"id": f"ch_{n}"}
+        finally:
+            closed.append(True)
+
+    pages = stream()
+    await anext(pages)  # started, like the route's first-page pull
+    chunks = body({"id": "ch_0"}, pages)
+    await anext(chunks)
+    await anext(chunks)
+    # Client disconnect: the server closes the body generator
+    await chunks.aclose()
+    assert closed == [True]
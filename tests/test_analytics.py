@@ -0,0 +1,134 @@
+"""
+Test suite for the local analytical store (sdk/analytics.py).
+- Uses an in-memory SQLite store and in-memory paginated Stripe services.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.third_party_integrations.stripe_home.sdk.analytics import (
+    AnalyticsStore,
+    StripeAnalytics,
+    subscription_mrr,
+)
+
+DAY = 86400
+T0 = 1767225600  # 2026-01-01 UTC
+
+
+def subscription(id, status="active", items=((1000, "month", 1, 1),), **extra):
+    return {
+        "id": id,
+        "object": "subscription",
+        "customer": f"cus_{id}",
+        "currency": "usd",
+        "status": status,
+        "items": {
+            "data": [
+                {"quantity": qty, "price": {"unit_amount": amount, "recurring": {"interval": interval, "interval_count": count}}}
+                for amount, interval, count, qty in items
+            ]
+        },
+        **extra,
+    }
+
+
+def event(type, obj, created):
+    return SimpleNamespace(type=type, created=created, data=SimpleNamespace(object=obj))
+
+
+class ListService:
+    def __init__(self, objects):
+        self.objects = sorted(objects, key=lambda o: (-o["created"], o["id"]))
+        self.calls = []
+
+    async def list_async(self, params=None, options=None):
+        self.calls.append(dict(params))
+        objects = self.objects
+        if "created" in params:
+            objects = [o for o in objects if o["created"] >= params["created"]["gte"]]
+        if "starting_after" in params:
+            ids = [o["id"] for o in objects]
+            objects = objects[ids.index(params["starting_after"]) + 1 :]
+        page = objects[: params["limit"]]
+        return SimpleNamespace(data=page, has_more=len(objects) > len(page))
+
+
+@pytest.fixture
+def analytics():
+    return StripeAnalytics(AnalyticsStore(":memory:"))
+
+
+def test_subscription_mrr_normalizes_intervals():
+    assert subscription_mrr(subscription("a", items=[(12000, "year", 1, 1), (500, "month", 1, 3)])) == 2500
+    assert subscription_mrr(subscription("b", items=[(3000, "month", 3, 1)])) == 1000
+    assert subscription_mrr(subscription("c", status="trialing")) == 0
+    legacy = {"status": "active", "items": {"data": [{"plan": {"amount": 700, "interval": "month"}}]}}
+    assert subscription_mrr(legacy) == 700
+
+
+@pytest.mark.asyncio
+async def test_events_maintain_daily_movements_and_mrr_series(analytics):
+    await analytics.apply_event(event("customer.subscription.created", subscription("a"), T0))
+    await analytics.apply_event(event("customer.subscription.created", subscription("b"), T0 + 60))
+    await analytics.apply_event(
+        event("customer.subscription.updated", subscription("a", items=[(1000, "month", 1, 3)]), T0 + DAY)
+    )
+    await analytics.apply_event(event("customer.subscription.updated", subscription("b", items=[(400, "month", 1, 1)]), T0 + DAY))
+    # Out of order: older than the stored state, ignored
+    await analytics.apply_event(event("customer.subscription.updated", subscription("a"), T0 + 10))
+    await analytics.apply_event(event("customer.subscription.deleted", subscription("b", status="canceled"), T0 + 2 * DAY))
+
+    store = analytics.store
+    day1, day2 = store.movements("usd", "2026-01-02", "2026-01-02")[0], store.movements("usd", "2026-01-01", "2026-01-01")[0]
+    assert (day2["new_mrr"], day2["new_count"]) == (2000, 2)
+    assert (day1["expansion_mrr"], day1["contraction_mrr"]) == (2000, 600)
+    assert [(r["day"], r["mrr"], r["net_new"]) for r in store.mrr_series("usd", "2026-01-01", "2026-01-31")] == [
+        ("2026-01-01", 2000, 2000),
+        ("2026-01-02", 3400, 1400),
+        ("2026-01-03", 3000, -400),
+    ]
+    assert store.current_mrr("usd") == 3000
+    assert not await analytics.apply_event(event("charge.succeeded", {"id": "ch_1"}, T0))
+
+
+@pytest.mark.asyncio
+async def test_revenue_is_counted_once_across_syncs_and_webhooks(analytics):
+    txns = [
+        {"id": "txn_1", "created": T0, "currency": "usd", "amount": 1000, "fee": 59, "net": 941, "reporting_category": "charge"},
+        {"id": "txn_2", "created": T0 + 5, "currency": "usd", "amount": -300, "fee": 0, "net": -300, "reporting_category": "refund"},
+        # Money leaving the balance, not revenue
+        {"id": "txn_3", "created": T0 + 9, "currency": "usd", "amount": -641, "fee": 0, "net": -641, "reporting_category": "payout"},
+    ]
+    invoice = {"id": "in_1", "created": T0, "currency": "usd", "status": "paid", "amount_paid": 1000,
+               "status_transitions": {"paid_at": T0 + DAY}}
+    service = ListService(txns)
+    stripe = SimpleNamespace(balance_transactions=service, invoices=ListService([invoice]))
+    assert await analytics.sync_revenue(stripe) == {"balance_transactions": 2, "invoices": 1}
+    await analytics.apply_event(event("invoice.paid", invoice, T0 + DAY))
+    assert await analytics.sync_revenue(stripe) == {"balance_transactions": 0, "invoices": 0}
+    assert service.calls[-1]["created"] == {"gte": T0 + 9}
+
+    day1, day2 = analytics.store.revenue("usd", "2026-01-01", "2026-01-02")
+    assert (day1["gross"], day1["refunds"], day1["fees"], day1["net"]) == (1000, 300, 59, 641)
+    assert (day2["invoices_paid"], day2["invoices_paid_count"]) == (1000, 1)
+
+
+@pytest.mark.asyncio
+async def test_backfill_seeds_history_once(analytics):
+    subs = [
+        subscription("a", created=T0, start_date=T0),
+        subscription("b", status="canceled", created=T0 + 1, start_date=T0 + 1, ended_at=T0 + 3 * DAY),
+        # Never paid, or canceled before its trial ended: never part of MRR
+        subscription("c", status="incomplete_expired", created=T0 + 2, start_date=T0 + 2, ended_at=T0 + DAY),
+        subscription("d", status="canceled", created=T0 + 3, start_date=T0 + 3, trial_end=T0 + 7 * DAY, ended_at=T0 + 5 * DAY),
+    ]
+    stripe = SimpleNamespace(
+        subscriptions=ListService(subs), balance_transactions=ListService([]), invoices=ListService([])
+    )
+    assert (await analytics.backfill(stripe))["subscriptions"] == 4
+    assert (await analytics.backfill(stripe))["subscriptions"] == 0
+    series = analytics.store.mrr_series("usd", "2026-01-01", "2026-12-31")
+    assert [(r["day"], r["mrr"]) for r in series] == [("2026-01-01", 2000), ("2026-01-04", 1000)]
+    assert analytics.store.current_mrr("usd") == 1000
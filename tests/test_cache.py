@@ -0,0 +1,69 @@
+"""
+Test suite for the two-tier cache (cache.py).
+- Valkey is replaced by a dict-backed async stub.
+"""
+
+import pytest
+import valkey
+
+from app.core.third_party_integrations.stripe_home.cache import TieredCache, TTLCache
+
+
+class MockAsyncValkey:
+    def __init__(self, fail=False):
+        self.data, self.fail, self.gets = {}, fail, 0
+
+    def _check(self):
+        if self.fail:
+            raise valkey.ConnectionError("down")
+
+    async def get(self, key):
+        self._check()
+        self.gets += 1
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self._check()
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        self._check()
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    async def scan_iter(self, match):
+        for key in list(self.data):
+            if key.startswith(match.rstrip("*")):
+                yield key
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1
+    now[0] = 11
+    assert cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_fills_local_tier_from_valkey():
+    shared = MockAsyncValkey()
+    writer = TieredCache("t", async_client=shared)
+    reader = TieredCache("t", async_client=shared)
+    await writer.aset("k", {"v": 1})
+    assert await reader.aget("k") == {"v": 1}
+    assert await reader.aget("k") == {"v": 1}
+    assert shared.gets == 1
+    await writer.aclear()
+    assert shared.data == {} and await writer.aget("k") is None
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_fails_open_when_valkey_is_down():
+    cache = TieredCache("t", async_client=MockAsyncValkey(fail=True))
+    await cache.aset("k", 1)
+    assert await cache.aget("k") == 1
+    assert await cache.aget("missing", "default") == "default"
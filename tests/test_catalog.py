@@ -0,0 +1,120 @@
+"""
+Test suite for the materialized product catalog (sdk/catalog.py).
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+import stripe
+
+from app.core.third_party_integrations.stripe_home.cache import TieredCache
+from app.core.third_party_integrations.stripe_home.sdk import catalog as catalog_module
+from app.core.third_party_integrations.stripe_home.sdk.catalog import (
+    Catalog,
+    CatalogSnapshot,
+    build_catalog,
+)
+from app.core.third_party_integrations.stripe_home.sdk.webhooks import dispatch_event
+
+
+class MockPage:
+    def __init__(self, objects):
+        self.objects = objects
+
+    async def _iter(self):
+        for obj in self.objects:
+            yield obj
+
+    def auto_paging_iter(self):
+        return self._iter()
+
+
+def mock_client(products, prices):
+    async def products_list(params):
+        return MockPage([stripe.Product.construct_from(p, "sk_test") for p in products])
+
+    async def prices_list(params):
+        return MockPage([stripe.Price.construct_from(p, "sk_test") for p in prices])
+
+    return SimpleNamespace(
+        products=SimpleNamespace(list_async=products_list),
+        prices=SimpleNamespace(list_async=prices_list),
+    )
+
+
+@pytest.mark.asyncio
+async def test_build_catalog_joins_local_plans_in_one_query():
+    client = mock_client(
+        [{"id": "prod_b", "name": "B"}, {"id": "prod_a", "name": "A"}],
+        [
+            {"id": "price_1", "product": "prod_a", "recurring": {"interval": "month"}},
+            {"id": "price_2", "product": "prod_a", "recurring": None},
+            {"id": "price_3", "product": "prod_b", "recurring": {"interval": "year"}},
+        ],
+    )
+    queries = []
+
+    def load_local_plans(plan_ids):
+        queries.append(sorted(plan_ids))
+        return {"price_1": {"id": 1, "initial_credits": 10, "monthly_credits": 5, "active": True}}
+
+    catalog = await build_catalog(client, load_local_plans)
+    assert queries == [["price_1", "price_3"]]
+    assert [entry["product"]["id"] for entry in catalog] == ["prod_a", "prod_b"]
+    assert [p["id"] for p in catalog[0]["prices"]] == ["price_1", "price_2"]
+    assert catalog[0]["local_plans"][0]["initial_credits"] == 10
+    assert catalog[1]["local_plans"] == []
+
+
+def test_etag_is_stable_and_matches_conditional_headers():
+    first = CatalogSnapshot.from_data([{"b": 1, "a": 2}])
+    assert first.etag == CatalogSnapshot.from_data([{"a": 2, "b": 1}]).etag
+    assert first.etag != CatalogSnapshot.from_data([{"a": 3}]).etag
+    assert first.matches(first.etag)
+    assert first.matches(f'"other", W/{first.etag}')
+    assert first.matches("*")
+    assert not first.matches('"other"') and not first.matches(None)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_built_once_and_webhook_bursts_coalesce():
+    builds = []
+
+    async def builder(_client):
+        builds.append(1)
+        await asyncio.sleep(0.01)
+        return [{"build": len(builds)}]
+
+    catalog = Catalog(TieredCache("test:catalog"), builder=builder)
+    snapshots = await asyncio.gather(*(catalog.get(None) for _ in range(5)))
+    assert len(builds) == 1 and len({s.etag for s in snapshots}) == 1
+
+    # A burst before the rebuild starts needs one build
+    for _ in range(10):
+        task = catalog.schedule_rebuild(None)
+    await task
+    assert len(builds) == 2
+    # Events landing mid-build trigger exactly one follow-up
+    task = catalog.schedule_rebuild(None)
+    await asyncio.sleep(0.005)
+    for _ in range(10):
+        catalog.schedule_rebuild(None)
+    await task
+    assert len(builds) == 4
+    assert (await catalog.get(None)).body == b'[{"build":4}]'
+
+
+@pytest.mark.asyncio
+async def test_webhook_rebuilds_only_a_started_catalog(monkeypatch):
+    event = SimpleNamespace(type="price.updated", data=SimpleNamespace(object={"id": "price_1"}))
+    monkeypatch.setattr(catalog_module, "get_stripe_client", lambda: pytest.fail("no catalog to rebuild"))
+    assert await dispatch_event(event)
+
+    scheduled = []
+    started = Catalog(TieredCache("test:catalog:webhook"))
+    monkeypatch.setattr(started, "schedule_rebuild", scheduled.append)
+    monkeypatch.setattr(catalog_module, "_catalog", started)
+    monkeypatch.setattr(catalog_module, "get_stripe_client", lambda: "client")
+    await dispatch_event(event)
+    assert scheduled == ["client"]
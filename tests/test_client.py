@@ -0,0 +1,61 @@
+"""
+Test suite for the pooled StripeClient registry.
+- No network calls: clients are only constructed, never used.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.third_party_integrations.stripe_home.client import (
+    PooledHTTPXClient,
+    StripeClientRegistry,
+    get_stripe_client,
+)
+
+
+def test_registry_reuses_client_per_key():
+    registry = StripeClientRegistry()
+    first = registry.get("sk_test_123", "2024-06-20")
+    assert registry.get("sk_test_123", "2024-06-20") is first
+    assert registry.get("sk_test_123", "2025-01-27") is not first
+    assert registry.get("sk_live_123", "2024-06-20") is not first
+
+
+def test_registry_key_tracks_livemode():
+    assert StripeClientRegistry.make_key("sk_test_1") == ("sk_test_1", False, None)
+    assert StripeClientRegistry.make_key("sk_live_1", "v") == ("sk_live_1", True, "v")
+
+
+def test_registry_is_safe_under_concurrency():
+    registry = StripeClientRegistry()
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        clients = list(executor.map(lambda _: registry.get("sk_test_abc"), range(64)))
+    assert all(client is clients[0] for client in clients)
+
+
+def test_registry_close_drops_clients():
+    registry = StripeClientRegistry()
+    first = registry.get("sk_test_123")
+    registry.close()
+    assert registry.get("sk_test_123") is not first
+
+
+def test_get_stripe_client_direct_call_does_not_touch_global_key():
+    import stripe
+
+    stripe.api_key = None
+    client = get_stripe_client()
+    assert client is get_stripe_client()
+    assert stripe.api_key is None
+
+
+def test_pooled_async_transport_builds_one_client_with_pool_limits(monkeypatch):
+    import httpx
+
+    built = []
+    real = httpx.AsyncClient
+    monkeypatch.setattr(httpx, "AsyncClient", lambda **kwargs: built.append(kwargs) or real(**kwargs))
+    transport = PooledHTTPXClient(max_connections=64, connect_timeout=2, read_timeout=30)
+    assert len(built) == 1
+    assert built[0]["limits"].max_connections == built[0]["limits"].max_keepalive_connections == 64
+    assert transport._client_async is not None
+    assert transport._timeout.connect == 2 and transport._timeout.read == 30
@@ -0,0 +1,155 @@
+"""
+Test suite for Stripe GET coalescing.
+- Uses an in-memory transport that blocks until released; no network calls.
+"""
+
+import asyncio
+import threading
+
+import pytest
+import stripe
+
+from app.core.third_party_integrations.stripe_home.client import StripeHTTPClient
+from app.core.third_party_integrations.stripe_home.coalesce import (
+    RequestCoalescer,
+    coalesce_key,
+    stripe_COALESCED_REQUESTS,
+)
+from app.core.third_party_integrations.stripe_home.retry import RetryPolicy
+
+URL = "https://api.stripe.com/v1/subscriptions/sub_123"
+AUTH = {"Authorization": "Bearer sk_test_a", "Stripe-Version": "2024-06-20"}
+OK = (b'{"id": "sub_123"}', 200, {})
+
+
+class GatedTransport(stripe.HTTPClient):
+    """Counts requests and holds each one until `release` is set."""
+
+    name = "gated"
+
+    def __init__(self, outcome=OK):
+        super().__init__()
+        self.outcome = outcome
+        self.calls = 0
+        self.release = threading.Event()
+
+    def request_with_retries(self, method, url, headers, post_data=None, max_network_retries=None, *, _usage=None):
+        self.calls += 1
+        self.release.wait(5)
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+    async def request_with_retries_async(self, method, url, headers, post_data=None, max_network_retries=None, *, _usage=None):
+        self.calls += 1
+        while not self.release.is_set():
+            await asyncio.sleep(0.001)
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+
+def make_client(outcome=OK):
+    transport = GatedTransport(outcome)
+    policy = RetryPolicy(attempts=0, backoff_type="constant", base=0, cap=0)
+    return StripeHTTPClient(transport, retry_policy=policy, coalescer=RequestCoalescer()), transport
+
+
+def coalesced(endpoint="/v1/subscriptions/{id}"):
+    return stripe_COALESCED_REQUESTS.labels(endpoint=endpoint)._value.get()
+
+
+def test_key_ignores_expand_order_and_unrelated_headers():
+    a = coalesce_key("get", f"{URL}?expand[0]=customer&expand[1]=latest_invoice", AUTH)
+    b = coalesce_key(
+        "get",
+        f"{URL}?expand%5B0%5D=latest_invoice&expand%5B1%5D=customer",
+        {**AUTH, "X-Stripe-Client-User-Agent": "x"},
+    )
+    assert a == b
+    assert a != coalesce_key("get", f"{URL}?expand[0]=customer", AUTH)
+    assert a != coalesce_key(
+        "get", f"{URL}?expand[0]=customer&expand[1]=latest_invoice", {**AUTH, "Stripe-Account": "acct_1"}
+    )
+    assert coalesce_key("post", URL, AUTH) is None
+
+
+def test_concurrent_sync_gets_share_one_request():
+    client, transport = make_client()
+    before = coalesced()
+    results = []
+
+    def call():
+        results.append(client.request_with_retries("get", URL, AUTH))
+
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while len(client.coalescer._inflight) == 0 or coalesced() - before < 4:
+        threading.Event().wait(0.001)
+    transport.release.set()
+    for thread in threads:
+        thread.join()
+    assert transport.calls == 1
+    assert results == [OK] * 5
+    assert len(client.coalescer) == 0
+
+
+def test_sync_error_reaches_every_waiter():
+    client, transport = make_client(stripe.APIConnectionError("down"))
+    errors = []
+
+    def call():
+        try:
+            client.request_with_retries("get", URL, AUTH)
+        except stripe.APIConnectionError as e:
+            errors.append(e)
+
+    before = coalesced()
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while coalesced() - before < 2:
+        threading.Event().wait(0.001)
+    transport.release.set()
+    for thread in threads:
+        thread.join()
+    assert transport.calls == 1
+    assert len(errors) == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_async_gets_share_one_request():
+    client, transport = make_client()
+    before = coalesced()
+    calls = [asyncio.ensure_future(client.request_with_retries_async("get", URL, AUTH)) for _ in range(4)]
+    await asyncio.sleep(0.01)
+    transport.release.set()
+    assert await asyncio.gather(*calls) == [OK] * 4
+    assert transport.calls == 1
+    assert coalesced() - before == 3
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_abort_shared_request():
+    client, transport = make_client()
+    first = asyncio.ensure_future(client.request_with_retries_async("get", URL, AUTH))
+    second = asyncio.ensure_future(client.request_with_retries_async("get", URL, AUTH))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    transport.release.set()
+    assert await second == OK
+    assert transport.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_writes_and_sequential_gets_are_not_coalesced():
+    client, transport = make_client()
+    transport.release.set()
+    await client.request_with_retries_async("get", URL, AUTH)
+    await client.request_with_retries_async("get", URL, AUTH)
+    await asyncio.gather(
+        client.request_with_retries_async("post", URL, AUTH),
+        client.request_with_retries_async("post", URL, AUTH),
+    )
+    assert transport.calls == 4
@@ -0,0 +1,140 @@
+"""
+Test suite for cached customer resolution (sdk/customers.py).
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.third_party_integrations.stripe_home.cache import AsyncSingleFlight, TieredCache
+from app.core.third_party_integrations.stripe_home.sdk import customers as customers_module
+from app.core.third_party_integrations.stripe_home.sdk.customers import CustomerResolver, idempotency_key
+from app.core.third_party_integrations.stripe_home.sdk.webhooks import dispatch_event
+
+USER = SimpleNamespace(id=42, email="a@example.com", username="alice")
+
+
+class MockCustomers:
+    def __init__(self):
+        self.calls = []
+
+    async def create_async(self, params, options=None):
+        self.calls.append(options)
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(id="cus_new")
+
+
+def make_resolver(existing=None):
+    saved = []
+    resolver = CustomerResolver(
+        TieredCache("test:customer"),
+        load=lambda user: existing,
+        save=lambda user, customer_id: saved.append(customer_id) or customer_id,
+    )
+    return resolver, saved
+
+
+class MemoryLinks:
+    """user id -> customer id rows, standing in for the StripeCustomer table."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def load(self, user):
+        return self.rows.get(user.id)
+
+    def save(self, user, customer_id):
+        return self.rows.setdefault(user.id, customer_id)
+
+    def delete(self, user_id, customer_id):
+        if self.rows.get(user_id) == customer_id:
+            del self.rows[user_id]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_create_one_customer_with_idempotency_key():
+    resolver, saved = make_resolver()
+    client = SimpleNamespace(customers=MockCustomers())
+    results = await asyncio.gather(*(resolver.resolve(USER, client) for _ in range(10)))
+    assert results == ["cus_new"] * 10
+    assert len(client.customers.calls) == 1
+    assert client.customers.calls[0]["idempotency_key"].startswith("customer-create-42-")
+    assert saved == ["cus_new"]
+
+
+@pytest.mark.asyncio
+async def test_existing_customer_is_cached_without_stripe_call():
+    resolver, _ = make_resolver(existing="cus_old")
+    client = SimpleNamespace(customers=MockCustomers())
+    assert await resolver.resolve(USER, client) == "cus_old"
+    resolver._load = lambda user: pytest.fail("database hit on cached user")
+    assert await resolver.resolve(USER, client) == "cus_old"
+    assert client.customers.calls == []
+
+
+@pytest.mark.asyncio
+async def test_singleflight_shares_failures_and_forgets_after_settling():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def boom():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("stripe down")
+
+    results = await asyncio.gather(*(flight.do("k", boom) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results) and calls == [1]
+    await asyncio.sleep(0)
+    assert len(flight) == 0
+
+
+def test_idempotency_key_changes_with_params_and_generation():
+    params = {"email": "a@example.com", "name": "alice", "metadata": {"user_id": "42"}}
+    key = idempotency_key(42, params)
+    assert key == idempotency_key(42, dict(params))
+    assert key != idempotency_key(42, {**params, "email": "b@example.com"})
+    assert key != idempotency_key(42, params, generation="cus_deleted")
+
+
+@pytest.mark.asyncio
+async def test_deleted_customer_is_forgotten_and_recreated_with_a_new_key():
+    links = MemoryLinks()
+    resolver = CustomerResolver(TieredCache("test:customer:deleted"), load=links.load, save=links.save, delete=links.delete)
+    client = SimpleNamespace(customers=MockCustomers())
+    assert await resolver.resolve(USER, client) == "cus_new"
+
+    await resolver.forget(USER.id, "cus_new")
+    assert links.rows == {}
+    assert await resolver.lookup(USER) is None
+    await resolver.resolve(USER, client)
+    first, second = (call["idempotency_key"] for call in client.customers.calls)
+    assert first != second
+
+
+@pytest.mark.asyncio
+async def test_user_without_customer_is_negatively_cached_until_created(monkeypatch):
+    links = MemoryLinks()
+    loads = []
+    resolver = CustomerResolver(
+        TieredCache("test:customer:negative"),
+        load=lambda user: loads.append(user.id) or links.load(user),
+        save=links.save,
+    )
+    monkeypatch.setattr(customers_module, "_resolver", resolver)
+    assert await resolver.lookup(USER) is None
+    assert await resolver.lookup(USER) is None
+    assert loads == [42]
+
+    # Created elsewhere (e.g. the dashboard): the webhook clears the marker
+    links.rows[USER.id] = "cus_other"
+    customer = {"id": "cus_other", "metadata": {"user_id": "42"}}
+    created = SimpleNamespace(type="customer.created", data=SimpleNamespace(object=customer))
+    assert await dispatch_event(created)
+    assert await resolver.lookup(USER) == "cus_other"
+
+    # Created through checkout: resolve() clears it too
+    other = SimpleNamespace(id=43, email="b@example.com", username="bob")
+    assert await resolver.lookup(other) is None
+    assert await resolver.resolve(other, SimpleNamespace(customers=MockCustomers())) == "cus_new"
+    assert await resolver.lookup(other) == "cus_new"
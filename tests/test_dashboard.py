@@ -0,0 +1,102 @@
+"""
+Test suite for the customer dashboard service (sdk/dashboard.py).
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.third_party_integrations.stripe_home.cache import TieredCache
+from app.core.third_party_integrations.stripe_home.sdk import dashboard as dashboard_module
+from app.core.third_party_integrations.stripe_home.sdk import plan_cache as plan_cache_module
+from app.core.third_party_integrations.stripe_home.sdk.dashboard import DashboardService
+from app.core.third_party_integrations.stripe_home.sdk.plan_cache import PlanCache
+from app.core.third_party_integrations.stripe_home.sdk.webhooks import dispatch_event
+
+SUBSCRIPTION = {
+    "id": "sub_1",
+    "status": "active",
+    "items": {"data": [{"price": {"id": "price_pro", "nickname": "Pro", "unit_amount": 2000,
+                                   "currency": "usd", "recurring": {"interval": "month"}},
+                         "current_period_start": 1, "current_period_end": 2}]},
+    "latest_invoice": {"id": "in_1", "amount_paid": 2000, "currency": "usd", "status": "paid"},
+}
+CARDS = [
+    {"id": f"pm_{i}", "card": {"brand": "visa", "last4": "4242", "exp_month": 1, "exp_year": 2030}}
+    for i in range(4)
+]
+
+
+class MockStripe:
+    def __init__(self):
+        self.calls = []
+        self.subscriptions = SimpleNamespace(list_async=self._handler("subscriptions", [SUBSCRIPTION] * 3))
+        self.payment_methods = SimpleNamespace(list_async=self._handler("payment_methods", CARDS))
+        self.customers = SimpleNamespace(retrieve_async=self._customer)
+
+    def _handler(self, name, data):
+        async def list_async(params):
+            self.calls.append((name, params))
+            await asyncio.sleep(0.01)
+            return SimpleNamespace(data=data)
+
+        return list_async
+
+    async def _customer(self, customer_id):
+        self.calls.append(("customers", customer_id))
+        return {"id": customer_id, "livemode": False, "invoice_settings": {"default_payment_method": "pm_2"}}
+
+
+@pytest.fixture(autouse=True)
+def plans(monkeypatch):
+    monkeypatch.setattr(
+        plan_cache_module, "_plan_cache", PlanCache(TieredCache("test:plan"), loader=lambda **_: None)
+    )
+
+
+def make_service(now):
+    return DashboardService(TieredCache("test:dashboard"), fresh_ttl=30, clock=lambda: now[0])
+
+
+@pytest.mark.asyncio
+async def test_fetch_makes_three_calls_regardless_of_subscriptions_and_cards():
+    stripe_client = MockStripe()
+    data = await make_service([0]).get("cus_1", stripe_client)
+    assert sorted(name for name, _ in stripe_client.calls) == ["customers", "payment_methods", "subscriptions"]
+    assert dict(stripe_client.calls)["subscriptions"]["expand"] == ["data.latest_invoice"]
+    assert len(data["subscriptions"]) == 3 and data["subscriptions"][0]["latest_invoice"]["id"] == "in_1"
+    assert data["subscriptions"][0]["plan_name"] == "Pro"
+    assert [pm["is_default"] for pm in data["payment_methods"]] == [False, False, True, False]
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_served_then_refreshed_once():
+    now = [0]
+    service = make_service(now)
+    stripe_client = MockStripe()
+    await service.get("cus_1", stripe_client)
+    await service.get("cus_1", stripe_client)
+    assert len(stripe_client.calls) == 3
+
+    now[0] = 60
+    service.cache.local.clear()  # force the Valkey-tier path as another worker would see it
+    service.cache.local.set("cus_1", {"data": {"stale": True}, "fetched_at": 0})
+    results = await asyncio.gather(*(service.get("cus_1", stripe_client) for _ in range(5)))
+    assert all(r == {"stale": True} for r in results)
+    await asyncio.gather(*service._background)
+    assert len(stripe_client.calls) == 6
+    assert "subscriptions" in await service.get("cus_1", stripe_client)
+
+
+@pytest.mark.asyncio
+async def test_webhooks_invalidate_the_customer_entry(monkeypatch):
+    service = make_service([0])
+    monkeypatch.setattr(dashboard_module, "_dashboard", service)
+    await service.cache.aset("cus_1", {"data": {}, "fetched_at": 0})
+    event = SimpleNamespace(
+        type="customer.subscription.updated",
+        data=SimpleNamespace(object={"id": "sub_1", "customer": "cus_1"}),
+    )
+    await dispatch_event(event)
+    assert await service.cache.aget("cus_1") is None
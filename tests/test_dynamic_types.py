@@ -0,0 +1,38 @@
+"""
+Test suite for the prebuilt Stripe type registry snapshot (api/_dynamic_types.py).
+"""
+
+import stripe
+
+from app.core.third_party_integrations.stripe_home.api import _build_registry, _dynamic_types
+
+
+def test_registry_resolves_types_lazily():
+    assert "Customer" in _dynamic_types.STRIPE_TYPE_REGISTRY
+    assert _dynamic_types.STRIPE_TYPE_REGISTRY["Customer"] is stripe.Customer
+    assert _dynamic_types.Customer is stripe.Customer
+    assert "Customer" in _dynamic_types.__all__
+
+
+def test_shipped_snapshot_matches_installed_stripe():
+    # Fails after a stripe upgrade until the snapshot is regenerated and committed
+    version, paths = _build_registry.read_registry()
+    assert version == _build_registry.installed_stripe_version()
+    assert paths["Customer"] == ("stripe._customer", "Customer")
+
+
+def test_stale_snapshot_falls_back_to_reflection_without_writing(tmp_path, monkeypatch):
+    target = tmp_path / "_stripe_registry.py"
+    _build_registry.write_registry({"Customer": ("stripe._customer", "Customer")}, "0.0.0", target)
+    reflected = {"Customer": ("stripe._customer", "Customer"), "Charge": ("stripe._charge", "Charge")}
+    monkeypatch.setattr(_dynamic_types, "build_registry", lambda: reflected)
+
+    monkeypatch.setattr(_dynamic_types, "installed_stripe_version", lambda: "0.0.0")
+    assert _dynamic_types._load_type_paths(target) == {"Customer": ("stripe._customer", "Customer")}
+
+    monkeypatch.setattr(_dynamic_types, "installed_stripe_version", lambda: "0.0.1")
+    assert _dynamic_types._load_type_paths(target) == reflected
+    assert _dynamic_types._load_type_paths(tmp_path / "missing.py") == reflected
+    # Nothing is written back at import time
+    assert "STRIPE_VERSION = '0.0.0'" in target.read_text()
+    assert not list(tmp_path.glob("*.tmp"))
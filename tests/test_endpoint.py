@@ -86,6 +86,27 @@ def test_create_checkout_session_fastapi():
     assert response.status_code in (200, 201, 422)  # Adjust as needed
 
 
+def test_checkout_for_unknown_plan_is_404(mock_user):
+    """A plan missing from the plan cache is a 404, not a 500."""
+    plans = MagicMock()
+
+    async def get_by_id(plan_id):
+        return None
+
+    plans.get_by_id = get_by_id
+    app.dependency_overrides[get_current_user] = lambda: mock_user
+    try:
+        with patch("core.third_party_integrations.stripe_home.sdk.views.get_plan_cache", return_value=plans):
+            response = client.post(
+                "/stripe/checkout/999999",
+                json={"success_url": "https://example.com/success", "cancel_url": "https://example.com/cancel"},
+            )
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Plan not found"
+
+
 # Logic test for webhook event handling
 def test_webhook_event_handling():
     """Test webhook event handling logic (mocked)."""
@@ -0,0 +1,118 @@
+"""
+Test suite for the time-partitioned parallel export (sdk/export.py).
+- Stripe list endpoints are replaced by an in-memory service honoring `created`.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.third_party_integrations.stripe_home.sdk.export import WindowPlanner, export_stripe
+
+
+class CreatedService:
+    """Newest-first cursor pagination over objects filtered by a created range."""
+
+    def __init__(self, timestamps, delay=0.0, fail_window=None):
+        self.objects = sorted(
+            ({"id": f"ch_{n}", "created": ts} for n, ts in enumerate(timestamps)),
+            key=lambda o: (-o["created"], o["id"]),
+        )
+        self.delay, self.fail_window = delay, fail_window
+        self.active = self.peak = 0
+
+    async def list_async(self, params=None, options=None):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            created = params["created"]
+            if self.fail_window is not None and created["gte"] <= self.fail_window < created["lt"]:
+                raise ConnectionError("boom")
+            objects = [o for o in self.objects if created["gte"] <= o["created"] < created["lt"]]
+            if "starting_after" in params:
+                ids = [o["id"] for o in objects]
+                objects = objects[ids.index(params["starting_after"]) + 1 :]
+            page = objects[: params["limit"]]
+            return SimpleNamespace(data=page, has_more=len(objects) > len(page))
+        finally:
+            self.active -= 1
+
+
+def client(service):
+    return SimpleNamespace(charges=service)
+
+
+def timestamps():
+    # Sparse early history, a dense burst, then a gap and a few recent objects
+    return [100 * n for n in range(50)] + [10_000 + n // 3 for n in range(900)] + [50_000, 60_000, 60_000]
+
+
+@pytest.mark.asyncio
+async def test_ordered_export_matches_sequential_listing():
+    service = CreatedService(timestamps(), delay=0.001)
+    planner = WindowPlanner(0, 70_000, initial=2_000, target=200, min_window=10)
+    items = [o async for o in export_stripe(client(service), "charges", 0, 70_000, planner=planner, concurrency=4)]
+    assert [o["id"] for o in items] == [o["id"] for o in service.objects]
+    assert 1 < service.peak <= 8  # windows in flight x (page + prefetch)
+
+
+@pytest.mark.asyncio
+async def test_unordered_export_yields_every_object_once():
+    service = CreatedService(timestamps(), delay=0.001)
+    planner = WindowPlanner(0, 70_000, initial=500, target=100, min_window=10)
+    items = [
+        o async for o in export_stripe(client(service), "charges", 0, 70_000, ordered=False, planner=planner)
+    ]
+    assert sorted(o["id"] for o in items) == sorted(o["id"] for o in service.objects)
+
+
+def test_planner_adapts_window_to_density():
+    planner = WindowPlanner(0, 1_000_000, initial=1000, target=100, min_window=10, max_window=100_000)
+    window = planner.next()
+    assert window == (999_000, 1_000_000)
+    planner.observe(window, 0)
+    assert planner.size == 4000  # empty history widens the next window
+    planner.observe(planner.next(), 5000)
+    # 5000 objects over 5000s observed: windows of ~`target` objects
+    lo, hi = planner.next()
+    assert hi - lo == 100
+
+
+@pytest.mark.asyncio
+async def test_window_failure_surfaces_and_cancels_the_rest():
+    service = CreatedService(timestamps(), fail_window=10_100)
+    planner = WindowPlanner(0, 70_000, initial=1_000, target=200)
+    with pytest.raises(RuntimeError):
+        [o async for o in export_stripe(client(service), "charges", 0, 70_000, planner=planner)]
+    with pytest.raises(ValueError):
+        [o async for o in export_stripe(client(service), "widgets", 0, 1)]
+
+
+@pytest.mark.asyncio
+async def test_created_filter_is_rejected_before_any_request():
+    service = CreatedService(timestamps())
+    with pytest.raises(ValueError, match="start and end"):
+        async for _ in export_stripe(client(service), "charges", 0, 70_000, created={"gte": 10_000}):
+            pass
+    assert service.peak == 0
+
+
+@pytest.mark.asyncio
+async def test_ordered_export_keeps_fetching_later_windows_while_the_head_drains():
+    # Four dense windows of six pages each
+    service = CreatedService([w * 1000 + n for w in range(4) for n in range(600)], delay=0.001)
+    planner = WindowPlanner(0, 4000, initial=1000, target=600)
+    items = export_stripe(client(service), "charges", 0, 4000, planner=planner, concurrency=4)
+    calls = []
+    service.list_async = lambda params=None, options=None, list_async=service.list_async: (
+        calls.append(params["created"]["gte"]) or list_async(params, options)
+    )
+    first = await anext(items)
+    await asyncio.sleep(0.1)  # a slow consumer still on the head window
+    # Every window has fetched all of its pages, not just the first one
+    assert sorted(set(calls)) == [0, 1000, 2000, 3000]
+    assert all(calls.count(gte) == 6 for gte in (0, 1000, 2000, 3000))
+    rest = [o async for o in items]
+    assert [o["id"] for o in [first, *rest]] == [o["id"] for o in service.objects]
@@ -0,0 +1,145 @@
+"""
+Test suite for idempotent responses (sdk/idempotency.py).
+- Valkey is replaced by a dict-backed async stub shared by two "workers".
+"""
+
+import asyncio
+
+import pytest
+import stripe
+import valkey
+
+from app.core.third_party_integrations.stripe_home.api._exceptions import (
+    StripeIdempotencyConflict,
+    StripeIdempotencyInProgress,
+)
+from app.core.third_party_integrations.stripe_home.sdk import idempotency
+from app.core.third_party_integrations.stripe_home.sdk.idempotency import (
+    MAX_KEY_LENGTH,
+    STRIPE_MAX_KEY_LENGTH,
+    IdempotencyStore,
+    fingerprint,
+    idempotent,
+    stripe_idempotency_key,
+)
+
+
+class MockAsyncValkey:
+    def __init__(self, fail=False):
+        self.data, self.fail = {}, fail
+
+    def _check(self):
+        if self.fail:
+            raise valkey.ConnectionError("down")
+
+    async def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        self._check()
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def delete(self, *keys):
+        self._check()
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+
+class CreateCounter:
+    """Stands in for a Stripe create call; records the forwarded keys."""
+
+    def __init__(self, delay=0.0, error=None):
+        self.delay, self.error, self.keys = delay, error, []
+
+    async def __call__(self, stripe_key):
+        self.keys.append(stripe_key)
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"id": f"cs_{len(self.keys)}"}
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = IdempotencyStore(MockAsyncValkey(), poll_interval=0.001)
+    monkeypatch.setattr(idempotency, "_store", store)
+    return store
+
+
+@pytest.mark.asyncio
+async def test_retry_replays_stored_response_and_forwards_scoped_key(store):
+    create = CreateCounter()
+    first = await idempotent("checkout:1", "k1", {"plan": 1}, create)
+    again = await idempotent("checkout:1", "k1", {"plan": 1}, create)
+    assert first == ({"id": "cs_1"}, False)
+    assert again == ({"id": "cs_1"}, True)
+    assert create.keys == ["checkout:1:k1"]
+
+
+def test_forwarded_key_stays_within_stripe_limit_for_long_scopes():
+    key = "k" * MAX_KEY_LENGTH
+    alice = stripe_idempotency_key("payment_intent:" + "a" * 80, key)
+    bob = stripe_idempotency_key("payment_intent:" + "b" * 80, key)
+    assert len(alice) <= STRIPE_MAX_KEY_LENGTH
+    assert alice != bob
+    assert alice == stripe_idempotency_key("payment_intent:" + "a" * 80, key)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_wait_for_the_inflight_request(store):
+    create = CreateCounter(delay=0.01)
+    results = await asyncio.gather(*(idempotent("pi", "k", {"a": 1}, create) for _ in range(5)))
+    assert [r[0] for r in results] == [{"id": "cs_1"}] * 5
+    assert sum(replayed for _, replayed in results) == 4
+    assert len(create.keys) == 1
+
+
+@pytest.mark.asyncio
+async def test_other_worker_waits_on_pending_marker(store):
+    other_worker = IdempotencyStore(store.client, poll_interval=0.001)
+    create = CreateCounter(delay=0.02)
+    fp = fingerprint({"a": 1})
+    leader = asyncio.ensure_future(store.run("pi", "k", fp, lambda: create(None)))
+    await asyncio.sleep(0.005)
+    record, replayed = await other_worker.run("pi", "k", fp, lambda: create(None))
+    assert replayed and (record, False) == await leader and len(create.keys) == 1
+
+
+@pytest.mark.asyncio
+async def test_waiter_gives_up_after_wait(store):
+    other_worker = IdempotencyStore(store.client, wait=0.01, poll_interval=0.001)
+    fp = fingerprint({})
+    leader = asyncio.ensure_future(store.run("pi", "k", fp, lambda: CreateCounter(delay=0.05)(None)))
+    await asyncio.sleep(0.005)
+    with pytest.raises(StripeIdempotencyInProgress):
+        await other_worker.run("pi", "k", fp, lambda: CreateCounter()(None))
+    await leader
+
+
+@pytest.mark.asyncio
+async def test_key_reuse_with_other_payload_is_rejected(store):
+    await idempotent("pi", "k", {"amount": 100}, CreateCounter())
+    with pytest.raises(StripeIdempotencyConflict):
+        await idempotent("pi", "k", {"amount": 200}, CreateCounter())
+
+
+@pytest.mark.asyncio
+async def test_failure_releases_the_key(store):
+    with pytest.raises(stripe.APIConnectionError):
+        await idempotent("pi", "k", {}, CreateCounter(error=stripe.APIConnectionError("down")))
+    assert store.client.data == {}
+    assert await idempotent("pi", "k", {}, CreateCounter()) == ({"id": "cs_1"}, False)
+
+
+@pytest.mark.asyncio
+async def test_valkey_outage_and_missing_key_fall_through(monkeypatch):
+    monkeypatch.setattr(idempotency, "_store", IdempotencyStore(MockAsyncValkey(fail=True)))
+    create = CreateCounter()
+    assert await idempotent("pi", "k", {}, create) == ({"id": "cs_1"}, False)
+    assert await idempotent("pi", None, {}, create) == ({"id": "cs_2"}, False)
+    assert create.keys == ["pi:k", None]
+    with pytest.raises(stripe.InvalidRequestError):
+        await idempotent("pi", "x" * 300, {}, create)
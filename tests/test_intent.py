@@ -15,10 +15,10 @@ from app.core.third_party_integrations.stripe_home.sdk.intent import (
 
 
 class MockStripeClient:
-    class PaymentIntent:
+    class payment_intents:
         @staticmethod
-        def create(**kwargs):
-            if kwargs["amount"] <= 0:
+        async def create_async(params, options=None):
+            if params["amount"] <= 0:
                 raise ValueError("Amount must be positive")
             # Simulate Stripe response
             return {
@@ -61,3 +61,64 @@ async def test_create_payment_intent_invalid_amount(monkeypatch):
             currency="usd",
             payment_method="pm_card_visa"
         )
+
+
+class MemoryValkey:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+
+@pytest.mark.asyncio
+async def test_idempotency_keys_are_scoped_per_owner(monkeypatch):
+    from app.core.third_party_integrations.stripe_home import sdk
+    from app.core.third_party_integrations.stripe_home.sdk import idempotency
+
+    stripe_keys = []
+
+    class CountingClient:
+        class payment_intents:
+            @staticmethod
+            async def create_async(params, options=None):
+                stripe_keys.append(options["idempotency_key"])
+                n = len(stripe_keys)
+                return {
+                    "id": f"pi_{n}",
+                    "status": "requires_capture",
+                    "capture_method": "automatic_async",
+                    "client_secret": f"pi_{n}_secret",
+                    "latest_charge": None,
+                }
+
+    monkeypatch.setattr(sdk.intent, "get_stripe_client", lambda settings=None: CountingClient)
+    monkeypatch.setattr(idempotency, "_store", idempotency.IdempotencyStore(MemoryValkey()))
+    payload = PaymentIntentCreateRequest(amount=2000, currency="usd", payment_method="pm_card_visa")
+
+    alice = await create_payment_intent(payload, owner="cus_alice", idempotency_key="k1")
+    bob = await create_payment_intent(payload, owner="cus_bob", idempotency_key="k1")
+    assert alice.id != bob.id and alice.client_secret != bob.client_secret
+    assert stripe_keys == ["payment_intent:cus_alice:k1", "payment_intent:cus_bob:k1"]
+    # The same owner retrying still gets its own PaymentIntent back
+    assert (await create_payment_intent(payload, owner="cus_alice", idempotency_key="k1")).id == alice.id
+    assert len(stripe_keys) == 2
+
+
+@pytest.mark.asyncio
+async def test_idempotency_key_without_owner_is_rejected(monkeypatch):
+    from app.core.third_party_integrations.stripe_home import sdk
+    monkeypatch.setattr(sdk.intent, "get_stripe_client", mock_get_stripe_client)
+
+    payload = PaymentIntentCreateRequest(amount=2000, currency="usd", payment_method="pm_card_visa")
+    with pytest.raises(ValueError, match="owner"):
+        await create_payment_intent(payload, idempotency_key="k1")
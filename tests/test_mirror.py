@@ -0,0 +1,158 @@
+"""
+Test suite for the incremental Stripe mirror (sdk/mirror.py).
+- Uses an in-memory SQLite store and an in-memory paginated Stripe service.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.third_party_integrations.stripe_home.sdk.mirror import MirrorStore, StripeMirror
+
+
+class ListService:
+    """Newest-first listing honoring created.gte and starting_after; can fail mid-pass."""
+
+    def __init__(self, objects, fail_after_calls=None):
+        self.objects = objects
+        self.calls, self.fail_after_calls = [], fail_after_calls
+
+    def add(self, obj):
+        self.objects.append(obj)
+
+    async def list_async(self, params=None, options=None):
+        self.calls.append(dict(params))
+        if self.fail_after_calls is not None and len(self.calls) > self.fail_after_calls:
+            raise ConnectionError("boom")
+        objects = sorted(self.objects, key=lambda o: (o["created"], o["id"]), reverse=True)
+        if "created" in params:
+            created = params["created"]
+            objects = [o for o in objects if created["gte"] <= o["created"] < created.get("lt", float("inf"))]
+        if "starting_after" in params:
+            ids = [o["id"] for o in objects]
+            objects = objects[ids.index(params["starting_after"]) + 1 :]
+        page = objects[: params["limit"]]
+        return SimpleNamespace(data=page, has_more=len(objects) > len(page))
+
+
+def customers(n, start=0):
+    return [{"id": f"cus_{i:04d}", "object": "customer", "created": 1000 + i, "name": f"c{i}"} for i in range(start, start + n)]
+
+
+def event(type, obj, created):
+    return SimpleNamespace(type=type, created=created, data=SimpleNamespace(object=obj))
+
+
+@pytest.fixture
+def mirror():
+    return StripeMirror(MirrorStore(":memory:"), batch_size=50, clock=lambda: 5000)
+
+
+@pytest.mark.asyncio
+async def test_incremental_sync_fetches_only_new_objects(mirror):
+    service = ListService(customers(120))
+    stripe = SimpleNamespace(customers=service)
+    assert await mirror.sync("customers", stripe) == 120
+    assert mirror.store.cursor("customers")["high_water"] == 1119
+
+    service.add(customers(1, start=200)[0])
+    service.calls.clear()
+    written = await mirror.sync("customers", stripe)
+    assert service.calls[0]["created"] == {"gte": 1119}
+    assert written == 2  # the new object plus the one at the high-water second
+    assert mirror.store.count("customers") == 121
+    page = mirror.store.list("customers", limit=2)
+    assert [c["id"] for c in page] == ["cus_0200", "cus_0119"]
+    assert [c["id"] for c in mirror.store.list("customers", limit=1, starting_after="cus_0119")] == ["cus_0118"]
+    assert len(mirror.store.list("customers", created={"gte": 1100, "lt": 1110})) == 10
+
+
+@pytest.mark.asyncio
+async def test_interrupted_pass_resumes_from_last_written_id(mirror):
+    service = ListService(customers(250), fail_after_calls=2)
+    stripe = SimpleNamespace(customers=service)
+    with pytest.raises(RuntimeError):
+        await mirror.sync("customers", stripe)
+    cursor = mirror.store.cursor("customers")
+    assert cursor["pending_high_water"] == 1249 and cursor["resume_after"] == "cus_0050"
+
+    service.fail_after_calls = None
+    service.calls.clear()
+    await mirror.sync("customers", stripe)
+    assert service.calls[0]["starting_after"] == "cus_0050"
+    assert mirror.store.count("customers") == 250
+    assert mirror.store.cursor("customers") == {"high_water": 1249, "pending_high_water": None, "resume_after": None}
+
+
+@pytest.mark.asyncio
+async def test_events_update_and_delete_but_never_go_backwards(mirror):
+    obj = customers(1)[0]
+    await mirror.apply_event(event("customer.created", obj, 100))
+    await mirror.apply_event(event("customer.updated", {**obj, "name": "new"}, 300))
+    await mirror.apply_event(event("customer.updated", {**obj, "name": "stale"}, 200))
+    assert mirror.store.get("customers", obj["id"])["name"] == "new"
+    await mirror.apply_event(event("customer.deleted", obj, 400))
+    assert mirror.store.get("customers", obj["id"]) is None
+    sub = {"id": "sub_1", "object": "subscription", "created": 1, "status": "canceled"}
+    await mirror.apply_event(event("customer.subscription.deleted", sub, 500))
+    assert mirror.store.get("subscriptions", "sub_1")["status"] == "canceled"
+    assert not await mirror.apply_event(event("radar.early_fraud_warning.created", {"object": "radar.x"}, 1))
+
+
+class ApiEvent(SimpleNamespace):
+    """Event as returned by the events API: attribute and item access."""
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+
+@pytest.mark.asyncio
+async def test_sync_events_applies_deltas_from_the_events_api(mirror):
+    obj = customers(1)[0]
+    service = ListService(
+        [
+            ApiEvent(id="evt_1", created=10, type="customer.created", data=SimpleNamespace(object={**obj, "name": "a"})),
+            ApiEvent(id="evt_2", created=20, type="customer.updated", data=SimpleNamespace(object={**obj, "name": "b"})),
+        ]
+    )
+    stripe = SimpleNamespace(events=service)
+    assert await mirror.sync_events(stripe) == 2
+    assert mirror.store.get("customers", obj["id"])["name"] == "b"
+    # Windows up to now (the mirror's clock), oldest first
+    assert [call["created"] for call in service.calls] == [{"gte": 0, "lt": 3600}, {"gte": 3600, "lt": 5000}]
+    assert mirror.store.cursor("events")["high_water"] == 5000
+    await mirror.sync_events(stripe)
+    assert len(service.calls) == 2  # nothing new to fetch at the same clock
+
+
+@pytest.mark.asyncio
+async def test_sync_events_applies_same_second_events_oldest_first(mirror):
+    obj = customers(1)[0]
+    service = ListService(
+        [
+            ApiEvent(id="evt_1", created=30, type="customer.created", data=SimpleNamespace(object={**obj, "name": "a"})),
+            ApiEvent(id="evt_2", created=30, type="customer.updated", data=SimpleNamespace(object={**obj, "name": "b"})),
+            ApiEvent(id="evt_3", created=30, type="customer.updated", data=SimpleNamespace(object={**obj, "name": "c"})),
+        ]
+    )
+    assert await mirror.sync_events(SimpleNamespace(events=service)) == 3
+    assert mirror.store.get("customers", obj["id"])["name"] == "c"
+
+
+@pytest.mark.asyncio
+async def test_interrupted_sync_events_resumes_from_the_last_window():
+    mirror = StripeMirror(MirrorStore(":memory:"), clock=lambda: 500, events_window=100)
+    events = [
+        ApiEvent(id=f"evt_{n}", created=n * 10, type="customer.updated", data=SimpleNamespace(object=c))
+        for n, c in enumerate(customers(50))
+    ]
+    failing = ListService(events, fail_after_calls=2)
+    with pytest.raises(RuntimeError):
+        await mirror.sync_events(SimpleNamespace(events=failing))
+    assert mirror.store.cursor("events")["high_water"] == 200
+    assert mirror.store.count("customers") == 20
+
+    service = ListService(events)
+    assert await mirror.sync_events(SimpleNamespace(events=service)) == 30
+    assert service.calls[0]["created"] == {"gte": 200, "lt": 300}
+    assert mirror.store.count("customers") == 50
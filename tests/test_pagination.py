@@ -0,0 +1,92 @@
+"""
+Test suite for the pipelined pagination engine (sdk/pagination.py) and the
+sync admin listings built on it.
+- Stripe list endpoints are replaced by an in-memory paginated service.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.third_party_integrations.stripe_home.rate_limit import BATCH, INTERACTIVE, current_lane
+from app.core.third_party_integrations.stripe_home.sdk import admin
+from app.core.third_party_integrations.stripe_home.sdk.pagination import paginate, paginate_sync, register
+
+
+class SyncPagedService:
+    """Sync list() over `total` objects, newest first, like Stripe's cursor pagination."""
+
+    def __init__(self, total, delay=0.0, fail_at=None):
+        self.objects = [{"id": f"obj_{n}", "created": 1000 - n} for n in range(total)]
+        self.delay, self.fail_at = delay, fail_at
+        self.calls, self.lanes = [], []
+        self.started = threading.Semaphore(0)
+
+    def list(self, params=None, options=None):
+        self.calls.append(dict(params))
+        self.lanes.append(current_lane())
+        self.started.release()
+        time.sleep(self.delay)
+        if self.fail_at is not None and len(self.calls) > self.fail_at:
+            raise ConnectionError("boom")
+        objects = self.objects
+        if "starting_after" in params:
+            ids = [o["id"] for o in objects]
+            objects = objects[ids.index(params["starting_after"]) + 1 :]
+        page = objects[: params["limit"]]
+        return SimpleNamespace(data=page, has_more=len(objects) > len(page))
+
+
+def metric(name, resource):
+    return REGISTRY.get_sample_value(name, {"resource": resource}) or 0
+
+
+def test_list_wrappers_page_at_max_size_in_batch_lane_and_record_metrics():
+    service = SyncPagedService(250)
+    before = metric("stripe_page_objects_total", "invoices"), metric("stripe_page_latency_seconds_count", "invoices")
+    items = admin.list_stripe_invoices(SimpleNamespace(invoices=service), created={"gte": 5}, status="paid")
+    assert [i["id"] for i in items] == [f"obj_{n}" for n in range(250)]
+    assert [c.get("starting_after") for c in service.calls] == [None, "obj_99", "obj_199"]
+    assert all(c["limit"] == 100 and c["created"] == {"gte": 5} and c["status"] == "paid" for c in service.calls)
+    assert service.lanes == [BATCH] * 3
+    assert current_lane() == INTERACTIVE
+    assert metric("stripe_page_objects_total", "invoices") - before[0] == 250
+    assert metric("stripe_page_latency_seconds_count", "invoices") - before[1] == 3
+
+
+def test_sync_engine_prefetches_next_page_and_stops_on_close():
+    service = SyncPagedService(1000, delay=0.01)
+    items = paginate_sync(SimpleNamespace(charges=service), "charges")
+    assert next(items)["id"] == "obj_0"
+    # Page two is requested while the caller still holds page one
+    assert service.started.acquire(timeout=1) and service.started.acquire(timeout=1)
+    items.close()
+    time.sleep(0.05)
+    assert len(service.calls) == 2
+
+
+def test_errors_and_registry():
+    with pytest.raises(RuntimeError):
+        admin.list_stripe_charges(SimpleNamespace(charges=SyncPagedService(300, fail_at=1)))
+    with pytest.raises(ValueError):
+        list(paginate_sync(SimpleNamespace(), "widgets"))
+    register("tax_rates")
+    assert [o["id"] for o in paginate_sync(SimpleNamespace(tax_rates=SyncPagedService(3)), "tax_rates")] == [
+        "obj_0",
+        "obj_1",
+        "obj_2",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_async_engine_page_size_override():
+    class AsyncService(SyncPagedService):
+        async def list_async(self, params=None, options=None):
+            return self.list(params)
+
+    service = AsyncService(25)
+    items = [o async for o in paginate(SimpleNamespace(customers=service), "customers", page_size=10)]
+    assert len(items) == 25 and [c["limit"] for c in service.calls] == [10, 10, 10]
@@ -0,0 +1,155 @@
+"""
+Test suite for the Parquet finance export (sdk/parquet_export.py).
+- Stripe list endpoints are replaced by an in-memory service honoring `created`.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from app.core.third_party_integrations.stripe_home.sdk.parquet_export import export_parquet, schema  # noqa: E402
+
+JAN, FEB = 1767225600, 1769904000  # 2026-01-01, 2026-02-01 UTC
+
+
+class CreatedService:
+    """Newest-first cursor pagination over objects filtered by a created range."""
+
+    def __init__(self, objects):
+        self.objects = sorted(objects, key=lambda o: (-o["created"], o["id"]))
+
+    async def list_async(self, params=None, options=None):
+        created = params["created"]
+        objects = [o for o in self.objects if created["gte"] <= o["created"] < created["lt"]]
+        if "starting_after" in params:
+            ids = [o["id"] for o in objects]
+            objects = objects[ids.index(params["starting_after"]) + 1 :]
+        page = objects[: params["limit"]]
+        return SimpleNamespace(data=page, has_more=len(objects) > len(page))
+
+
+def balance_transaction(n, created):
+    return {
+        "id": f"txn_{n:05d}",
+        "created": created,
+        "available_on": created + 86400,
+        "type": "charge" if n % 3 else "refund",
+        "reporting_category": "charge",
+        "status": "available",
+        "currency": "usd" if n % 2 else "eur",
+        "amount": 2**40 + n,  # beyond int32
+        "fee": 30,
+        "net": 2**40 + n - 30,
+        "exchange_rate": None,
+        "source": {"id": f"ch_{n}", "object": "charge"} if n % 2 else f"ch_{n}",
+        "description": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_balance_transactions_are_written_per_month_with_fixed_schema(tmp_path):
+    objects = [balance_transaction(n, JAN + n * 600) for n in range(300)]
+    objects += [balance_transaction(n, FEB + n) for n in range(300, 350)]
+    stripe = SimpleNamespace(balance_transactions=CreatedService(objects))
+
+    counts = await export_parquet(stripe, "balance_transactions", JAN, FEB + 86400, str(tmp_path), batch_rows=64)
+    assert counts == {"2026-01": 300, "2026-02": 50}
+
+    path = tmp_path / "balance_transactions" / "created_month=2026-01" / "part-0.parquet"
+    meta = pq.ParquetFile(path).metadata
+    assert meta.num_row_groups > 1  # flushed in bounded batches
+    table = pq.read_table(path, schema=schema("balance_transactions"))
+    assert table.schema.equals(schema("balance_transactions"))
+    assert table.schema.field("amount").type == pa.int64()
+    assert table.schema.field("created").type == pa.timestamp("s")
+    assert pa.types.is_dictionary(table.schema.field("currency").type)
+    rows = {row["id"]: row for row in table.to_pylist()}
+    assert rows["txn_00001"]["amount"] == 2**40 + 1
+    assert rows["txn_00001"]["source"] == "ch_1" and rows["txn_00002"]["source"] == "ch_2"
+    assert rows["txn_00002"]["currency"] == "eur"
+
+
+@pytest.mark.asyncio
+async def test_invoice_nested_fields_and_unknown_resources(tmp_path):
+    invoice = {
+        "id": "in_1",
+        "created": JAN,
+        "customer": "cus_1",
+        "parent": {"subscription_details": {"subscription": "sub_1"}},
+        "status_transitions": {"paid_at": JAN + 60},
+        "currency": "usd",
+        "total": 1000,
+        "livemode": False,
+    }
+    stripe = SimpleNamespace(invoices=CreatedService([invoice, {"id": "in_2", "created": JAN + 1, "parent": None}]))
+    counts = await export_parquet(stripe, "invoices", JAN, FEB, str(tmp_path))
+    assert counts == {"2026-01": 2}
+    rows = {
+        r["id"]: r for r in pq.read_table(tmp_path / "invoices" / "created_month=2026-01" / "part-0.parquet").to_pylist()
+    }
+    assert rows["in_1"]["subscription"] == "sub_1" and rows["in_1"]["total"] == 1000
+    assert rows["in_1"]["paid_at"].timestamp() == JAN + 60
+    assert rows["in_2"]["subscription"] is None and rows["in_2"]["paid_at"] is None
+
+    with pytest.raises(ValueError):
+        await export_parquet(stripe, "charges", JAN, FEB, str(tmp_path))
+
+
+class FailingService(CreatedService):
+    """Fails the oldest window, after newer windows have flushed rows."""
+
+    async def list_async(self, params=None, options=None):
+        if params["created"]["gte"] <= JAN:
+            raise ConnectionError("boom")
+        return await super().list_async(params, options)
+
+
+@pytest.mark.asyncio
+async def test_reruns_keep_whole_months_and_failures_keep_previous_files(tmp_path):
+    objects = [balance_transaction(n, JAN + n * 3600) for n in range(100)]
+    objects += [balance_transaction(n, FEB + n) for n in range(100, 110)]
+    jan = tmp_path / "balance_transactions" / "created_month=2026-01" / "part-0.parquet"
+
+    def stripe(service=CreatedService):
+        return SimpleNamespace(balance_transactions=service(objects))
+
+    await export_parquet(stripe(), "balance_transactions", JAN, FEB, str(tmp_path))
+    assert pq.read_metadata(jan).num_rows == 100
+
+    # A narrower re-run still rewrites the whole month
+    counts = await export_parquet(stripe(), "balance_transactions", JAN + 86400, JAN + 2 * 86400, str(tmp_path))
+    assert counts == {"2026-01": 100}
+    assert pq.read_metadata(jan).num_rows == 100
+
+    # A failed run replaces nothing and leaves no temporary files behind
+    objects.append(balance_transaction(999, JAN + 60))
+    with pytest.raises(RuntimeError):
+        await export_parquet(stripe(FailingService), "balance_transactions", JAN, FEB + 1, str(tmp_path), batch_rows=8)
+    assert pq.read_metadata(jan).num_rows == 100
+    assert sorted(p.name for p in jan.parent.iterdir()) == ["part-0.parquet"]
+    assert not list((tmp_path / "balance_transactions").glob("created_month=2026-02/*"))
+
+
+@pytest.mark.asyncio
+async def test_months_that_come_back_empty_replace_stale_files_and_filters_are_rejected(tmp_path):
+    feb = tmp_path / "balance_transactions" / "created_month=2026-02" / "part-0.parquet"
+
+    def stripe(*objects):
+        return SimpleNamespace(balance_transactions=CreatedService(objects))
+
+    objects = [balance_transaction(n, FEB + n) for n in range(10)]
+    await export_parquet(stripe(*objects), "balance_transactions", FEB, FEB + 1, str(tmp_path))
+    assert pq.read_metadata(feb).num_rows == 10
+
+    # Those transactions are gone from the source: the month is rewritten empty
+    counts = await export_parquet(stripe(), "balance_transactions", JAN, FEB + 1, str(tmp_path))
+    assert counts == {"2026-01": 0, "2026-02": 0}
+    assert pq.read_table(feb).num_rows == 0
+    assert pq.read_table(feb, schema=schema("balance_transactions")).schema.equals(schema("balance_transactions"))
+
+    # A filtered subset would replace the full month under the same path
+    with pytest.raises(TypeError):
+        await export_parquet(stripe(), "balance_transactions", JAN, FEB, str(tmp_path), type="payout")
@@ -0,0 +1,126 @@
+"""
+Test suite for the plan catalog cache (sdk/plan_cache.py) and webhook dispatch.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+import stripe
+
+from app.core.third_party_integrations.stripe_home.cache import TieredCache
+from app.core.third_party_integrations.stripe_home.sdk import plan_cache as plan_cache_module
+from app.core.third_party_integrations.stripe_home.sdk.plan_cache import PlanCache
+from app.core.third_party_integrations.stripe_home.sdk.webhooks import dispatch_event
+
+PLAN = {
+    "id": 7,
+    "plan_id": "price_pro",
+    "name": "Pro",
+    "amount": 2000,
+    "currency": "usd",
+    "interval": "month",
+    "active": True,
+    "created_at": "2024-01-01T00:00:00",
+    "updated_at": "2024-01-01T00:00:00",
+}
+
+
+class CountingLoader:
+    def __init__(self, plans):
+        self.plans, self.calls = plans, 0
+
+    def __call__(self, **lookup):
+        self.calls += 1
+        (field, value), = lookup.items()
+        return next((dict(p) for p in self.plans if p[field] == value), None)
+
+
+@pytest.fixture
+def plans(monkeypatch):
+    loader = CountingLoader([PLAN])
+    cache = PlanCache(TieredCache("test:plan"), loader=loader, bulk_loader=lambda: [dict(PLAN)])
+    cache.loader_stats = loader
+    monkeypatch.setattr(plan_cache_module, "_plan_cache", cache)
+    return cache
+
+
+def event(type_, obj):
+    return SimpleNamespace(type=type_, data=SimpleNamespace(object=obj))
+
+
+@pytest.mark.asyncio
+async def test_reads_through_once_and_indexes_both_keys(plans):
+    plan = await plans.get_by_id(7)
+    assert plan.plan_id == "price_pro" and plan.id == 7
+    assert (await plans.get_by_plan_id("price_pro")).name == "Pro"
+    await plans.get_by_id(7)
+    assert plans.loader_stats.calls == 1
+    assert await plans.get_by_id(99) is None
+
+
+@pytest.mark.asyncio
+async def test_warm_preloads_active_plans(plans):
+    assert await plans.warm() == 1
+    await plans.get_by_plan_id("price_pro")
+    assert plans.loader_stats.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_price_webhooks_refresh_and_evict(plans):
+    await plans.warm()
+    handled = await dispatch_event(
+        event("price.updated", {"id": "price_pro", "unit_amount": 2500, "currency": "usd", "active": True})
+    )
+    assert handled
+    assert (await plans.get_by_id(7)).amount == 2500
+    await dispatch_event(event("price.updated", {"id": "price_pro", "currency": "usd", "active": False}))
+    assert await plans.cache.aget("id:7") is None
+    assert await plans.cache.aget("price:price_pro") is None
+
+
+@pytest.mark.asyncio
+async def test_missing_plan_is_fetched_from_stripe_in_one_call(plans):
+    calls = []
+
+    class prices:
+        @staticmethod
+        async def retrieve_async(price_id, params=None):
+            calls.append((price_id, params))
+            return {
+                "id": price_id,
+                "product": {"name": "Team", "metadata": {"monthly_credits": "50"}, "active": True},
+                "unit_amount": 9000,
+                "currency": "usd",
+                "recurring": {"interval": "year"},
+                "created": 1700000000,
+            }
+
+    plan = await plans.get_by_plan_id("price_team", stripe_client=SimpleNamespace(prices=prices))
+    assert plan.name == "Team" and plan.monthly_credits == 50 and plan.interval == "year"
+    assert calls == [("price_team", {"expand": ["product"]})]
+
+
+@pytest.mark.asyncio
+async def test_unknown_price_is_negatively_cached_until_created(plans):
+    calls = []
+
+    class prices:
+        @staticmethod
+        async def retrieve_async(price_id, params=None):
+            calls.append(price_id)
+            raise stripe.InvalidRequestError("No such price", "id", code="resource_missing", http_status=404)
+
+    client = SimpleNamespace(prices=prices)
+    assert await plans.get_by_plan_id("price_gone", stripe_client=client) is None
+    assert await plans.get_by_plan_id("price_gone", stripe_client=client) is None
+    assert await plans.get_by_id(99) is None
+    assert await plans.get_by_id(99) is None
+    assert calls == ["price_gone"]
+    assert plans.loader_stats.calls == 2  # one DB miss per id
+
+    assert await dispatch_event(event("price.created", {"id": "price_gone"}))
+    assert await plans.get_by_plan_id("price_gone", stripe_client=client) is None
+    assert calls == ["price_gone", "price_gone"]
+
+    await plans.put({**PLAN, "id": 99, "plan_id": "price_new"})
+    assert (await plans.get_by_id(99)).plan_id == "price_new"
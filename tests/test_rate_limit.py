@@ -0,0 +1,140 @@
+"""
+Test suite for the cluster-wide Stripe rate limiter.
+- Valkey is replaced by a scripted stub, or by fakeredis (with lupa) where the
+  token-bucket script itself has to run.
+"""
+
+import pytest
+
+from app.core.third_party_integrations.stripe_home.api._exceptions import (
+    StripeRateLimitExceeded,
+)
+from app.core.third_party_integrations.stripe_home.rate_limit import (
+    BATCH,
+    INTERACTIVE,
+    StripeRateLimiter,
+    current_lane,
+    stripe_lane,
+)
+
+LIVE_HEADERS = {"Authorization": "Bearer sk_live_123"}
+TEST_HEADERS = {"Authorization": "Bearer sk_test_123"}
+
+
+class MockValkey:
+    """Returns queued (allowed, wait_ms) replies and records script calls."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    def register_script(self, _script):
+        def run(keys, args):
+            self.calls.append((keys, args))
+            return self.replies.pop(0)
+
+        return run
+
+
+def test_bucket_for_splits_reads_and_writes_per_account():
+    limiter = StripeRateLimiter(read_rate=100, write_rate=50, test_rate=25)
+    read_key, kind, rate = limiter.bucket_for("get", LIVE_HEADERS)
+    write_key, write_kind, write_rate = limiter.bucket_for("post", LIVE_HEADERS)
+    assert (kind, rate) == ("read", 100)
+    assert (write_kind, write_rate) == ("write", 50)
+    assert read_key != write_key
+    assert "sk_live_123" not in read_key
+    connect_key, _, _ = limiter.bucket_for(
+        "get", {**LIVE_HEADERS, "Stripe-Account": "acct_1"}
+    )
+    assert connect_key == "stripe:ratelimit:acct_1:read"
+    assert limiter.bucket_for("post", TEST_HEADERS)[2] == 25
+
+
+def test_batch_lane_keeps_a_reserve():
+    client = MockValkey([[1, 0], [1, 0]])
+    limiter = StripeRateLimiter(client, read_rate=100, batch_reserve=0.2)
+    limiter.acquire("get", LIVE_HEADERS)
+    with stripe_lane(BATCH):
+        assert current_lane() == BATCH
+        limiter.acquire("get", LIVE_HEADERS)
+    assert current_lane() == INTERACTIVE
+    interactive_args, batch_args = client.calls[0][1], client.calls[1][1]
+    assert interactive_args[3] == 0
+    assert batch_args[3] == pytest.approx(20)
+
+
+def test_acquire_waits_then_succeeds():
+    client = MockValkey([[0, 10], [1, 0]])
+    limiter = StripeRateLimiter(client, max_wait=1)
+    waited = limiter.acquire("post", LIVE_HEADERS)
+    assert waited >= 0.01
+    assert len(client.calls) == 2
+
+
+def test_acquire_rejects_after_max_wait():
+    client = MockValkey([[0, 5000]])
+    limiter = StripeRateLimiter(client, max_wait=1)
+    with pytest.raises(StripeRateLimitExceeded):
+        limiter.acquire("post", LIVE_HEADERS)
+
+
+def test_acquire_fails_open_when_valkey_is_down():
+    class BrokenValkey:
+        def register_script(self, _script):
+            def run(keys, args):
+                raise ConnectionError("valkey down")
+
+            return run
+
+    limiter = StripeRateLimiter(BrokenValkey())
+    assert limiter.acquire("get", LIVE_HEADERS) == 0.0
+
+
+@pytest.fixture
+def lua_valkey():
+    """An in-process server that really runs TOKEN_BUCKET_SCRIPT."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return fakeredis.FakeRedis()
+
+
+def test_token_bucket_script_refills_over_time(lua_valkey):
+    limiter = StripeRateLimiter(lua_valkey, write_rate=10, max_wait=0)
+    for _ in range(10):
+        limiter.acquire("post", LIVE_HEADERS)
+    with pytest.raises(StripeRateLimitExceeded):
+        limiter.acquire("post", LIVE_HEADERS)
+    # Wind the bucket's clock back a second instead of sleeping through it
+    key, _, _ = limiter.bucket_for("post", LIVE_HEADERS)
+    ts = int(lua_valkey.hget(key, "ts"))
+    lua_valkey.hset(key, "ts", ts - 1000)
+    for _ in range(10):
+        limiter.acquire("post", LIVE_HEADERS)
+    with pytest.raises(StripeRateLimitExceeded):
+        limiter.acquire("post", LIVE_HEADERS)
+
+
+def test_token_bucket_script_holds_the_reserve_back_from_batch(lua_valkey):
+    limiter = StripeRateLimiter(lua_valkey, read_rate=10, batch_reserve=0.5, max_wait=0)
+    for _ in range(5):
+        limiter.acquire("get", LIVE_HEADERS)
+    with stripe_lane(BATCH):
+        with pytest.raises(StripeRateLimitExceeded):
+            limiter.acquire("get", LIVE_HEADERS)
+    for _ in range(5):
+        limiter.acquire("get", LIVE_HEADERS)
+    with pytest.raises(StripeRateLimitExceeded):
+        limiter.acquire("get", LIVE_HEADERS)
+
+
+def test_token_bucket_script_keeps_reads_and_writes_apart(lua_valkey):
+    limiter = StripeRateLimiter(lua_valkey, read_rate=10, write_rate=2, max_wait=0)
+    for _ in range(2):
+        limiter.acquire("post", LIVE_HEADERS)
+    with pytest.raises(StripeRateLimitExceeded):
+        limiter.acquire("post", LIVE_HEADERS)
+    for _ in range(10):
+        limiter.acquire("get", LIVE_HEADERS)
+    with pytest.raises(StripeRateLimitExceeded):
+        limiter.acquire("get", LIVE_HEADERS)
@@ -0,0 +1,175 @@
+"""
+Test suite for the event replay runner (sdk/replay.py).
+- The events API is replaced by an in-memory service honoring `created`.
+- Valkey is replaced by an in-memory async stub.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+import valkey
+
+from app.core.third_party_integrations.stripe_home.rate_limit import BATCH, current_lane
+from app.core.third_party_integrations.stripe_home.sdk import webhooks
+from app.core.third_party_integrations.stripe_home.sdk.replay import (
+    EventReplayer,
+    ReplayCheckpoint,
+    partition_key,
+)
+
+
+class MockAsyncValkey:
+    def __init__(self, fail=False):
+        self.data, self.fail = {}, fail
+
+    async def get(self, key):
+        if self.fail:
+            raise valkey.ConnectionError("down")
+        return self.data.get(key)
+
+    async def set(self, key, value):
+        if self.fail:
+            raise valkey.ConnectionError("down")
+        self.data[key] = str(value).encode()
+
+
+class EventsService:
+    """Newest-first events within a created range, with cursor pagination."""
+
+    def __init__(self, events):
+        self.events = sorted(events, key=lambda e: (-e.created, e.id))
+        self.calls = []
+
+    async def list_async(self, params=None, options=None):
+        self.calls.append(dict(params))
+        created = params["created"]
+        events = [e for e in self.events if created["gte"] <= e.created < created["lt"]]
+        if "starting_after" in params:
+            ids = [e.id for e in events]
+            events = events[ids.index(params["starting_after"]) + 1 :]
+        page = events[: params["limit"]]
+        return SimpleNamespace(data=page, has_more=len(events) > len(page))
+
+
+class ApiEvent(SimpleNamespace):
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+
+def event(n, created, customer, type="customer.subscription.updated"):
+    obj = {"id": f"sub_{customer}", "object": "subscription", "customer": customer}
+    return ApiEvent(id=f"evt_{n:04d}", created=created, type=type, data=SimpleNamespace(object=obj))
+
+
+class Recorder:
+    def __init__(self):
+        self.seen, self.lanes, self.active, self.peak = [], [], 0, 0
+
+    async def __call__(self, event):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        self.lanes.append(current_lane())
+        await asyncio.sleep(0.001)
+        self.seen.append(event)
+        self.active -= 1
+        return event.type != "ping"
+
+
+@pytest.mark.asyncio
+async def test_replay_preserves_per_customer_order_and_runs_customers_concurrently():
+    events = [event(n, 1000 + n, f"cus_{n % 5}") for n in range(300)]
+    recorder = Recorder()
+    replayer = EventReplayer(ReplayCheckpoint(MockAsyncValkey()), dispatch=recorder, window=100)
+    result = await replayer.replay(SimpleNamespace(events=EventsService(events)), 1000, 1300)
+    assert result.events == result.handled == 300 and result.checkpoint == 1300
+    for n in range(5):
+        created = [e.created for e in recorder.seen if e.data.object["customer"] == f"cus_{n}"]
+        assert created == sorted(created) and len(created) == 60
+    assert 1 < recorder.peak <= 5
+    assert set(recorder.lanes) == {BATCH}
+
+
+@pytest.mark.asyncio
+async def test_replay_resumes_from_checkpoint():
+    store = MockAsyncValkey()
+    service = EventsService([event(n, 1000 + n, "cus_1") for n in range(300)])
+    first = EventReplayer(ReplayCheckpoint(store), dispatch=Recorder(), window=100)
+    await first.replay(SimpleNamespace(events=service), 1000, 1200, name="outage")
+    recorder = Recorder()
+    second = EventReplayer(ReplayCheckpoint(store), dispatch=recorder, window=100)
+    result = await second.replay(SimpleNamespace(events=service), 1000, 1300, name="outage")
+    assert [e.created for e in recorder.seen] == list(range(1200, 1300))
+    assert result.checkpoint == 1300
+
+
+@pytest.mark.asyncio
+async def test_partition_keys_and_checkpoint_fail_open():
+    customer = ApiEvent(id="evt_1", data=SimpleNamespace(object={"id": "cus_9", "object": "customer"}))
+    expanded = ApiEvent(id="evt_2", data=SimpleNamespace(object={"id": "in_1", "customer": {"id": "cus_9"}}))
+    product = ApiEvent(id="evt_3", data=SimpleNamespace(object={"id": "prod_1", "object": "product"}))
+    assert partition_key(customer) == partition_key(expanded) == "cus_9"
+    assert partition_key(product) == "prod_1"
+
+    replayer = EventReplayer(ReplayCheckpoint(MockAsyncValkey(fail=True)), dispatch=Recorder(), window=100)
+    service = EventsService([event(n, 1000 + n, "cus_1") for n in range(10)])
+    result = await replayer.replay(SimpleNamespace(events=service), 1000, 1100)
+    assert result.events == 10
+
+
+@pytest.mark.asyncio
+async def test_handler_failures_are_counted_and_hold_the_checkpoint():
+    store = MockAsyncValkey()
+    service = EventsService([event(n, 1000 + n, f"cus_{n % 3}") for n in range(300)])
+    recorder = Recorder()
+
+    async def flaky(event):
+        if event.created in (1150, 1250):
+            raise ValueError("handler bug")
+        return await recorder(event)
+
+    replayer = EventReplayer(ReplayCheckpoint(store), dispatch=flaky, window=100)
+    result = await replayer.replay(SimpleNamespace(events=service), 1000, 1300, name="flaky")
+    # Later windows still run, but the checkpoint stops at the first failed window
+    assert result.events == 300 and result.failed == 2 and result.handled == 298
+    assert result.checkpoint == 1100
+    assert store.data["stripe:replay:flaky"] == b"1100"
+
+    retry = Recorder()
+    result = await EventReplayer(ReplayCheckpoint(store), dispatch=retry, window=100).replay(
+        SimpleNamespace(events=service), 1000, 1300, name="flaky"
+    )
+    assert retry.seen[0].created == 1100 and result.failed == 0 and result.checkpoint == 1300
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_outside_the_range_is_not_resumed(caplog):
+    store = MockAsyncValkey()
+    store.data["stripe:replay:default"] = b"5000"
+    recorder = Recorder()
+    service = EventsService([event(n, 1000 + n, "cus_1") for n in range(100)])
+    result = await EventReplayer(ReplayCheckpoint(store), dispatch=recorder, window=50).replay(
+        SimpleNamespace(events=service), 1000, 1100
+    )
+    assert result.events == 100 and result.checkpoint == 1100
+    assert "outside [1000, 1100)" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_strict_dispatch_runs_every_handler_then_raises(monkeypatch):
+    calls = []
+
+    def broken(event):
+        calls.append("broken")
+        raise ValueError("boom")
+
+    monkeypatch.setattr(webhooks, "_HANDLERS", [("replay.test", broken), ("replay.test", calls.append)])
+    webhooks.handlers_for.cache_clear()
+    test_event = SimpleNamespace(type="replay.test")
+    try:
+        assert await webhooks.dispatch_event(test_event) is True
+        with pytest.raises(ValueError):
+            await webhooks.dispatch_event(test_event, strict=True)
+        assert calls == ["broken", test_event, "broken", test_event]
+    finally:
+        webhooks.handlers_for.cache_clear()
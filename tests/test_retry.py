@@ -0,0 +1,117 @@
+"""
+Test suite for the Stripe retry engine.
+- Uses an in-memory transport; no network calls.
+"""
+
+import pytest
+import stripe
+
+from app.core.third_party_integrations.stripe_home.client import StripeHTTPClient
+from app.core.third_party_integrations.stripe_home.retry import (
+    RetryBudget,
+    RetryPolicy,
+    endpoint_label,
+    parse_retry_after,
+    retry_reason,
+)
+
+URL = "https://api.stripe.com/v1/customers/cus_123"
+
+
+class MockTransport(stripe.HTTPClient):
+    """Replays queued responses (or raises queued errors) and records headers."""
+
+    name = "mock"
+
+    def __init__(self, outcomes):
+        super().__init__()
+        self.outcomes = list(outcomes)
+        self.seen_headers = []
+
+    def request_with_retries(self, method, url, headers, post_data=None, max_network_retries=None, *, _usage=None):
+        assert max_network_retries == 0
+        self.seen_headers.append(dict(headers))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def request_with_retries_async(self, method, url, headers, post_data=None, max_network_retries=None, *, _usage=None):
+        return self.request_with_retries(method, url, headers, post_data, max_network_retries)
+
+
+def make_client(outcomes, **policy):
+    policy = {"attempts": 3, "backoff_type": "constant", "base": 0, "cap": 0, **policy}
+    transport = MockTransport(outcomes)
+    return StripeHTTPClient(transport, retry_policy=RetryPolicy(**policy)), transport
+
+
+def test_backoff_schedules():
+    exponential = RetryPolicy(backoff_type="exponential", base=0.01, cap=0.05)
+    assert [exponential.backoff(n) for n in (1, 2, 3, 4)] == [0.01, 0.02, 0.04, 0.05]
+    assert RetryPolicy(backoff_type="constant", base=0.2, cap=0.5).backoff(5) == 0.2
+    jitter = RetryPolicy(backoff_type="jitter", base=0.1, cap=1)
+    assert all(0 <= jitter.backoff(3) <= 0.4 for _ in range(50))
+    with pytest.raises(ValueError):
+        RetryPolicy(backoff_type="linear")
+
+
+def test_retry_after_is_honored_and_capped():
+    policy = RetryPolicy(backoff_type="constant", base=0.01, cap=0.5, retry_after_max=5)
+    assert policy.delay(1, retry_after=2) == 2
+    assert policy.delay(1, retry_after=30) is None
+    assert parse_retry_after({"Retry-After": "3"}) == 3.0
+    assert parse_retry_after({}) is None
+
+
+def test_retry_reasons():
+    assert retry_reason(500, {}, None) == "server_error"
+    assert retry_reason(429, {}, None) == "rate_limited"
+    assert retry_reason(409, {}, None) == "conflict"
+    assert retry_reason(400, {}, None) is None
+    assert retry_reason(500, {"Stripe-Should-Retry": "false"}, None) is None
+    assert retry_reason(None, None, stripe.APIConnectionError("boom", should_retry=True)) == "connection_error"
+    assert retry_reason(None, None, stripe.APIConnectionError("bad cert")) is None
+
+
+def test_endpoint_label_collapses_ids():
+    assert endpoint_label(URL + "?expand[]=x") == "/v1/customers/{id}"
+    assert endpoint_label("https://api.stripe.com/v1/checkout/sessions") == "/v1/checkout/sessions"
+
+
+def test_retry_budget_caps_retries():
+    budget = RetryBudget(ratio=0.5, min_retries=1, window=60)
+    for _ in range(4):
+        budget.record_call()
+    assert [budget.try_withdraw() for _ in range(3)] == [True, True, False]
+
+
+def test_connection_error_is_retried_with_same_idempotency_key():
+    client, transport = make_client(
+        [stripe.APIConnectionError("reset", should_retry=True), ('{"id": "cus_1"}', 200, {})]
+    )
+    body, status, _ = client.request_with_retries("post", URL, {"Authorization": "Bearer sk_test_1"})
+    assert status == 200
+    keys = {headers["Idempotency-Key"] for headers in transport.seen_headers}
+    assert len(transport.seen_headers) == 2 and len(keys) == 1
+
+
+def test_gives_up_after_attempts():
+    client, transport = make_client([("{}", 503, {})] * 5, attempts=2)
+    _, status, _ = client.request_with_retries("get", URL, {})
+    assert status == 503
+    assert len(transport.seen_headers) == 3
+
+
+def test_non_retryable_status_returns_immediately():
+    client, transport = make_client([("{}", 402, {})])
+    assert client.request_with_retries("post", URL, {})[1] == 402
+    assert len(transport.seen_headers) == 1
+
+
+@pytest.mark.asyncio
+async def test_async_retry_on_rate_limit():
+    client, transport = make_client([("{}", 429, {"Retry-After": "0"}), ("{}", 200, {})])
+    _, status, _ = await client.request_with_retries_async("get", URL, {})
+    assert status == 200
+    assert len(transport.seen_headers) == 2
@@ -0,0 +1,51 @@
+"""
+Test suite for lazy type resolution in api/_generated.py and api/_schema.py.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.core.third_party_integrations.stripe_home.api import _generated, _schema
+
+
+def test_names_are_listed_without_importing():
+    assert "Customer" in dir(_schema)
+    assert "__all__" not in vars(_schema) or _generated.EAGER_IMPORT
+
+
+def test_type_resolves_on_first_access_and_is_cached():
+    import stripe
+
+    customer = _schema.Customer
+    assert customer is stripe.Customer
+    assert _generated._imported_types["Customer"] is customer
+    assert vars(_generated)["Customer"] is customer
+
+
+def test_unknown_or_unresolvable_names_raise_attribute_error():
+    with pytest.raises(AttributeError):
+        _schema.NotAStripeType
+    # Listed in TypesConfig but the camel-cased class name does not exist
+    with pytest.raises(AttributeError):
+        _schema.ApiRequestor
+
+
+STAR_IMPORT = "from app.core.third_party_integrations.stripe_home.api._schema import *"
+
+
+def test_star_import_binds_only_resolvable_names():
+    namespace = {}
+    exec(STAR_IMPORT, namespace)
+    assert namespace["Customer"] is _schema.Customer
+    assert "ApiRequestor" not in namespace
+    assert set(_schema.__all__) <= set(namespace)
+
+
+def test_star_import_with_eager_types():
+    env = {**os.environ, "VAPI_EAGER_TYPES": "true", "PYTHONPATH": os.pathsep.join(sys.path)}
+    script = f"{STAR_IMPORT}\nassert Customer.__name__ == 'Customer'\nassert 'ApiRequestor' not in dir()"
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, cwd=os.getcwd())
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,125 @@
+"""
+Test suite for the consistent-hash shard router (shard.py).
+- Valkey pools are replaced by in-memory stubs that record pipelines.
+"""
+
+import threading
+
+import pytest
+
+from app.core.third_party_integrations.stripe_home.shard import HashRing, ShardRouter
+
+KEYS = [f"customer:cus_{i}" for i in range(5000)]
+
+
+class MockPipeline:
+    def __init__(self, store, log):
+        self.store, self.log, self.ops = store, log, []
+
+    def get(self, key):
+        self.ops.append(lambda: self.store.get(key))
+
+    def set(self, key, value, ex=None):
+        self.ops.append(lambda: self.store.__setitem__(key, value))
+
+    def delete(self, key):
+        self.ops.append(lambda: int(self.store.pop(key, None) is not None))
+
+    def _run(self):
+        self.log.append(len(self.ops))
+        return [op() for op in self.ops]
+
+    execute = _run
+
+
+class MockAsyncPipeline(MockPipeline):
+    async def execute(self):
+        return self._run()
+
+
+class MockClient:
+    def __init__(self, pipeline_class, store, log):
+        self.pipeline_class, self.store, self.log = pipeline_class, store, log
+
+    def pipeline(self, transaction=True):
+        return self.pipeline_class(self.store, self.log)
+
+
+class MockPool:
+    def __init__(self, node):
+        self.store, self.pipelines = {}, []
+        self.client = MockClient(MockPipeline, self.store, self.pipelines)
+        self.async_client = MockClient(MockAsyncPipeline, self.store, self.pipelines)
+
+    async def aclose(self):
+        pass
+
+
+def make_router(count=3):
+    nodes = [{"host": f"shard{i}", "port": 6379} for i in range(count)]
+    return ShardRouter(nodes, vnodes=100, pool_factory=MockPool)
+
+
+def test_keys_spread_evenly_across_shards():
+    ring = HashRing([f"shard{i}" for i in range(4)], vnodes=160)
+    counts = {}
+    for key in KEYS:
+        node = ring.node_for(key)
+        counts[node] = counts.get(node, 0) + 1
+    assert min(counts.values()) > len(KEYS) / 4 * 0.75
+
+
+def test_adding_a_node_only_moves_keys_to_it():
+    ring = HashRing(["a", "b", "c"], vnodes=160)
+    before = {key: ring.node_for(key) for key in KEYS}
+    ring.add_node("d")
+    moved = [key for key in KEYS if ring.node_for(key) != before[key]]
+    assert all(ring.node_for(key) == "d" for key in moved)
+    assert 0.15 < len(moved) / len(KEYS) < 0.35
+
+
+def test_lookups_during_membership_changes_see_a_whole_ring():
+    keys = KEYS[:500]
+    before = HashRing(["a", "b"], vnodes=64)
+    after = HashRing(["a", "b", "c"], vnodes=64)
+    expected = {key: {before.node_for(key), after.node_for(key)} for key in keys}
+    ring = HashRing(["a", "b"], vnodes=64)
+    done = threading.Event()
+
+    def churn():
+        while not done.is_set():
+            ring.add_node("c")
+            ring.remove_node("c")
+
+    worker = threading.Thread(target=churn)
+    worker.start()
+    try:
+        wrong = [key for _ in range(20) for key in keys if ring.node_for(key) not in expected[key]]
+    finally:
+        done.set()
+        worker.join()
+    assert wrong == []
+
+
+def test_hash_tags_colocate_related_keys():
+    ring = HashRing(["a", "b", "c"], vnodes=50)
+    assert ring.node_for("credit:{user_42}:balance") == ring.node_for("plan:{user_42}")
+
+
+def test_multi_key_ops_use_one_pipeline_per_shard():
+    router = make_router()
+    mapping = {key: key.upper() for key in KEYS[:300]}
+    router.mset(mapping)
+    pools = router._pools.values()
+    assert all(len(pool.pipelines) == 1 for pool in pools)
+    assert sum(pool.pipelines[0] for pool in pools) == 300
+    assert router.mget(KEYS[:300]) == mapping
+    assert router.delete(KEYS[:10]) == 10
+
+
+@pytest.mark.asyncio
+async def test_async_multi_key_ops():
+    router = make_router()
+    await router.amset({"a": 1, "b": 2, "c": 3})
+    assert await router.amget(["a", "b", "c", "missing"]) == {"a": 1, "b": 2, "c": 3, "missing": None}
+    assert await router.adelete(["a", "b"]) == 2
@@ -0,0 +1,117 @@
+"""
+Test suite for the plan-to-tier matcher.
+- Checks parity with the original linear scan, overrides and the product webhook.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.third_party_integrations.stripe_home.sdk import tiers
+from app.core.third_party_integrations.stripe_home.sdk.tiers import TierMatcher, tier_overrides
+
+RULES = {
+    "Free Plan": "free",
+    "Basic Plan": "basic",
+    "Premium Plan": "premium",
+    "Enterprise Plan": "enterprise",
+}
+
+
+def legacy_match(plan_name, mapping=RULES, default="basic"):
+    """The original per-call implementation, kept as the reference behaviour."""
+    if plan_name in mapping:
+        return mapping[plan_name]
+    for key, value in mapping.items():
+        if key.lower().split()[0] in plan_name.lower():
+            return value
+    return default
+
+
+NAMES = [
+    "Free Plan",
+    "Premium Plan",
+    "premium plan",
+    "Enterprise Annual",
+    "Basic Freemium",
+    "Superpremium Enterprise",
+    "Team Plan",
+    "ENTERPRISE premium",
+    "",
+    "Pro (basic)",
+]
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_matches_legacy_semantics(name):
+    assert TierMatcher(RULES, "basic").match(name) == legacy_match(name)
+
+
+def test_rule_order_decides_between_needles():
+    rules = {"Gold Plan": "gold", "Pro Plan": "pro"}
+    matcher = TierMatcher(rules, "none")
+    for name in ("Pro Gold", "gold pro", "Goldpro", "Propel", "x"):
+        assert matcher.match(name) == legacy_match(name, rules, "none")
+
+
+def test_overrides_win_and_invalidate_memo():
+    matcher = TierMatcher(RULES, "basic")
+    assert matcher.match("Team Plan") == "basic"
+    matcher.set_override("Team Plan", "premium")
+    assert matcher.match("Team Plan") == "premium"
+    matcher.set_override("Team Plan", None)
+    assert matcher.match("Team Plan") == "basic"
+
+
+def test_match_many_dedupes_and_memoizes():
+    matcher = TierMatcher(RULES, "basic")
+    names = ["Enterprise Annual", "Team Plan"] * 500
+    assert matcher.match_many(names) == {"Enterprise Annual": "enterprise", "Team Plan": "basic"}
+    info = matcher.match.cache_info()
+    assert info.misses == 2
+
+
+def test_tier_overrides_from_product_metadata():
+    products = [
+        {"name": "Team Plan", "metadata": {"subscription_tier": "premium"}},
+        {"name": "Legacy", "metadata": {}},
+        {"name": "Other"},
+    ]
+    assert tier_overrides(products) == {"Team Plan": "premium"}
+
+
+@pytest.mark.asyncio
+async def test_product_webhook_updates_overrides(monkeypatch):
+    matcher = TierMatcher(RULES, "basic")
+    monkeypatch.setattr(tiers, "_tier_matcher", matcher)
+
+    def event(type, product, previous=None):
+        return SimpleNamespace(type=type, data=SimpleNamespace(object=product, previous_attributes=previous))
+
+    await tiers._refresh_tier(event("product.created", {"name": "Team", "metadata": {"subscription_tier": "premium"}}))
+    assert matcher.match("Team") == "premium"
+    await tiers._refresh_tier(
+        event("product.updated", {"name": "Squad", "metadata": {"subscription_tier": "premium"}}, {"name": "Team"})
+    )
+    assert matcher.overrides == {"Squad": "premium"}
+    await tiers._refresh_tier(event("product.deleted", {"name": "Squad", "metadata": {"subscription_tier": "premium"}}))
+    assert matcher.overrides == {}
+
+
+@pytest.mark.asyncio
+async def test_product_override_matches_plan_names_from_create_product(monkeypatch):
+    matcher = TierMatcher(RULES, "basic")
+    monkeypatch.setattr(tiers, "_tier_matcher", matcher)
+    product = {"name": "Team - Growth", "metadata": {"subscription_tier": "premium"}}
+    await tiers._refresh_tier(SimpleNamespace(type="product.created", data=SimpleNamespace(object=product)))
+
+    # create_product stores plans as "<product name> - <nickname or price id>"
+    assert matcher.match("Team - Growth - Monthly") == "premium"
+    assert matcher.match("Team - Growth - price_1Pq2r3") == "premium"
+    assert matcher.match("Team - Growth") == "premium"
+    assert matcher.match("Team - Starter - Monthly") == "basic"
+    assert matcher.match("Team - Growthy - Monthly") == "basic"
+    assert matcher.match_many(["Team - Growth - Yearly", "Free Plan"]) == {
+        "Team - Growth - Yearly": "premium",
+        "Free Plan": "free",
+    }
@@ -0,0 +1,60 @@
+"""
+Test suite for the shared Valkey pool factory (valkey_pool.py).
+"""
+
+import pytest
+import valkey
+import valkey.asyncio
+from prometheus_client import CollectorRegistry
+from valkey.backoff import ConstantBackoff
+
+from app.core.third_party_integrations.stripe_home.config import ValkeyConfig
+from app.core.third_party_integrations.stripe_home.valkey_pool import (
+    ValkeyPool,
+    ValkeyPoolCollector,
+    _backoff,
+)
+
+
+class Config(ValkeyConfig):
+    VALKEY_MAX_CONNECTIONS = 7
+    VALKEY_COMMAND_TIMEOUT = 2
+    VALKEY_HEALTH_CHECK_INTERVAL = 15
+    VALKEY_RETRY_BACKOFF_TYPE = "constant"
+    VALKEY_CLUSTER = False
+    VALKEY_CLUSTER_MODE = False
+    VALKEY_SSL = False
+
+
+def test_standalone_clients_share_config_and_bounded_pools():
+    pool = ValkeyPool(Config, name="test")
+    sync_pool = pool.client.connection_pool
+    async_pool = pool.async_client.connection_pool
+    assert isinstance(sync_pool, valkey.BlockingConnectionPool)
+    assert isinstance(async_pool, valkey.asyncio.BlockingConnectionPool)
+    for connection_pool in (sync_pool, async_pool):
+        assert connection_pool.max_connections == 7
+        assert connection_pool.timeout == 2
+        assert connection_pool.connection_kwargs["health_check_interval"] == 15
+        assert isinstance(connection_pool.connection_kwargs["retry"]._backoff, ConstantBackoff)
+    assert pool.usage() == {"sync": (0, 0, 7), "async": (0, 0, 7)}
+
+
+def test_unsupported_backoff_type_is_rejected():
+    class Bad(Config):
+        VALKEY_RETRY_BACKOFF_TYPE = "linear"
+
+    with pytest.raises(ValueError):
+        _backoff(Bad)
+
+
+def test_collector_reports_pool_usage_under_namespace():
+    pool = ValkeyPool(Config, name="metrics-test")
+    registry = CollectorRegistry()
+    registry.register(ValkeyPoolCollector(namespace="testns"))
+    assert registry.get_sample_value(
+        "testns_pool_max_connections", {"pool": "metrics-test", "client": "sync"}
+    ) == 7
+    assert registry.get_sample_value(
+        "testns_pool_connections", {"pool": pool.name, "client": "async", "state": "in_use"}
+    ) == 0
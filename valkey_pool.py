@@ -0,0 +1,246 @@
+"""
+Shared Valkey connections built from ValkeyConfig.
+One ValkeyPool per process holds a sync and an asyncio client, either on a
+bounded, health-checked BlockingConnectionPool or as cluster clients over
+VALKEY_SHARD_NODES when cluster mode is on. Rate limiting, caching and locking
+all borrow these clients instead of opening their own connections.
+"""
+
+import logging
+import weakref
+
+import valkey
+import valkey.asyncio
+import valkey.asyncio.cluster
+import valkey.asyncio.retry
+import valkey.cluster
+import valkey.retry
+from prometheus_client import REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+from valkey.backoff import ConstantBackoff, ExponentialBackoff, FullJitterBackoff
+from valkey.exceptions import ConnectionError, TimeoutError
+
+from .config import ValkeyConfig
+
+logger = logging.getLogger(__name__)
+
+
+def _backoff(config=ValkeyConfig):
+    """Map VAPI_RETRY_BACKOFF_TYPE onto valkey's backoff strategies."""
+    backoff_type = config.VALKEY_RETRY_BACKOFF_TYPE
+    if backoff_type == "exponential":
+        return ExponentialBackoff(cap=config.VALKEY_RETRY_BACKOFF_CAP, base=config.VALKEY_RETRY_BACKOFF_BASE)
+    if backoff_type == "jitter":
+        return FullJitterBackoff(cap=config.VALKEY_RETRY_BACKOFF_CAP, base=config.VALKEY_RETRY_BACKOFF_BASE)
+    if backoff_type == "constant":
+        return ConstantBackoff(config.VALKEY_RETRY_BACKOFF_BASE)
+    raise ValueError(f"Unsupported backoff type: {backoff_type}")
+
+
+def _connection_kwargs(config=ValkeyConfig) -> dict:
+    """Options shared by every connection: auth, timeouts and health checks."""
+    return {
+        "username": config.VALKEY_USERNAME,
+        "password": config.VALKEY_PASSWORD,
+        "socket_timeout": config.VALKEY_SOCKET_TIMEOUT,
+        "socket_connect_timeout": config.VALKEY_SOCKET_CONNECT_TIMEOUT,
+        "health_check_interval": config.VALKEY_HEALTH_CHECK_INTERVAL,
+        "retry_on_error": [ConnectionError, TimeoutError],
+    }
+
+
+def _ssl_kwargs(config=ValkeyConfig) -> dict:
+    if not config.VALKEY_SSL:
+        return {}
+    return {
+        "ssl_cert_reqs": config.VALKEY_SSL_CERT_REQS or "required",
+        "ssl_ca_certs": config.VALKEY_SSL_CA_CERTS,
+        "ssl_keyfile": config.VALKEY_SSL_KEYFILE,
+        "ssl_certfile": config.VALKEY_SSL_CERTFILE,
+    }
+
+
+def is_cluster(config=ValkeyConfig) -> bool:
+    return bool(config.VALKEY_CLUSTER or config.VALKEY_CLUSTER_MODE)
+
+
+def build_client(config=ValkeyConfig) -> valkey.Valkey | valkey.cluster.ValkeyCluster:
+    """
+    Sync client. Standalone mode caps the process at VALKEY_MAX_CONNECTIONS and
+    blocks up to VALKEY_COMMAND_TIMEOUT for a free connection instead of opening
+    more; cluster mode keeps a pool of up to VALKEY_POOL_SIZE per node.
+    """
+    retry = valkey.retry.Retry(_backoff(config), config.VALKEY_RETRY_ATTEMPTS)
+    if is_cluster(config):
+        return valkey.cluster.ValkeyCluster(
+            startup_nodes=[
+                valkey.cluster.ClusterNode(node["host"], node["port"])
+                for node in config.VALKEY_SHARD_NODES
+            ],
+            max_connections=config.VALKEY_POOL_SIZE,
+            retry=retry,
+            ssl=config.VALKEY_SSL,
+            **_ssl_kwargs(config),
+            **_connection_kwargs(config),
+        )
+    pool = valkey.BlockingConnectionPool(
+        max_connections=config.VALKEY_MAX_CONNECTIONS,
+        timeout=config.VALKEY_COMMAND_TIMEOUT,
+        connection_class=valkey.SSLConnection if config.VALKEY_SSL else valkey.Connection,
+        host=config.VALKEY_HOST,
+        port=config.VALKEY_PORT,
+        db=config.VALKEY_DB,
+        retry=retry,
+        **_ssl_kwargs(config),
+        **_connection_kwargs(config),
+    )
+    return valkey.Valkey(connection_pool=pool)
+
+
+def build_async_client(
+    config=ValkeyConfig,
+) -> valkey.asyncio.Valkey | valkey.asyncio.cluster.ValkeyCluster:
+    """asyncio twin of build_client with the same limits."""
+    retry = valkey.asyncio.retry.Retry(_backoff(config), config.VALKEY_RETRY_ATTEMPTS)
+    if is_cluster(config):
+        return valkey.asyncio.cluster.ValkeyCluster(
+            startup_nodes=[
+                valkey.asyncio.cluster.ClusterNode(node["host"], node["port"])
+                for node in config.VALKEY_SHARD_NODES
+            ],
+            max_connections=config.VALKEY_POOL_SIZE,
+            retry=retry,
+            ssl=config.VALKEY_SSL,
+            **_ssl_kwargs(config),
+            **_connection_kwargs(config),
+        )
+    pool = valkey.asyncio.BlockingConnectionPool(
+        max_connections=config.VALKEY_MAX_CONNECTIONS,
+        timeout=config.VALKEY_COMMAND_TIMEOUT,
+        connection_class=(
+            valkey.asyncio.SSLConnection if config.VALKEY_SSL else valkey.asyncio.Connection
+        ),
+        host=config.VALKEY_HOST,
+        port=config.VALKEY_PORT,
+        db=config.VALKEY_DB,
+        retry=retry,
+        **_ssl_kwargs(config),
+        **_connection_kwargs(config),
+    )
+    return valkey.asyncio.Valkey(connection_pool=pool)
+
+
+def _pool_usage(pool) -> tuple[int, int, int]:
+    """(in use, idle, max) for any valkey pool or async cluster node."""
+    if hasattr(pool, "_free"):  # asyncio cluster node
+        return len(pool._connections) - len(pool._free), len(pool._free), pool.max_connections
+    if isinstance(pool, valkey.BlockingConnectionPool):
+        idle = sum(1 for connection in list(pool.pool.queue) if connection is not None)
+        return len(pool._connections) - idle, idle, pool.max_connections
+    return len(pool._in_use_connections), len(pool._available_connections), pool.max_connections
+
+
+def _pools(client) -> list:
+    if isinstance(client, valkey.cluster.ValkeyCluster):
+        return [
+            node.valkey_connection.connection_pool
+            for node in client.get_nodes()
+            if node.valkey_connection is not None
+        ]
+    if isinstance(client, valkey.asyncio.cluster.ValkeyCluster):
+        return client.get_nodes()
+    return [client.connection_pool]
+
+
+class ValkeyPool:
+    """Process-wide sync and asyncio Valkey clients sharing one configuration."""
+
+    def __init__(self, config=ValkeyConfig, name: str = "default"):
+        self.name = name
+        self.client = build_client(config)
+        self.async_client = build_async_client(config)
+        _POOLS.add(self)
+
+    def usage(self) -> dict[str, tuple[int, int, int]]:
+        """Summed (in use, idle, max) connections per client kind."""
+        usage = {}
+        for kind, client in (("sync", self.client), ("async", self.async_client)):
+            totals = [_pool_usage(pool) for pool in _pools(client)]
+            usage[kind] = tuple(sum(values) for values in zip(*totals)) if totals else (0, 0, 0)
+        return usage
+
+    def ping(self) -> bool:
+        try:
+            return bool(self.client.ping())
+        except valkey.ValkeyError as e:
+            logger.warning(f"Valkey ping failed: {e}")
+            return False
+
+    async def aping(self) -> bool:
+        try:
+            return bool(await self.async_client.ping())
+        except valkey.ValkeyError as e:
+            logger.warning(f"Valkey ping failed: {e}")
+            return False
+
+    def close(self) -> None:
+        self.client.close()
+        if not isinstance(self.client, valkey.cluster.ValkeyCluster):
+            self.client.connection_pool.disconnect()
+
+    async def aclose(self) -> None:
+        await self.async_client.aclose()
+        if not isinstance(self.async_client, valkey.asyncio.cluster.ValkeyCluster):
+            await self.async_client.connection_pool.disconnect()
+        self.close()
+
+
+_POOLS: "weakref.WeakSet[ValkeyPool]" = weakref.WeakSet()
+
+
+class ValkeyPoolCollector:
+    """Reports live pool usage at scrape time under VALKEY_METRICS_NAMESPACE."""
+
+    def __init__(self, namespace: str = ValkeyConfig.VALKEY_METRICS_NAMESPACE):
+        self.namespace = namespace
+
+    def collect(self):
+        connections = GaugeMetricFamily(
+            f"{self.namespace}_pool_connections",
+            "Valkey pool connections by state",
+            labels=["pool", "client", "state"],
+        )
+        capacity = GaugeMetricFamily(
+            f"{self.namespace}_pool_max_connections",
+            "Valkey pool connection limit",
+            labels=["pool", "client"],
+        )
+        for pool in list(_POOLS):
+            for kind, (in_use, idle, max_connections) in pool.usage().items():
+                connections.add_metric([pool.name, kind, "in_use"], in_use)
+                connections.add_metric([pool.name, kind, "idle"], idle)
+                capacity.add_metric([pool.name, kind], max_connections)
+        yield connections
+        yield capacity
+
+
+if ValkeyConfig.VALKEY_METRICS_ENABLED:
+    REGISTRY.register(ValkeyPoolCollector())
+
+
+_pool: ValkeyPool | None = None
+
+
+def get_valkey_pool() -> ValkeyPool:
+    """Return the shared pool, creating it on first use (clients connect lazily)."""
+    global _pool
+    if _pool is None:
+        _pool = ValkeyPool()
+    return _pool
+
+
+async def close_valkey_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.aclose()
+        _pool = None